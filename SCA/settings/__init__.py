@@ -0,0 +1,20 @@
+"""
+Settings entry point.
+
+``DJANGO_SETTINGS_MODULE`` stays ``SCA.settings``; the profile is picked by
+the ``DJANGO_ENV`` environment variable so that production never imports
+development-only modules. ``manage.py test`` always uses ``test``.
+"""
+
+import os
+
+DJANGO_ENV = os.environ.get("DJANGO_ENV", "dev")
+
+if DJANGO_ENV == "prod":
+    from SCA.settings.prod import *  # noqa: F401,F403
+elif DJANGO_ENV == "dev":
+    from SCA.settings.dev import *  # noqa: F401,F403
+elif DJANGO_ENV == "test":
+    from SCA.settings.test import *  # noqa: F401,F403
+else:
+    raise ImportError(f"Unknown DJANGO_ENV: {DJANGO_ENV}")
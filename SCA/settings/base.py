@@ -0,0 +1,360 @@
+"""
+Django settings for SCA project shared by every environment.
+
+Generated by 'django-admin startproject' using Django 5.1.4.
+Environment specific overrides live in ``dev.py``, ``prod.py`` and are
+selected by the ``DJANGO_ENV`` environment variable (see ``__init__.py``).
+
+For more information on this file, see
+https://docs.djangoproject.com/en/5.1/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/5.1/ref/settings/
+"""
+
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.environ.get(
+    "DJANGO_SECRET_KEY",
+    "django-insecure-n7wtozw5*x!$n28iq6%eg*+((m(^d2z5(3z7umnhg=(%tvghvj",
+)
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    host
+    for host in os.environ.get("DJANGO_ALLOWED_HOSTS", "").split(",")
+    if host
+]
+
+# Application definition
+
+INSTALLED_APPS = [
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+    "rest_framework",
+    "app",
+    "drf_spectacular",
+]
+
+MIDDLEWARE = [
+    # Before anything that checks the Host header or redirects.
+    "app.health.HealthCheckMiddleware",
+    "app.profiling.ProfilingMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.contrib.sessions.middleware.SessionMiddleware",
+    "django.middleware.common.CommonMiddleware",
+    "django.middleware.csrf.CsrfViewMiddleware",
+    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "django.contrib.messages.middleware.MessageMiddleware",
+    "django.middleware.clickjacking.XFrameOptionsMiddleware",
+]
+
+ROOT_URLCONF = "SCA.urls"
+
+TEMPLATES = [
+    {
+        "BACKEND": "django.template.backends.django.DjangoTemplates",
+        "DIRS": [BASE_DIR / "templates"],
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "context_processors": [
+                "django.template.context_processors.debug",
+                "django.template.context_processors.request",
+                "django.contrib.auth.context_processors.auth",
+                "django.contrib.messages.context_processors.messages",
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = "SCA.wsgi.application"
+
+# Database
+# https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+
+# DATABASES = {
+#     "default": {
+#         "ENGINE": "django.db.backends.sqlite3",
+#         "NAME": BASE_DIR / "db.sqlite3",
+#     }
+# }
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.environ.get("POSTGRES_DB", "spycat_api"),
+        "USER": os.environ.get("POSTGRES_USER", "spycat_api"),
+        "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "spycat_api"),
+        "HOST": os.environ.get("POSTGRES_HOST", "db"),
+        "PORT": int(os.environ.get("POSTGRES_PORT", 5432)),
+    }
+}
+
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.Argon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+# Password validation
+# https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.MinimumLengthValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.CommonPasswordValidator",
+    },
+    {
+        "NAME": "django.contrib.auth.password_validation.NumericPasswordValidator",
+    },
+]
+
+# Internationalization
+# https://docs.djangoproject.com/en/5.1/topics/i18n/
+
+LANGUAGE_CODE = "en-us"
+
+TIME_ZONE = "UTC"
+
+USE_I18N = True
+
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/5.1/howto/static-files/
+
+STATIC_URL = "static/"
+
+# Default primary key field type
+# https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
+
+DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+
+AUTH_USER_MODEL = "app.AdminCSAModel"
+
+REST_FRAMEWORK = {
+    "DEFAULT_PERMISSION_CLASSES": [
+        "rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly"
+    ],
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "rest_framework_simplejwt.authentication.JWTAuthentication",
+    ],
+    "DEFAULT_THROTTLE_CLASSES": [
+        "app.throttling.BatchAwareAnonRateThrottle",
+        "app.throttling.BatchAwareUserRateThrottle",
+    ],
+    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "PAGE_SIZE": 50,
+    "DEFAULT_THROTTLE_RATES": {"anon": "10/minute", "user": "100/minute"},
+    "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+}
+
+SIMPLE_JWT = {
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
+    "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
+    "ROTATE_REFRESH_TOKENS": True,
+    "AUTH_TOKEN_CLASSES": ("app.authentication.RevocableAccessToken",),
+    "TOKEN_REFRESH_SERIALIZER": (
+        "app.authentication.RevocationAwareTokenRefreshSerializer"
+    ),
+    "TOKEN_VERIFY_SERIALIZER": (
+        "app.authentication.RevocationAwareTokenVerifySerializer"
+    ),
+}
+
+SPECTACULAR_SETTINGS = {
+    "TITLE": "Cat Spy Agency API",
+    "DESCRIPTION": "API for Cat Spy Agency",
+    "VERSION": "1.0.0",
+    "SERVE_INCLUDE_SCHEMA": False,
+    "SWAGGER_UI_SETTINGS": {
+        "deepLinking": True,
+        "defaultModelRendering": "model",
+        "defaultModelsExpandDepth": 2,
+        "defaultModelExpandDepth": 2,
+    },
+}
+
+# Delta sync for field clients (GET /api/v1/missions/changes/)
+SYNC_BATCH_SIZE = 100
+SYNC_MAX_BATCH_SIZE = 500
+SYNC_SETTLE_SECONDS = 1
+
+# Idempotency-Key support for mission create/update endpoints
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+IDEMPOTENCY_MAX_KEYS = 100_000
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+IDEMPOTENCY_WAIT_TIMEOUT = 10
+IDEMPOTENCY_PRUNE_PROBABILITY = 0.01
+
+# Background tasks (python manage.py run_workers)
+TASK_BATCH_SIZE = 50
+TASK_POLL_INTERVAL = 1.0
+TASK_REPORT_INTERVAL = 60
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BASE_DELAY = 5
+TASK_RETRY_MAX_DELAY = 600
+# Seconds a task of a handler registered with lock=False is claimed for;
+# should the worker die, the task is run again after that.
+TASK_LEASE = 300
+
+# Breed catalog used to validate CatModel.breed
+BREED_CATALOG_URL = "https://api.thecatapi.com/v1/breeds"
+# Called for the breed names when the cached catalog is missing.
+BREED_CATALOG_SOURCE = "app.breeds.fetch_breed_names"
+BREED_CATALOG_CACHE_TIMEOUT = 60 * 60 * 24
+# Seconds to wait for TheCatAPI to connect and to answer.
+BREED_CATALOG_REQUEST_TIMEOUT = 10
+BREED_CATALOG_REFRESH_INTERVAL = 60 * 60 * 6
+
+# Caches: "default" is per process, "shared" is seen by every process
+# and lives in a table of the default database (created on deploy with
+# python manage.py createcachetable)
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "app_shared_cache",
+    },
+}
+
+# Readiness probe (GET /readyz) result cache
+READINESS_CACHE_SECONDS = 5
+
+# Prebuilt OpenAPI schema (python manage.py build_schema)
+OPENAPI_SCHEMA_PATH = BASE_DIR / "openapi-schema.yaml"
+OPENAPI_SCHEMA_USE_FILE = True
+OPENAPI_SCHEMA_MAX_AGE = 60 * 60 * 24
+
+# Archival of completed missions (python manage.py archive_missions)
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 500
+
+# Batch retrieval with ?ids= on list endpoints
+BATCH_RETRIEVE_MAX_IDS = 100
+
+# Bulk target completion (POST /api/v1/missions/complete-targets/)
+BULK_COMPLETE_MAX_TARGETS = 1000
+
+# Payroll report (python manage.py payroll_report)
+PAYROLL_REPORT_CHUNK_SIZE = 2000
+
+# Audit log buffer, flushed when full or after the interval (seconds)
+AUDIT_BUFFER_SIZE = 200
+AUDIT_FLUSH_INTERVAL = 2.0
+
+# Request profiling (app.profiling.ProfilingMiddleware). Off unless one of
+# these is set: Server-Timing headers, the fraction of requests profiled
+# with cProfile, or the latency (seconds) above which stacks are sampled.
+PROFILING_SERVER_TIMING = os.environ.get("PROFILING_SERVER_TIMING") == "1"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", 0))
+PROFILING_SLOW_THRESHOLD = (
+    float(os.environ["PROFILING_SLOW_THRESHOLD"])
+    if os.environ.get("PROFILING_SLOW_THRESHOLD")
+    else None
+)
+PROFILING_SAMPLE_INTERVAL = 0.01
+PROFILING_DIR = Path(os.environ.get("PROFILING_DIR", "/tmp/sca-profiles"))
+PROFILING_MAX_FILES = 100
+
+# JWT revocation (app.revocation). Each process keeps a Bloom filter of
+# revoked token ids, synced with the database every
+# REVOCATION_SYNC_INTERVAL seconds and rebuilt without expired ids every
+# REVOCATION_REBUILD_INTERVAL seconds.
+REVOCATION_BLOOM_BITS = 2**20
+REVOCATION_BLOOM_HASHES = 7
+REVOCATION_SYNC_INTERVAL = 5
+REVOCATION_REBUILD_INTERVAL = 60 * 10
+
+# Optimistic concurrency: refuse mission updates without If-Match (428)
+CONCURRENCY_REQUIRE_IF_MATCH = False
+
+# Batch endpoint (POST /api/v1/batch/): operations per batch, combined size
+# of their bodies in bytes, and seconds after which no further operation
+# is started
+BATCH_MAX_OPERATIONS = 20
+BATCH_MAX_BODY_BYTES = 1024 * 1024
+BATCH_TIMEOUT = 10
+
+# Sharding of missions and targets by region (app.sharding). Shards are
+# extra databases on the PostgreSQL server, listed once and never
+# reordered, since each shard's position picks its range of ids:
+#   SHARD_DATABASES=east,west SHARD_MAP=UA:east,PL:east,FR:west
+# Regions not in SHARD_MAP stay on the default database.
+SHARD_DATABASES = [
+    alias
+    for alias in os.environ.get("SHARD_DATABASES", "").split(",")
+    if alias
+]
+SHARD_MAP = dict(
+    item.split(":", 1)
+    for item in os.environ.get("SHARD_MAP", "").split(",")
+    if item
+)
+SHARD_ID_RANGE = 10**12
+RESHARD_BATCH_SIZE = 500
+for alias in SHARD_DATABASES:
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "NAME": os.environ.get(
+            f"SHARD_{alias.upper()}_DB",
+            f"{DATABASES['default']['NAME']}_{alias}",
+        ),
+        "HOST": os.environ.get(
+            f"SHARD_{alias.upper()}_HOST", DATABASES["default"]["HOST"]
+        ),
+    }
+DATABASE_ROUTERS = ["app.sharding.ShardRouter"]
+
+# Garbage collection (python manage.py gc_agency): rows deleted per
+# transaction, seconds per run, how long finished tasks and tombstones are
+# kept, and where an interrupted run records its progress. Sync clients
+# offline for longer than GC_TOMBSTONE_RETENTION get 410 Gone from
+# /missions/changes/ and must resync from scratch.
+GC_BATCH_SIZE = 500
+GC_MAX_SECONDS = 300
+GC_TASK_RETENTION = timedelta(days=7)
+GC_TOMBSTONE_RETENTION = timedelta(days=90)
+GC_CHECKPOINT_PATH = Path(
+    os.environ.get("GC_CHECKPOINT_PATH", "/tmp/sca-gc-checkpoint.json")
+)
+
+# Autosaved target notes (app.autosave): drafts are written after this
+# many autosaves of a process or the interval (seconds), on commit and
+# before completion, in batches of the same size
+NOTES_AUTOSAVE_BUFFER_SIZE = 500
+NOTES_AUTOSAVE_FLUSH_INTERVAL = 2.0
+
+# Table snapshots (python manage.py snapshot_export / snapshot_import):
+# tables copied in parallel, and rows per chunk of the SQLite format
+SNAPSHOT_JOBS = int(os.environ.get("SNAPSHOT_JOBS", 4))
+SNAPSHOT_CHUNK_SIZE = 5000
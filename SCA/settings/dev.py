@@ -0,0 +1,32 @@
+"""
+Development settings: debug mode, Django Debug Toolbar and
+django-extensions.
+"""
+
+from SCA.settings.base import *  # noqa: F401,F403
+from SCA.settings.base import INSTALLED_APPS, MIDDLEWARE
+
+DEBUG = True
+
+INTERNAL_IPS = [
+    "127.0.0.1",
+]
+
+INSTALLED_APPS = INSTALLED_APPS + [
+    "debug_toolbar",
+    "django_extensions",
+]
+
+MIDDLEWARE = (
+    MIDDLEWARE[:2]
+    + [
+        "debug_toolbar.middleware.DebugToolbarMiddleware",
+    ]
+    + MIDDLEWARE[2:]
+)
+
+# Regenerate the schema on the first request instead of serving the file,
+# so it follows code changes picked up by the autoreloader.
+OPENAPI_SCHEMA_USE_FILE = False
+
+PROFILING_SERVER_TIMING = True
@@ -0,0 +1,28 @@
+"""
+Production settings: no debug tooling, secrets and hosts from the
+environment, JSON-only API rendering and persistent DB connections.
+"""
+
+import os
+
+from SCA.settings.base import *  # noqa: F401,F403
+from SCA.settings.base import DATABASES, REST_FRAMEWORK
+
+DEBUG = False
+
+SECRET_KEY = os.environ["DJANGO_SECRET_KEY"]
+
+SESSION_COOKIE_SECURE = True
+CSRF_COOKIE_SECURE = True
+
+DATABASES["default"]["CONN_MAX_AGE"] = int(
+    os.environ.get("DJANGO_CONN_MAX_AGE", 60)
+)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# The browsable API pulls in the template engine and forms on the first
+# request; API clients only ever ask for JSON.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ["rest_framework.renderers.JSONRenderer"],
+}
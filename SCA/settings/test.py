@@ -0,0 +1,32 @@
+"""
+Test settings: a fast password hasher, a fixed breed list instead of
+TheCatAPI, and a test runner that keeps the migrated test databases,
+runs test cases in parallel processes and reports the slowest tests.
+"""
+
+from SCA.settings.base import *  # noqa: F401,F403
+
+# Hashing is not under test; Argon2 costs tens of milliseconds per user.
+PASSWORD_HASHERS = [
+    "django.contrib.auth.hashers.MD5PasswordHasher",
+]
+
+BREED_CATALOG_SOURCE = "app.tests.utils.stub_breed_names"
+
+TEST_RUNNER = "app.tests.runner.TimedTestRunner"
+# Reuse the test databases between runs (--keepdb); parallel workers are
+# cloned from them with CREATE DATABASE ... TEMPLATE.
+TEST_KEEPDB = True
+# Run test cases in one process per CPU unless --parallel is given.
+TEST_PARALLEL = True
+# Slowest tests listed after each run, and the duration in seconds
+# above which a test is flagged as slow.
+TEST_SLOWEST = 10
+TEST_SLOW_THRESHOLD = 0.5
+
+# Test users share the same few ids, so throttling counts would carry
+# over from test to test; tests of throttling patch the throttles.
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,  # noqa: F405
+    "DEFAULT_THROTTLE_RATES": {"anon": "10000/minute", "user": "10000/minute"},
+}
@@ -0,0 +1,94 @@
+from datetime import datetime
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Exists, OuterRef
+
+from app.models import (
+    ArchivedMissionModel,
+    ArchivedTargetModel,
+    MissionModel,
+    TargetModel,
+    TombstoneModel,
+)
+
+
+def archive_batch(
+    completed_before: datetime,
+    batch_size: int,
+    using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """
+    Move up to ``batch_size`` missions of shard ``using`` completed before
+    ``completed_before`` into the archive tables on the default database.
+
+    Targets are copied per mission; the hot target rows are deleted once no
+    remaining mission references them. Deleted missions get a tombstone, so
+    delta sync clients drop them as well. Returns the number of archived
+    missions.
+
+    The archive commits first; should the delete on a shard fail, running
+    the batch again skips the missions already archived.
+    """
+    with transaction.atomic(using=using):
+        missions = list(
+            MissionModel.objects.using(using)
+            .select_for_update(skip_locked=True)
+            .filter(completed=True, updated_at__lt=completed_before)
+            .order_by("updated_at", "id")[:batch_size]
+        )
+        if not missions:
+            return 0
+
+        mission_ids = [mission.id for mission in missions]
+        through = MissionModel.targets.through
+        links = list(
+            through.objects.using(using)
+            .filter(missionmodel_id__in=mission_ids)
+            .select_related("targetmodel")
+            .order_by("id")
+        )
+
+        with transaction.atomic(savepoint=False):
+            archived = set(
+                ArchivedMissionModel.objects.filter(
+                    id__in=mission_ids
+                ).values_list("id", flat=True)
+            )
+            ArchivedMissionModel.objects.bulk_create(
+                ArchivedMissionModel(
+                    id=mission.id,
+                    completed=mission.completed,
+                    updated_at=mission.updated_at,
+                )
+                for mission in missions
+                if mission.id not in archived
+            )
+            ArchivedTargetModel.objects.bulk_create(
+                ArchivedTargetModel(
+                    mission_id=link.missionmodel_id,
+                    target_id=link.targetmodel_id,
+                    name=link.targetmodel.name,
+                    country=link.targetmodel.country,
+                    notes=link.targetmodel.notes,
+                    completed=link.targetmodel.completed,
+                )
+                for link in links
+                if link.missionmodel_id not in archived
+            )
+            TombstoneModel.objects.bulk_create(
+                TombstoneModel(
+                    model_name=MissionModel._meta.model_name,
+                    object_id=mission_id,
+                )
+                for mission_id in mission_ids
+                if mission_id not in archived
+            )
+
+        MissionModel.objects.using(using).filter(id__in=mission_ids).delete()
+        TargetModel.objects.using(using).filter(
+            id__in={link.targetmodel_id for link in links}
+        ).exclude(
+            Exists(through.objects.filter(targetmodel_id=OuterRef("pk")))
+        ).delete()
+
+    return len(missions)
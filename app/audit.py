@@ -0,0 +1,62 @@
+from contextvars import ContextVar
+from typing import List, Optional
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+from app.buffers import FlushingBuffer
+from app.models import AuditLogModel
+
+_actor: ContextVar = ContextVar("audit_actor", default=None)
+
+
+def set_actor(user):
+    """Attribute changes made by the current request to ``user``."""
+    return _actor.set(user if user and user.is_authenticated else None)
+
+
+def reset_actor(token) -> None:
+    _actor.reset(token)
+
+
+def _write(entries: List[AuditLogModel]) -> None:
+    AuditLogModel.objects.bulk_create(entries)
+
+
+audit_buffer = FlushingBuffer(
+    "audit",
+    _write,
+    max_size=settings.AUDIT_BUFFER_SIZE,
+    max_age=settings.AUDIT_FLUSH_INTERVAL,
+)
+
+
+def record(
+    action: str,
+    instance: models.Model,
+    object_id: Optional[int] = None,
+    using: Optional[str] = None,
+    **changes
+) -> None:
+    """
+    Queue an audit entry for ``instance``.
+
+    The entry is buffered only once the surrounding transaction on
+    ``using``, by default the database ``instance`` was read from,
+    commits, so rolled back changes are never logged, and is written to
+    the database in a batch later on.
+    """
+    user = _actor.get()
+    entry = AuditLogModel(
+        action=action,
+        model_name=instance._meta.model_name,
+        object_id=object_id if object_id is not None else instance.pk,
+        user_id=user.pk if user else None,
+        username=user.get_username() if user else "",
+        changes=changes,
+        created_at=timezone.now(),
+    )
+    transaction.on_commit(
+        lambda: audit_buffer.add(entry), using=using or instance._state.db
+    )
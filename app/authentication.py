@@ -0,0 +1,56 @@
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.utils import extend_schema_serializer
+from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer,
+    TokenVerifySerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import (
+    AccessToken,
+    RefreshToken,
+    UntypedToken,
+)
+
+from app.revocation import is_token_revoked, revoke_token
+
+
+class RevocableTokenMixin:
+    """Reject tokens revoked through ``app.revocation``."""
+
+    def verify(self) -> None:
+        super().verify()
+        if is_token_revoked(self):
+            raise TokenError(_("Token has been revoked"))
+
+
+class RevocableAccessToken(RevocableTokenMixin, AccessToken):
+    pass
+
+
+class RevocableRefreshToken(RevocableTokenMixin, RefreshToken):
+    access_token_class = RevocableAccessToken
+
+
+@extend_schema_serializer(component_name="TokenRefresh")
+class RevocationAwareTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuse revoked refresh tokens and revoke the old one on rotation."""
+
+    token_class = RevocableRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            revoke_token(refresh)
+        return data
+
+
+@extend_schema_serializer(component_name="TokenVerify")
+class RevocationAwareTokenVerifySerializer(TokenVerifySerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        if is_token_revoked(UntypedToken(attrs["token"])):
+            raise ValidationError(_("Token has been revoked"))
+        return data
@@ -0,0 +1,206 @@
+"""
+Write-behind store for autosaved target notes.
+
+Clients autosave the notes of a target every few seconds. Each autosave
+is only checked against the completed-target rules and stored as a
+draft, one ``NoteDraftModel`` row per target on the default database, so
+the latest notes win whichever process received them. ``flush_notes``
+writes the drafts of every process in one ``bulk_update`` per shard and
+returns once they are written; it runs for the targets of a mission on
+an explicit commit and for the targets being completed before they are.
+A process that received autosaves also flushes every draft
+``NOTES_AUTOSAVE_FLUSH_INTERVAL`` seconds later, or after
+``NOTES_AUTOSAVE_BUFFER_SIZE`` of them. Drafts of a process that dies
+are written by the next timed flush of any other.
+
+``TargetModel.notes_saved_at`` records when the stored notes were
+received, so a flush never overwrites newer notes, e.g. of a synchronous
+update. Notes of targets completed in the meantime are dropped, as a
+synchronous update would have been rejected.
+"""
+
+import logging
+from typing import Collection, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from app.audit import record, reset_actor, set_actor
+from app.buffers import FlushingBuffer
+from app.models import MissionModel, NoteDraftModel, TargetModel
+from app.sharding import shards_for
+
+logger = logging.getLogger(__name__)
+
+
+def _drain(target_ids: Optional[Collection[int]] = None) -> None:
+    """
+    Write the drafts saved before the call, of ``target_ids`` or of every
+    target, in batches of ``NOTES_AUTOSAVE_BUFFER_SIZE``, and delete them.
+    """
+    waiting = NoteDraftModel.objects.filter(saved_at__lte=timezone.now())
+    if target_ids is not None:
+        waiting = waiting.filter(target_id__in=target_ids)
+    dropped = 0
+    # Costs one query when there is nothing to write.
+    while waiting.exists():
+        with transaction.atomic():
+            # Autosaves of the locked targets wait for the batch.
+            drafts = list(
+                waiting.select_for_update()
+                .select_related("user")
+                .order_by("id")[: settings.NOTES_AUTOSAVE_BUFFER_SIZE]
+            )
+            dropped += _write(drafts)
+            NoteDraftModel.objects.filter(
+                id__in=[draft.id for draft in drafts]
+            ).delete()
+    if dropped:
+        logger.info(
+            "Dropped autosaved notes of %d completed or deleted target(s)",
+            dropped,
+        )
+
+
+def _write(drafts: List[NoteDraftModel]) -> int:
+    """
+    Write ``drafts`` to their targets. Returns the number of drafts
+    dropped because their target is deleted or completed.
+    """
+    latest: Dict[int, NoteDraftModel] = {
+        draft.target_id: draft for draft in drafts
+    }
+    dropped = 0
+    for alias in shards_for(TargetModel):
+        if not latest:
+            break
+        dropped += _write_on(alias, latest)
+    # Whatever is left was not found on any shard.
+    return dropped + len(latest)
+
+
+def _write_on(using: str, latest: Dict[int, NoteDraftModel]) -> int:
+    """
+    Write the drafts of ``latest`` whose target is on shard ``using`` and
+    remove them from ``latest``. Returns the number of drafts dropped
+    because their target or mission is completed.
+    """
+    through = MissionModel.targets.through
+    now = timezone.now()
+    with transaction.atomic(using=using):
+        targets = list(
+            TargetModel.objects.using(using)
+            .select_for_update()
+            .filter(id__in=latest)
+            .annotate(
+                in_completed_mission=Exists(
+                    through.objects.filter(
+                        targetmodel_id=OuterRef("pk"),
+                        missionmodel__completed=True,
+                    )
+                )
+            )
+            .only("id", "completed", "notes_saved_at", "version")
+        )
+        dropped = 0
+        updated, drafts = [], []
+        for target in targets:
+            draft = latest.pop(target.id)
+            if target.completed or target.in_completed_mission:
+                dropped += 1
+                continue
+            if (
+                target.notes_saved_at is not None
+                and target.notes_saved_at > draft.saved_at
+            ):
+                # Newer notes were saved since this draft was received.
+                continue
+            target.notes = draft.notes
+            target.notes_saved_at = draft.saved_at
+            target.updated_at = now
+            target.version += 1
+            updated.append(target)
+            drafts.append(draft)
+        if not updated:
+            return dropped
+
+        TargetModel.objects.using(using).bulk_update(
+            updated, ["notes", "notes_saved_at", "updated_at", "version"]
+        )
+        # Delta sync follows missions; show it the new notes.
+        MissionModel.objects.using(using).filter(
+            id__in={draft.mission_id for draft in drafts}
+        ).update(updated_at=now)
+
+        for target, draft in zip(updated, drafts):
+            token = set_actor(draft.user)
+            try:
+                record(
+                    "update",
+                    target,
+                    mission=draft.mission_id,
+                    notes=draft.notes,
+                )
+            finally:
+                reset_actor(token)
+    return dropped
+
+
+def _flush(target_ids: List[int]) -> None:
+    # The ids only tell that drafts are waiting; write all of them.
+    try:
+        _drain()
+    except Exception:
+        logger.exception("Autosaved notes kept for the next flush")
+
+
+notes_buffer = FlushingBuffer(
+    "notes",
+    _flush,
+    max_size=settings.NOTES_AUTOSAVE_BUFFER_SIZE,
+    max_age=settings.NOTES_AUTOSAVE_FLUSH_INTERVAL,
+)
+
+
+def autosave_notes(
+    mission: MissionModel, target: TargetModel, notes: Optional[str], user
+) -> None:
+    """
+    Store ``notes`` as the draft of ``target`` of ``mission``.
+
+    Raises ``ValidationError`` under the same rules as
+    ``MissionUpdateSerializer``; the checks are repeated when the notes
+    are written.
+    """
+    if mission.completed:
+        raise ValidationError("You cannot update a completed mission.")
+    if target.completed:
+        raise ValidationError(
+            "You cannot update the notes because the target is complete."
+        )
+    NoteDraftModel.objects.bulk_create(
+        [
+            NoteDraftModel(
+                target_id=target.id,
+                mission_id=mission.id,
+                notes=notes,
+                saved_at=timezone.now(),
+                user=user if user and user.is_authenticated else None,
+            )
+        ],
+        update_conflicts=True,
+        unique_fields=["target_id"],
+        update_fields=["mission_id", "notes", "saved_at", "user"],
+    )
+    notes_buffer.add(target.id)
+
+
+def flush_notes(target_ids: Collection[int]) -> None:
+    """
+    Write the drafts of ``target_ids`` saved by every process before
+    returning.
+    """
+    _drain(target_ids)
@@ -0,0 +1,187 @@
+"""
+Execution of ``POST /api/v1/batch/``.
+
+A batch is an ordered list of sub-requests against the routes of
+``app.urls``. They run in-process, one after the other, through the same
+views as standalone requests. The batch request is authenticated and
+throttled once; each sub-request reuses its user and skips throttling
+(see ``app.throttling``). In atomic mode the batch runs in one
+transaction on every shard, all rolled back when a sub-request fails.
+"""
+
+import io
+import json
+import logging
+import time
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.http import Http404, HttpRequest
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.utils.encoders import JSONEncoder
+
+from app.sharding import shard_aliases
+
+logger = logging.getLogger(__name__)
+
+# Only the routes of app.urls can be batched, except the batch view itself.
+BATCH_NAMESPACE = "app"
+BATCH_URL_NAME = "batch"
+
+# Request headers not copied from the batch request to its sub-requests;
+# the rest are shared (Host, User-Agent, Accept-Language, ...).
+_PER_REQUEST_HEADERS = {
+    "HTTP_AUTHORIZATION",
+    "HTTP_COOKIE",
+    "HTTP_IF_MATCH",
+    "HTTP_IDEMPOTENCY_KEY",
+}
+
+
+class BatchAborted(Exception):
+    """Raised inside the transaction to roll an atomic batch back."""
+
+
+@dataclass
+class BatchResult:
+    responses: List[Dict[str, Any]] = field(default_factory=list)
+    rolled_back: bool = False
+
+
+def _error(status_code: int, message: str) -> Dict[str, Any]:
+    return {"status": status_code, "headers": {}, "body": {"error": message}}
+
+
+def _build_request(request: HttpRequest, operation: dict) -> WSGIRequest:
+    url = urlsplit(operation["path"])
+    body = (
+        json.dumps(operation["body"], cls=JSONEncoder).encode()
+        if operation.get("body") is not None
+        else b""
+    )
+    environ = {
+        key: value
+        for key, value in request.META.items()
+        if isinstance(value, str)
+        and key not in _PER_REQUEST_HEADERS
+        and key not in ("CONTENT_TYPE", "CONTENT_LENGTH")
+    }
+    environ.update(
+        {
+            "REQUEST_METHOD": operation["method"],
+            "PATH_INFO": url.path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": url.query,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(body)),
+            "HTTP_ACCEPT": "application/json",
+            "wsgi.input": io.BytesIO(body),
+        }
+    )
+    for name, value in operation.get("headers", {}).items():
+        key = "HTTP_" + name.upper().replace("-", "_")
+        if key not in ("HTTP_AUTHORIZATION", "HTTP_COOKIE"):
+            environ[key] = value
+
+    subrequest = WSGIRequest(environ)
+    # Read by rest_framework.request.Request instead of authenticating.
+    subrequest._force_auth_user = request.user
+    subrequest._force_auth_token = request.auth
+    subrequest.is_batch_subrequest = True
+    return subrequest
+
+
+def _execute(request: HttpRequest, operation: dict) -> Dict[str, Any]:
+    path = urlsplit(operation["path"]).path
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return _error(status.HTTP_404_NOT_FOUND, f"No route for {path}.")
+    if (
+        BATCH_NAMESPACE not in match.namespaces
+        or match.url_name == BATCH_URL_NAME
+    ):
+        return _error(
+            status.HTTP_400_BAD_REQUEST, f"{path} cannot be batched."
+        )
+
+    try:
+        response = match.func(
+            _build_request(request, operation), *match.args, **match.kwargs
+        )
+    except Http404:
+        return _error(status.HTTP_404_NOT_FOUND, "Not found.")
+    except Exception:
+        logger.exception("Batched %s %s failed", operation["method"], path)
+        return _error(
+            status.HTTP_500_INTERNAL_SERVER_ERROR, "Internal server error."
+        )
+
+    if getattr(response, "streaming", False):
+        return _error(
+            status.HTTP_400_BAD_REQUEST,
+            f"{path} streams its response and cannot be batched.",
+        )
+    if hasattr(response, "data"):
+        body = response.data
+    else:
+        if hasattr(response, "render"):
+            response.render()
+        body = response.content.decode(response.charset) or None
+    headers = {
+        name: value
+        for name, value in response.items()
+        if name not in ("Content-Type", "Content-Length", "Vary", "Allow")
+    }
+    return {"status": response.status_code, "headers": headers, "body": body}
+
+
+def run_batch(
+    request: HttpRequest, operations: List[dict], atomic: bool = False
+) -> BatchResult:
+    """
+    Run ``operations`` in order on behalf of the user of ``request``.
+
+    Sub-requests still running after ``BATCH_TIMEOUT`` seconds are not
+    started; they, and in atomic mode everything after the first failed
+    sub-request, are reported with status 424.
+    """
+    result = BatchResult()
+    deadline = time.monotonic() + settings.BATCH_TIMEOUT
+
+    def run_all(stop_on_error: bool) -> Optional[str]:
+        for operation in operations:
+            if time.monotonic() > deadline:
+                return "The batch ran out of time."
+            response = _execute(request, operation)
+            result.responses.append(response)
+            if stop_on_error and response["status"] >= 400:
+                return "An earlier operation of the atomic batch failed."
+        return None
+
+    if atomic:
+        try:
+            with ExitStack() as stack:
+                # Sub-requests may write to any shard.
+                for alias in shard_aliases():
+                    stack.enter_context(transaction.atomic(using=alias))
+                reason = run_all(stop_on_error=True)
+                if reason is not None:
+                    raise BatchAborted(reason)
+        except BatchAborted as e:
+            reason = str(e)
+            result.rolled_back = True
+    else:
+        reason = run_all(stop_on_error=False)
+
+    for _ in operations[len(result.responses) :]:
+        result.responses.append(
+            _error(status.HTTP_424_FAILED_DEPENDENCY, f"Not run: {reason}")
+        )
+    return result
@@ -0,0 +1,41 @@
+from typing import List
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+BREED_CATALOG_CACHE_KEY = "breed-catalog"
+# Refreshed by one worker, read by every process.
+BREED_CATALOG_CACHE = "shared"
+
+
+def fetch_breed_names() -> List[str]:
+    response = requests.get(
+        settings.BREED_CATALOG_URL,
+        timeout=settings.BREED_CATALOG_REQUEST_TIMEOUT,
+    )
+    response_json = response.json()
+    return [name["name"] for name in response_json]
+
+
+def get_breed_names() -> List[str]:
+    """
+    Return known breed names, preferring the catalog cached by the
+    ``refresh_breed_catalog`` task over ``BREED_CATALOG_SOURCE``, a live
+    call to TheCatAPI.
+    """
+    breed_list = caches[BREED_CATALOG_CACHE].get(BREED_CATALOG_CACHE_KEY)
+    if breed_list is None:
+        breed_list = import_string(settings.BREED_CATALOG_SOURCE)()
+    return breed_list
+
+
+def refresh_breed_catalog() -> List[str]:
+    breed_list = fetch_breed_names()
+    caches[BREED_CATALOG_CACHE].set(
+        BREED_CATALOG_CACHE_KEY,
+        breed_list,
+        timeout=settings.BREED_CATALOG_CACHE_TIMEOUT,
+    )
+    return breed_list
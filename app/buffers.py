@@ -0,0 +1,99 @@
+import atexit
+import logging
+import threading
+import weakref
+from typing import Callable, Generic, List, Optional, TypeVar
+
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_buffers: "weakref.WeakSet[FlushingBuffer]" = weakref.WeakSet()
+
+
+class FlushingBuffer(Generic[T]):
+    """
+    In-process buffer that hands its items to ``flush`` in batches.
+
+    A batch is written as soon as ``max_size`` items are buffered, or
+    ``max_age`` seconds after the first item of the batch arrived, or when
+    the process exits (see ``flush_all``). Batches are written one at a
+    time, in the order they were taken. Items are lost if the process
+    dies without exiting cleanly, so only buffer what can be afforded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List[T]], None],
+        max_size: int,
+        max_age: float,
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.max_age = max_age
+        self._flush = flush
+        self._items: List[T] = []
+        self._lock = threading.Lock()
+        # Held while a batch is taken and written, so that batches are
+        # written in order and flush() returns once everything is written.
+        self._write_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        _buffers.add(self)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def add(self, item: T) -> None:
+        with self._lock:
+            self._items.append(item)
+            if len(self._items) < self.max_size:
+                self._schedule()
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                batch = self._take()
+            if batch:
+                self._write(batch)
+
+    def _schedule(self) -> None:
+        if self._timer is None:
+            self._timer = threading.Timer(self.max_age, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self) -> None:
+        try:
+            self.flush()
+        finally:
+            # The timer thread got its own database connection.
+            connections.close_all()
+
+    def _take(self) -> List[T]:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._items = self._items, []
+        return batch
+
+    def _write(self, batch: List[T]) -> None:
+        try:
+            self._flush(batch)
+        except Exception:
+            logger.exception(
+                "Dropped %d item(s) of buffer %s", len(batch), self.name
+            )
+
+
+def flush_all() -> None:
+    """Flush every buffer of this process, e.g. before a worker exits."""
+    for buffer in list(_buffers):
+        buffer.flush()
+
+
+atexit.register(flush_all)
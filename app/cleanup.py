@@ -0,0 +1,169 @@
+"""
+Garbage collection of rows nothing needs any more (``manage.py gc_agency``).
+
+Each sweep is a queryset selecting dead rows, by an anti-join or an
+expiry date. Sweeps walk the table in primary key order and delete small
+batches, each in its own short transaction. The delete repeats the
+sweep's condition, so a row revived since it was selected (a target
+linked to a new mission) is kept.
+"""
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, OuterRef, QuerySet
+from django.utils import timezone
+
+from app.models import (
+    IdempotencyKeyModel,
+    MissionModel,
+    RevokedTokenModel,
+    TaskModel,
+    TargetModel,
+    TombstoneModel,
+)
+from app.sharding import on_shard, shards_for
+from app.sync import raise_tombstone_watermark
+
+
+@dataclass(frozen=True)
+class Sweep:
+    name: str
+    description: str
+    dead_rows: Callable[[], QuerySet]
+    # Called with the primary keys of each batch, in its transaction.
+    on_delete: Optional[Callable[[List[int]], None]] = None
+
+
+def _orphaned_targets() -> QuerySet:
+    return TargetModel.objects.exclude(
+        Exists(
+            MissionModel.targets.through.objects.filter(
+                targetmodel_id=OuterRef("pk")
+            )
+        )
+    )
+
+
+def _expired_idempotency_keys() -> QuerySet:
+    return IdempotencyKeyModel.objects.filter(
+        created_at__lt=timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+    )
+
+
+def _finished_tasks() -> QuerySet:
+    return TaskModel.objects.filter(
+        status__in=[TaskModel.Status.DONE, TaskModel.Status.FAILED],
+        finished_at__lt=timezone.now() - settings.GC_TASK_RETENTION,
+    )
+
+
+def _expired_revoked_tokens() -> QuerySet:
+    return RevokedTokenModel.objects.filter(expires_at__lt=timezone.now())
+
+
+def _old_tombstones() -> QuerySet:
+    return TombstoneModel.objects.filter(
+        deleted_at__lt=timezone.now() - settings.GC_TOMBSTONE_RETENTION
+    )
+
+
+SWEEPS = [
+    Sweep(
+        "orphaned_targets",
+        "targets no mission refers to",
+        _orphaned_targets,
+    ),
+    Sweep(
+        "idempotency_keys",
+        "idempotency keys past IDEMPOTENCY_KEY_TTL",
+        _expired_idempotency_keys,
+    ),
+    Sweep(
+        "tasks",
+        "tasks finished more than GC_TASK_RETENTION ago",
+        _finished_tasks,
+    ),
+    Sweep(
+        "revoked_tokens",
+        "revoked tokens that have expired anyway",
+        _expired_revoked_tokens,
+    ),
+    Sweep(
+        "tombstones",
+        "tombstones older than GC_TOMBSTONE_RETENTION",
+        _old_tombstones,
+        # Delta sync turns away cursors that missed them.
+        on_delete=raise_tombstone_watermark,
+    ),
+]
+
+
+def shard_querysets(sweep: Sweep) -> List[Tuple[str, QuerySet]]:
+    """The dead rows of ``sweep`` on every database that holds its model."""
+    queryset = sweep.dead_rows()
+    return [
+        (f"{sweep.name}@{alias}", on_shard(queryset, alias))
+        for alias in shards_for(queryset.model)
+    ]
+
+
+def delete_batch(
+    queryset: QuerySet,
+    after: int,
+    batch_size: int,
+    on_delete: Optional[Callable[[List[int]], None]] = None,
+) -> Tuple[int, Optional[int]]:
+    """
+    Delete the first ``batch_size`` rows of ``queryset`` with a primary key
+    above ``after``, then call ``on_delete`` with their keys. Returns the
+    number deleted and the last key examined, ``None`` once there is
+    nothing left.
+    """
+    with transaction.atomic(using=queryset.db):
+        ids = list(
+            queryset.filter(pk__gt=after)
+            .order_by("pk")
+            .values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return 0, None
+        deleted, _ = queryset.filter(pk__in=ids).delete()
+        if deleted and on_delete is not None:
+            on_delete(ids)
+    return deleted, ids[-1]
+
+
+class Checkpoint:
+    """
+    Last primary key swept per sweep and database, kept in a JSON file so
+    an interrupted run resumes where it stopped.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.positions: Dict[str, int] = {}
+        if path is not None and path.exists():
+            self.positions = json.loads(path.read_text())
+
+    def get(self, key: str) -> int:
+        return self.positions.get(key, 0)
+
+    def set(self, key: str, position: Optional[int]) -> None:
+        if position is None:
+            self.positions.pop(key, None)
+        else:
+            self.positions[key] = position
+        self.save()
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        temporary = self.path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.positions))
+        os.replace(temporary, self.path)
@@ -0,0 +1,126 @@
+from dataclasses import dataclass, field
+from typing import Iterable, List, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef
+from django.utils import timezone
+
+from app.audit import record
+from app.autosave import flush_notes
+from app.models import CatPerformanceModel, MissionModel, TargetModel
+from app.sharding import shards_for
+
+
+@dataclass
+class CompletionResult:
+    targets: List[int] = field(default_factory=list)
+    missing: List[int] = field(default_factory=list)
+    missions: List[int] = field(default_factory=list)
+
+
+def complete_targets(target_ids: Iterable[int]) -> CompletionResult:
+    """
+    Mark the given targets completed and complete every mission that has
+    no incomplete target left, crediting and unassigning its cat like
+    ``finish_mission``.
+
+    Runs in one transaction per shard with a fixed number of queries,
+    whatever the number of targets and missions involved, after writing
+    the autosaved notes still buffered.
+    """
+    target_ids = list(dict.fromkeys(target_ids))
+    flush_notes(target_ids)
+    existing, mission_ids = set(), []
+    for alias in shards_for(TargetModel):
+        remaining = [pk for pk in target_ids if pk not in existing]
+        if not remaining:
+            break
+        completed, missions = _complete_targets_on(alias, remaining)
+        existing |= completed
+        mission_ids += missions
+
+    return CompletionResult(
+        targets=[pk for pk in target_ids if pk in existing],
+        missing=[pk for pk in target_ids if pk not in existing],
+        missions=mission_ids,
+    )
+
+
+def _complete_targets_on(
+    using: str, target_ids: List[int]
+) -> Tuple[Set[int], List[int]]:
+    through = MissionModel.targets.through
+    now = timezone.now()
+
+    with transaction.atomic(using=using):
+        existing = set(
+            TargetModel.objects.using(using)
+            .filter(id__in=target_ids)
+            .values_list("id", flat=True)
+        )
+        if not existing:
+            return existing, []
+        TargetModel.objects.using(using).filter(
+            id__in=existing, completed=False
+        ).update(completed=True, updated_at=now, version=F("version") + 1)
+
+        candidates = through.objects.filter(
+            targetmodel_id__in=existing
+        ).values("missionmodel_id")
+        missions = list(
+            MissionModel.objects.using(using)
+            .select_for_update()
+            .filter(id__in=candidates, completed=False)
+            .exclude(
+                Exists(
+                    through.objects.filter(
+                        missionmodel_id=OuterRef("pk"),
+                        targetmodel__completed=False,
+                    )
+                )
+            )
+            .order_by("id")
+            .values_list("id", "cat_id")
+        )
+        mission_ids = [mission_id for mission_id, _ in missions]
+        assigned = {
+            mission_id: cat_id
+            for mission_id, cat_id in missions
+            if cat_id is not None
+        }
+        if assigned:
+            target_counts = (
+                through.objects.using(using)
+                .filter(missionmodel_id__in=assigned)
+                .values_list("missionmodel_id")
+                .annotate(targets=Count("id"))
+                .order_by()
+            )
+            CatPerformanceModel.record(
+                (assigned[mission_id], targets)
+                for mission_id, targets in target_counts
+            )
+        MissionModel.objects.using(using).filter(id__in=mission_ids).update(
+            completed=True,
+            cat=None,
+            updated_at=now,
+            version=F("version") + 1,
+        )
+        # Delta sync follows missions; show it the completed targets of
+        # the missions that are still active too.
+        MissionModel.objects.using(using).filter(id__in=candidates).exclude(
+            id__in=mission_ids
+        ).update(updated_at=now, version=F("version") + 1)
+
+        for target_id in target_ids:
+            if target_id in existing:
+                record("complete", TargetModel(id=target_id), using=using)
+        for mission_id, cat_id in missions:
+            record(
+                "complete",
+                MissionModel(id=mission_id),
+                using=using,
+                cat=cat_id,
+            )
+
+    return existing, mission_ids
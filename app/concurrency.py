@@ -0,0 +1,120 @@
+import re
+from typing import Optional, Sequence
+
+from django.conf import settings
+from django.db import models
+from django.db.models import Case, F, Q, Value, When
+from django.http import HttpRequest
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_ETAG_RE = re.compile(r'^(?:W/)?"(\d+)"$')
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The resource was modified by another request."
+    default_code = "precondition_failed"
+
+
+class PreconditionRequired(APIException):
+    status_code = status.HTTP_428_PRECONDITION_REQUIRED
+    default_detail = "This request requires an If-Match header."
+    default_code = "precondition_required"
+
+
+def get_etag(instance: models.Model) -> str:
+    return f'"{instance.version}"'
+
+
+def parse_if_match(request: HttpRequest) -> Optional[int]:
+    """
+    Return the version required by the ``If-Match`` header, or ``None``
+    when the request is unconditional.
+    """
+    header = request.headers.get("If-Match")
+    if header is None or header.strip() == "*":
+        if header is None and settings.CONCURRENCY_REQUIRE_IF_MATCH:
+            raise PreconditionRequired()
+        return None
+
+    match = _ETAG_RE.match(header.strip())
+    if match is None:
+        # No version this server hands out can match.
+        raise PreconditionFailed()
+    return int(match.group(1))
+
+
+def conditional_update(
+    instance: models.Model, expected_version: Optional[int], **fields
+) -> None:
+    """
+    Write ``fields`` and bump the version with a single
+    ``UPDATE ... WHERE id = ? AND version = ?``.
+
+    Raises ``PreconditionFailed`` when the row is no longer at
+    ``expected_version``. With ``expected_version=None`` the update is
+    unconditional and the new version is read back, so run it in a
+    transaction. ``instance`` is updated in place.
+    """
+    queryset = (
+        type(instance).objects.using(instance._state.db).filter(pk=instance.pk)
+    )
+    if expected_version is not None:
+        queryset = queryset.filter(version=expected_version)
+
+    if not queryset.update(version=F("version") + 1, **fields):
+        raise PreconditionFailed()
+
+    for attr, value in fields.items():
+        setattr(instance, attr, value)
+    if expected_version is not None:
+        instance.version = expected_version + 1
+    else:
+        # Another writer may have bumped it since the instance was read.
+        instance.version = queryset.values_list("version", flat=True).get()
+
+
+def conditional_bulk_update(
+    instances: Sequence[models.Model], fields: Sequence[str]
+) -> None:
+    """
+    Write ``fields`` of ``instances`` and bump their versions with a single
+    ``UPDATE ... WHERE (id = ? AND version = ?) OR ...``, expecting every
+    row at the version of its instance.
+
+    Raises ``PreconditionFailed`` when any row changed since its instance
+    was read; run it in a transaction so the other rows are rolled back.
+    ``instances`` get their new versions.
+    """
+    if not instances:
+        return
+    model = type(instances[0])
+    condition = Q()
+    for instance in instances:
+        condition |= Q(pk=instance.pk, version=instance.version)
+    values = {}
+    for name in fields:
+        field = model._meta.get_field(name)
+        values[field.attname] = Case(
+            *(
+                When(
+                    pk=instance.pk,
+                    then=Value(
+                        getattr(instance, field.attname), output_field=field
+                    ),
+                )
+                for instance in instances
+            ),
+            output_field=field,
+        )
+
+    updated = (
+        model.objects.using(instances[0]._state.db)
+        .filter(condition)
+        .update(version=F("version") + 1, **values)
+    )
+    if updated != len(instances):
+        raise PreconditionFailed()
+    for instance in instances:
+        instance.version += 1
@@ -0,0 +1,96 @@
+import time
+from typing import List, Optional, Tuple
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.migrations.executor import MigrationExecutor
+from django.db.utils import OperationalError
+from django.http import HttpRequest, JsonResponse
+from django.views.decorators.http import require_GET
+
+_migrations_applied = False
+_last_check: Optional[Tuple[float, bool, str]] = None
+
+
+def get_pending_migrations(database: str = DEFAULT_DB_ALIAS) -> List[str]:
+    connection = connections[database]
+    executor = MigrationExecutor(connection)
+    targets = executor.loader.graph.leaf_nodes()
+    return [
+        f"{migration.app_label}.{migration.name}"
+        for migration, _ in executor.migration_plan(targets)
+    ]
+
+
+def check_readiness() -> Tuple[bool, str]:
+    """
+    Check that the database answers and that every migration is applied.
+
+    The result is cached for ``READINESS_CACHE_SECONDS`` so that frequent
+    probes do not hammer the database. Once all migrations are applied the
+    migration check is skipped for the lifetime of the process, because
+    the code cannot gain new migrations without a restart.
+    """
+    global _migrations_applied, _last_check
+
+    now = time.monotonic()
+    if _last_check and now - _last_check[0] < settings.READINESS_CACHE_SECONDS:
+        return _last_check[1], _last_check[2]
+
+    try:
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute("SELECT 1")
+        if not _migrations_applied:
+            pending = get_pending_migrations()
+            _migrations_applied = not pending
+        if _migrations_applied:
+            ready, reason = True, "ok"
+        else:
+            ready, reason = False, f"{len(pending)} pending migration(s)"
+    except OperationalError as e:
+        ready, reason = False, f"database unavailable: {e}"
+
+    _last_check = (now, ready, reason)
+    return ready, reason
+
+
+def reset_readiness_cache() -> None:
+    global _migrations_applied, _last_check
+    _migrations_applied = False
+    _last_check = None
+
+
+@require_GET
+def healthz(request: HttpRequest) -> JsonResponse:
+    """Liveness probe: the process is up and serving requests."""
+    return JsonResponse({"status": "ok"})
+
+
+@require_GET
+def readyz(request: HttpRequest) -> JsonResponse:
+    """Readiness probe: the worker can serve traffic that needs the DB."""
+    ready, reason = check_readiness()
+    return JsonResponse(
+        {"status": "ok" if ready else "unavailable", "detail": reason},
+        status=200 if ready else 503,
+    )
+
+
+PROBES = {"/healthz": healthz, "/readyz": readyz}
+
+
+class HealthCheckMiddleware:
+    """
+    Answer the probes ahead of every other middleware, in particular before
+    ``CommonMiddleware`` validates the Host header: container health checks
+    call ``localhost``, which ``ALLOWED_HOSTS`` does not list in production.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        probe = PROBES.get(request.path_info)
+        if probe is not None:
+            return probe(request)
+        return self.get_response(request)
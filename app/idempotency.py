@@ -0,0 +1,192 @@
+import hashlib
+import json
+import random
+import time
+from functools import wraps
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from app.models import IdempotencyKeyModel
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# Response headers stored with the body and sent again on a replay.
+STORED_HEADERS = ("ETag", "Location")
+
+
+def get_request_hash(request: Request) -> str:
+    body = json.dumps(
+        request.data, cls=JSONEncoder, sort_keys=True, separators=(",", ":")
+    )
+    fingerprint = f"{request.method}:{request.path}:{body}"
+    return hashlib.sha256(fingerprint.encode()).hexdigest()
+
+
+def _claim(
+    request: Request, key: str, request_hash: str
+) -> Optional[IdempotencyKeyModel]:
+    """
+    Insert an in-progress row for ``key``. Returns ``None`` if another
+    request already holds the key.
+    """
+    user = request.user if request.user.is_authenticated else None
+    try:
+        with transaction.atomic():
+            return IdempotencyKeyModel.objects.create(
+                key=key,
+                user=user,
+                method=request.method,
+                path=request.path[:255],
+                request_hash=request_hash,
+            )
+    except IntegrityError:
+        return None
+
+
+def _get_existing(request: Request, key: str) -> Optional[IdempotencyKeyModel]:
+    user = request.user if request.user.is_authenticated else None
+    return IdempotencyKeyModel.objects.filter(user=user, key=key).first()
+
+
+def _is_abandoned(record: IdempotencyKeyModel) -> bool:
+    age = timezone.now() - record.created_at
+    if record.status_code is None:
+        return age.total_seconds() > settings.IDEMPOTENCY_LOCK_TIMEOUT
+    return age > settings.IDEMPOTENCY_KEY_TTL
+
+
+def _replay(record: IdempotencyKeyModel) -> Response:
+    return Response(
+        record.response_body,
+        status=record.status_code,
+        headers={**record.response_headers, REPLAYED_HEADER: "true"},
+    )
+
+
+def _wait_for_completion(
+    request: Request, key: str, request_hash: str
+) -> Optional[Response]:
+    """
+    Wait for the request holding ``key`` to finish and replay its response.
+    Returns ``None`` once the key is free to be claimed again.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+    delay = 0.05
+    while True:
+        record = _get_existing(request, key)
+        if record is None:
+            return None
+        if record.request_hash != request_hash:
+            return Response(
+                {
+                    "error": f"{IDEMPOTENCY_HEADER} was already used for "
+                    f"a different request."
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if _is_abandoned(record):
+            IdempotencyKeyModel.objects.filter(
+                id=record.id, status_code=record.status_code
+            ).delete()
+            return None
+        if record.status_code is not None:
+            return _replay(record)
+        if time.monotonic() >= deadline:
+            return Response(
+                {
+                    "error": "A request with this "
+                    f"{IDEMPOTENCY_HEADER} is still in progress."
+                },
+                status=status.HTTP_409_CONFLICT,
+            )
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+
+
+def prune_idempotency_keys() -> int:
+    """
+    Delete expired keys and keep the table below ``IDEMPOTENCY_MAX_KEYS``.
+    """
+    expired_before = timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+    deleted, _ = IdempotencyKeyModel.objects.filter(
+        created_at__lt=expired_before
+    ).delete()
+
+    max_keys = settings.IDEMPOTENCY_MAX_KEYS
+    boundary = list(
+        IdempotencyKeyModel.objects.order_by("-id").values_list(
+            "id", flat=True
+        )[max_keys : max_keys + 1]
+    )
+    if boundary:
+        evicted, _ = IdempotencyKeyModel.objects.filter(
+            id__lte=boundary[0]
+        ).delete()
+        deleted += evicted
+    return deleted
+
+
+def idempotent(view_method: Callable) -> Callable:
+    """
+    Make a viewset action safe to retry with an ``Idempotency-Key`` header.
+
+    The first request with a key runs the action and stores its response;
+    retries with the same key and payload get the stored response without
+    running the action again. Duplicates that arrive while the first
+    request is still running wait for it to finish.
+    """
+
+    @wraps(view_method)
+    def wrapper(self, request: Request, *args, **kwargs) -> Response:
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(
+                {"error": f"{IDEMPOTENCY_HEADER} is too long."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        request_hash = get_request_hash(request)
+        record = _claim(request, key, request_hash)
+        while record is None:
+            response = _wait_for_completion(request, key, request_hash)
+            if response is not None:
+                return response
+            record = _claim(request, key, request_hash)
+
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            record.delete()
+            return response
+
+        record.status_code = response.status_code
+        record.response_body = json.loads(
+            json.dumps(response.data, cls=JSONEncoder)
+        )
+        record.response_headers = {
+            header: response[header]
+            for header in STORED_HEADERS
+            if response.has_header(header)
+        }
+        record.save(
+            update_fields=["status_code", "response_body", "response_headers"]
+        )
+
+        if random.random() < settings.IDEMPOTENCY_PRUNE_PROBABILITY:
+            prune_idempotency_keys()
+        return response
+
+    return wrapper
@@ -0,0 +1,66 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from app.archive import archive_batch
+from app.models import MissionModel
+from app.sharding import shards_for
+
+
+class Command(BaseCommand):
+    """Django command that moves old completed missions to the archive"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.ARCHIVE_AFTER_DAYS,
+            help="Archive missions completed at least this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.ARCHIVE_BATCH_SIZE,
+            help="Missions moved per transaction.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        completed_before = timezone.now() - timedelta(
+            days=options["older_than_days"]
+        )
+        total = batches = 0
+        for alias in shards_for(MissionModel):
+            while (
+                options["max_batches"] is None
+                or batches < options["max_batches"]
+            ):
+                archived = archive_batch(
+                    completed_before, options["batch_size"], using=alias
+                )
+                if not archived:
+                    break
+                total += archived
+                batches += 1
+                self.stdout.write(
+                    f"Archived {archived} mission(s) from {alias}..."
+                )
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {total} mission(s) in total.")
+        )
@@ -0,0 +1,33 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from app.schema import generate_schema, write_schema
+
+
+class Command(BaseCommand):
+    """Django command that prebuilds the OpenAPI schema served by the API"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if the stored schema is out of date.",
+        )
+
+    def handle(self, *args, **options):
+        path = Path(settings.OPENAPI_SCHEMA_PATH)
+        content = generate_schema()
+
+        if options["check"]:
+            if not path.exists() or path.read_bytes() != content:
+                raise CommandError(
+                    f"{path} is out of date. "
+                    f"Run 'python manage.py build_schema'."
+                )
+            self.stdout.write(self.style.SUCCESS(f"{path} is up to date."))
+            return
+
+        write_schema(content, path)
+        self.stdout.write(self.style.SUCCESS(f"Schema written to {path}."))
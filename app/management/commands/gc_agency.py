@@ -0,0 +1,98 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from app.cleanup import SWEEPS, Checkpoint, delete_batch, shard_querysets
+
+
+class Command(BaseCommand):
+    """Django command that deletes orphaned targets and expired rows"""
+
+    help = (
+        "Delete targets no mission refers to, expired idempotency keys and "
+        "revoked tokens, old finished tasks and old tombstones, in small "
+        "batches. Stops after --max-seconds and resumes from the "
+        "checkpoint file on the next run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--only",
+            action="append",
+            choices=[sweep.name for sweep in SWEEPS],
+            help="Run only this sweep; may be repeated.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows would be deleted.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.GC_BATCH_SIZE,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--max-seconds",
+            type=float,
+            default=settings.GC_MAX_SECONDS,
+            help="Stop starting new batches after this many seconds.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.05,
+            help="Seconds to sleep between batches.",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            type=Path,
+            default=settings.GC_CHECKPOINT_PATH,
+            help="File recording progress between runs.",
+        )
+
+    def handle(self, *args, **options):
+        sweeps = [
+            sweep
+            for sweep in SWEEPS
+            if not options["only"] or sweep.name in options["only"]
+        ]
+        if options["dry_run"]:
+            for sweep in sweeps:
+                for key, queryset in shard_querysets(sweep):
+                    self.stdout.write(
+                        f"{key}: {queryset.count()} {sweep.description}"
+                    )
+            return
+
+        checkpoint = Checkpoint(options["checkpoint"])
+        deadline = time.monotonic() + options["max_seconds"]
+        for sweep in sweeps:
+            for key, queryset in shard_querysets(sweep):
+                total = 0
+                position = checkpoint.get(key)
+                while position is not None:
+                    if time.monotonic() >= deadline:
+                        self.stdout.write(
+                            self.style.WARNING(
+                                f"{key}: deleted {total}, out of time; "
+                                "the next run resumes here."
+                            )
+                        )
+                        return
+                    deleted, position = delete_batch(
+                        queryset,
+                        position,
+                        options["batch_size"],
+                        on_delete=sweep.on_delete,
+                    )
+                    checkpoint.set(key, position)
+                    total += deleted
+                    if position is not None:
+                        time.sleep(options["pause"])
+                self.stdout.write(
+                    self.style.SUCCESS(f"{key}: deleted {total}.")
+                )
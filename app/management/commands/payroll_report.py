@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from app.reports import PAYROLL_FORMATS, payroll_rows
+
+
+class Command(BaseCommand):
+    """Django command that streams the payroll report to stdout"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(PAYROLL_FORMATS),
+            default="csv",
+            help="Output format.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.PAYROLL_REPORT_CHUNK_SIZE,
+            help="Cats fetched from the database at a time.",
+        )
+
+    def handle(self, *args, **options):
+        render, _ = PAYROLL_FORMATS[options["format"]]
+        for line in render(payroll_rows(options["chunk_size"])):
+            self.stdout.write(line, ending="")
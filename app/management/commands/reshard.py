@@ -0,0 +1,72 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from app.sharding import move_region_batch, shard_aliases, shard_for_region
+
+
+class Command(BaseCommand):
+    """Django command that moves the missions of a region to another shard"""
+
+    help = (
+        "Move the missions of a region, with their targets, to another "
+        "shard in batches. Point SHARD_MAP at the new shard first, so that "
+        "new missions of the region are created there."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("region", help="Region (target country).")
+        parser.add_argument("--to", required=True, help="Destination shard.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.RESHARD_BATCH_SIZE,
+            help="Missions moved per transaction.",
+        )
+        parser.add_argument(
+            "--max-batches",
+            type=int,
+            default=None,
+            help="Stop after this many batches.",
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="Seconds to sleep between batches.",
+        )
+
+    def handle(self, *args, **options):
+        region, destination = options["region"], options["to"]
+        if destination not in shard_aliases():
+            raise CommandError(f"Unknown shard: {destination}.")
+        if shard_for_region(region) != destination:
+            raise CommandError(
+                f"SHARD_MAP sends {region} to {shard_for_region(region)}; "
+                f"point it to {destination} first."
+            )
+
+        total = batches = 0
+        for source in shard_aliases():
+            if source == destination:
+                continue
+            while (
+                options["max_batches"] is None
+                or batches < options["max_batches"]
+            ):
+                moved = move_region_batch(
+                    region, source, destination, options["batch_size"]
+                )
+                if not moved:
+                    break
+                total += moved
+                batches += 1
+                self.stdout.write(f"Moved {moved} mission(s) from {source}...")
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Moved {total} mission(s) of {region} to {destination}."
+            )
+        )
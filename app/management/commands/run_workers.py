@@ -0,0 +1,99 @@
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import connection
+
+from app.tasks import ensure_scheduled, process_batch, queue_depth
+
+
+class Command(BaseCommand):
+    """Django command that runs background task workers"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Number of worker threads.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=settings.TASK_BATCH_SIZE,
+            help="Maximum number of tasks claimed at once.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=settings.TASK_POLL_INTERVAL,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Process ready tasks until the queue is empty, then exit.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Print the queue depth and exit.",
+        )
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.report_depth()
+            return
+
+        self.stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+            signal.signal(signal.SIGINT, lambda *_: self.stop.set())
+
+        ensure_scheduled("refresh_breed_catalog")
+
+        threads = [
+            threading.Thread(
+                target=self.work,
+                args=(options["batch_size"], options["poll_interval"]),
+                kwargs={"once": options["once"]},
+                daemon=True,
+            )
+            for _ in range(options["concurrency"])
+        ]
+        self.stdout.write(f"Starting {len(threads)} worker(s)...")
+        for thread in threads:
+            thread.start()
+
+        last_report = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+            if time.monotonic() - last_report >= settings.TASK_REPORT_INTERVAL:
+                self.report_depth()
+                last_report = time.monotonic()
+
+        self.stdout.write(self.style.SUCCESS("Workers stopped."))
+
+    def work(self, batch_size: int, poll_interval: float, once: bool):
+        try:
+            while not self.stop.is_set():
+                if process_batch(batch_size):
+                    continue
+                if once:
+                    break
+                self.stop.wait(poll_interval)
+        finally:
+            connection.close()
+
+    def report_depth(self):
+        depth = queue_depth()
+        if not depth:
+            self.stdout.write("Queue is empty.")
+        for name, counts in sorted(depth.items()):
+            summary = ", ".join(
+                f"{status}={count}" for status, count in sorted(counts.items())
+            )
+            self.stdout.write(f"{name}: {summary}")
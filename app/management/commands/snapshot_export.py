@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from app.snapshot import SnapshotError, export_snapshot
+
+
+class Command(BaseCommand):
+    """Django command that writes a snapshot of the agency tables"""
+
+    help = (
+        "Write cats, missions, targets and their links to an empty "
+        "directory, one file per table plus a manifest with checksums. "
+        "Restore with snapshot_import."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directory", type=Path, help="Directory to write to."
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database (shard) to export.",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=settings.SNAPSHOT_JOBS,
+            help="Tables exported at the same time (PostgreSQL only).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            manifest = export_snapshot(
+                options["directory"], options["database"], options["jobs"]
+            )
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        for table in manifest["tables"]:
+            self.stdout.write(
+                f"{table['table']}: {table['rows']} row(s), "
+                f"{table['bytes']} bytes"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Snapshot written to {options['directory']}.")
+        )
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from app.snapshot import SnapshotError, import_snapshot
+
+
+class Command(BaseCommand):
+    """Django command that restores a snapshot of the agency tables"""
+
+    help = (
+        "Load a directory written by snapshot_export into empty tables of "
+        "a database migrated to the same migrations. Checksums are "
+        "verified before anything is loaded; indexes and constraints "
+        "are rebuilt after the load."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "directory", type=Path, help="Directory to read from."
+        )
+        parser.add_argument(
+            "--database",
+            default=DEFAULT_DB_ALIAS,
+            help="Database (shard) to restore into.",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=settings.SNAPSHOT_JOBS,
+            help="Tables loaded at the same time (PostgreSQL only).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            tables = import_snapshot(
+                options["directory"], options["database"], options["jobs"]
+            )
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        for table in tables:
+            self.stdout.write(f"{table.table}: {table.rows} row(s)")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Snapshot {options['directory']} restored into "
+                f"{options['database']}."
+            )
+        )
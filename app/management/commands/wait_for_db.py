@@ -1,22 +1,67 @@
+import random
 import time
 
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 from django.db import connection
 from django.db.utils import OperationalError
 
+from app.health import get_pending_migrations
+
 
 class Command(BaseCommand):
     """Django command that waits for database to be available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Seconds to wait before giving up.",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Upper bound of the delay between attempts, in seconds.",
+        )
+        parser.add_argument(
+            "--check-migrations",
+            action="store_true",
+            help="Fail if there are unapplied migrations.",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options["timeout"]
+        attempt = 0
+        while True:
             try:
                 connection.ensure_connection()
-                db_conn = True
+                break
             except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']}s."
+                    )
+                delay = random.uniform(
+                    0, min(options["max_delay"], 0.1 * 2**attempt)
+                )
+                delay = min(delay, remaining)
+                attempt += 1
+                self.stdout.write(
+                    f"Database unavailable, waiting {delay:.2f} seconds..."
+                )
+                time.sleep(delay)
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
+
+        pending = get_pending_migrations()
+        if not pending:
+            self.stdout.write(self.style.SUCCESS("No pending migrations."))
+        elif options["check_migrations"]:
+            raise CommandError(
+                f"{len(pending)} pending migration(s): {', '.join(pending)}"
+            )
+        else:
+            self.stdout.write(f"{len(pending)} pending migration(s).")
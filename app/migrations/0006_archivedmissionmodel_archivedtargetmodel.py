@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0005_taskmodel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArchivedMissionModel",
+            fields=[
+                (
+                    "id",
+                    models.BigIntegerField(primary_key=True, serialize=False),
+                ),
+                ("completed", models.BooleanField(default=True)),
+                ("updated_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ArchivedTargetModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("target_id", models.BigIntegerField()),
+                ("name", models.CharField(max_length=100)),
+                ("country", models.CharField(max_length=100)),
+                ("notes", models.TextField(blank=True, null=True)),
+                ("completed", models.BooleanField(default=False)),
+                (
+                    "mission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="targets",
+                        to="app.archivedmissionmodel",
+                    ),
+                ),
+            ],
+        ),
+    ]
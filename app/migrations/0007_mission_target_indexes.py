@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0006_archivedmissionmodel_archivedtargetmodel"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="missionmodel",
+            index=models.Index(
+                fields=["cat", "completed"], name="mission_cat_completed_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="missionmodel",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["id"],
+                name="mission_active_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="missionmodel",
+            index=models.Index(
+                condition=models.Q(("completed", True)),
+                fields=["updated_at", "id"],
+                name="mission_completed_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="targetmodel",
+            index=models.Index(
+                condition=models.Q(("completed", False)),
+                fields=["id"],
+                name="target_incomplete_idx",
+            ),
+        ),
+        migrations.RunSQL(
+            sql="CREATE INDEX mission_targets_target_mission_idx "
+            "ON app_missionmodel_targets (targetmodel_id, missionmodel_id);",
+            reverse_sql="DROP INDEX mission_targets_target_mission_idx;",
+        ),
+        migrations.AddConstraint(
+            model_name="missionmodel",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("completed", False)),
+                fields=("cat",),
+                name="unique_active_mission_per_cat",
+            ),
+        ),
+    ]
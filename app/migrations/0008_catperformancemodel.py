@@ -0,0 +1,66 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_ledger_rows(apps, schema_editor):
+    # Completed missions lost their cat, so history cannot be credited;
+    # every existing cat starts from zero.
+    alias = schema_editor.connection.alias
+    CatModel = apps.get_model("app", "CatModel")
+    CatPerformanceModel = apps.get_model("app", "CatPerformanceModel")
+    CatPerformanceModel.objects.using(alias).bulk_create(
+        CatPerformanceModel(cat_id=cat_id, experience=experience)
+        for cat_id, experience in CatModel.objects.using(alias)
+        .values_list("id", "experience")
+        .iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_mission_target_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatPerformanceModel",
+            fields=[
+                (
+                    "cat",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="performance",
+                        serialize=False,
+                        to="app.catmodel",
+                    ),
+                ),
+                ("missions_completed", models.PositiveIntegerField(default=0)),
+                ("targets_completed", models.PositiveIntegerField(default=0)),
+                ("experience", models.PositiveIntegerField(default=0)),
+                (
+                    "last_completed_at",
+                    models.DateTimeField(blank=True, null=True),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=[
+                            "-missions_completed",
+                            "-targets_completed",
+                            "-experience",
+                            "cat",
+                        ],
+                        name="cat_leaderboard_idx",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(
+            create_ledger_rows, reverse_code=migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:27
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0008_catperformancemodel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AuditLogModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "action",
+                    models.CharField(
+                        choices=[
+                            ("create", "Create"),
+                            ("update", "Update"),
+                            ("assign", "Assign"),
+                            ("complete", "Complete"),
+                            ("delete", "Delete"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("model_name", models.CharField(max_length=100)),
+                ("object_id", models.BigIntegerField()),
+                ("user_id", models.BigIntegerField(blank=True, null=True)),
+                ("username", models.CharField(blank=True, max_length=150)),
+                (
+                    "changes",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["model_name", "object_id", "id"],
+                        name="auditlog_object_idx",
+                    )
+                ],
+            },
+        ),
+    ]
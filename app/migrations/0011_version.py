@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0010_revokedtokenmodel"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="missionmodel",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name="targetmodel",
+            name="version",
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def set_regions(apps, schema_editor):
+    # A mission's region is the country of its first target.
+    MissionModel = apps.get_model("app", "MissionModel")
+    first_country = (
+        MissionModel.targets.through.objects.filter(
+            missionmodel_id=OuterRef("pk")
+        )
+        .order_by("id")
+        .values("targetmodel__country")[:1]
+    )
+    MissionModel.objects.using(schema_editor.connection.alias).update(
+        region=Coalesce(Subquery(first_country), Value(""))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0011_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="missionmodel",
+            name="region",
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                help_text="Country of the first target, the shard key.",
+                max_length=100,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="missionmodel",
+            name="cat",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="missions",
+                to="app.catmodel",
+            ),
+        ),
+        migrations.RunPython(
+            set_regions, reverse_code=migrations.RunPython.noop
+        ),
+    ]
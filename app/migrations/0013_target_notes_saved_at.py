@@ -0,0 +1,22 @@
+# Generated by Django 5.1.4 on 2026-10-19 18:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0012_mission_region"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="targetmodel",
+            name="notes_saved_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the current notes were received, to keep autosaved notes from overwriting newer ones.",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0013_target_notes_saved_at"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NoteDraftModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("target_id", models.BigIntegerField(unique=True)),
+                ("mission_id", models.BigIntegerField()),
+                ("notes", models.TextField(blank=True, null=True)),
+                ("saved_at", models.DateTimeField(db_index=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:14
+
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+
+
+def register_target_names(apps, schema_editor):
+    # The registry is on the default database, which is migrated before
+    # the shards; each shard adds the names of its own targets.
+    TargetModel = apps.get_model("app", "TargetModel")
+    TargetNameModel = apps.get_model("app", "TargetNameModel")
+    TargetNameModel.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        (
+            TargetNameModel(name=name)
+            for name in TargetModel.objects.using(
+                schema_editor.connection.alias
+            )
+            .values_list("name", flat=True)
+            .iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0014_notedraftmodel"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TargetNameModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.RunPython(
+            register_target_names, reverse_code=migrations.RunPython.noop
+        ),
+    ]
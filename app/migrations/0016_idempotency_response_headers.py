@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0015_targetnamemodel"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="idempotencykeymodel",
+            name="response_headers",
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-19 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0016_idempotency_response_headers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncWatermarkModel",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("tombstone_id", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
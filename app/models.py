@@ -1,7 +1,13 @@
 import requests
+from django.conf import settings
 from django.contrib.auth.models import Group, Permission, AbstractUser
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.db.models import Case, F, OuterRef, Subquery, Value, When
+from django.utils import timezone
+
+from app.breeds import get_breed_names
 
 
 class AdminCSAModel(AbstractUser):
@@ -66,9 +72,7 @@ class CatModel(AbstractUser):
 
     def clean(self):
         try:
-            response = requests.get("https://api.thecatapi.com/v1/breeds")
-            response_json = response.json()
-            breed_list = [name["name"] for name in response_json]
+            breed_list = get_breed_names()
         except requests.exceptions.RequestException as e:
             raise ValueError(f"Error fetching breed data: {e}")
 
@@ -80,15 +84,148 @@ class CatModel(AbstractUser):
         if self.experience > 50:
             raise ValidationError("Experience seems unrealistically high.")
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            updated = CatPerformanceModel.objects.filter(cat=self).update(
+                experience=self.experience
+            )
+            if not updated:
+                CatPerformanceModel.objects.create(
+                    cat=self, experience=self.experience
+                )
+
+    def delete(self, *args, **kwargs):
+        from app.sharding import shards_for
+
+        # The cascade only reaches missions on the default database.
+        for alias in shards_for(MissionModel):
+            if alias != DEFAULT_DB_ALIAS:
+                MissionModel.objects.using(alias).filter(cat=self).delete()
+        return super().delete(*args, **kwargs)
+
     def __str__(self):
         return self.name
 
 
+LEADERBOARD_ORDERING = [
+    "-missions_completed",
+    "-targets_completed",
+    "-experience",
+    "cat",
+]
+
+
+class CatPerformanceModel(models.Model):
+    """
+    Running totals per cat, updated whenever one of its missions is
+    completed, so the leaderboard never has to scan the mission history.
+
+    ``experience`` is copied from the cat so that the ranking is served by
+    one index.
+    """
+
+    cat = models.OneToOneField(
+        CatModel,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name="performance",
+    )
+    missions_completed = models.PositiveIntegerField(default=0)
+    targets_completed = models.PositiveIntegerField(default=0)
+    experience = models.PositiveIntegerField(default=0)
+    last_completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=LEADERBOARD_ORDERING,
+                name="cat_leaderboard_idx",
+            ),
+        ]
+
+    @classmethod
+    def record(cls, completions) -> None:
+        """
+        Add completed missions to the ledger.
+
+        ``completions`` holds one ``(cat_id, number_of_targets)`` pair per
+        completed mission. Every cat is updated in the same UPDATE.
+        """
+        totals = {}
+        for cat_id, targets in completions:
+            missions_total, targets_total = totals.get(cat_id, (0, 0))
+            totals[cat_id] = (missions_total + 1, targets_total + targets)
+        if not totals:
+            return
+
+        cls.objects.bulk_create(
+            [cls(cat_id=cat_id) for cat_id in totals], ignore_conflicts=True
+        )
+        cls.objects.filter(cat_id__in=totals).update(
+            missions_completed=F("missions_completed")
+            + Case(
+                *(
+                    When(cat_id=cat_id, then=Value(missions_total))
+                    for cat_id, (missions_total, _) in totals.items()
+                ),
+                output_field=models.PositiveIntegerField(),
+            ),
+            targets_completed=F("targets_completed")
+            + Case(
+                *(
+                    When(cat_id=cat_id, then=Value(targets_total))
+                    for cat_id, (_, targets_total) in totals.items()
+                ),
+                output_field=models.PositiveIntegerField(),
+            ),
+            experience=Subquery(
+                CatModel.objects.filter(pk=OuterRef("cat_id")).values(
+                    "experience"
+                )
+            ),
+            last_completed_at=timezone.now(),
+        )
+
+
 class TargetModel(models.Model):
     name = models.CharField(max_length=100, unique=True)
     country = models.CharField(max_length=100)
     notes = models.TextField(null=True, blank=True)
+    notes_saved_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the current notes were received, to keep autosaved "
+        "notes from overwriting newer ones.",
+    )
     completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(completed=False),
+                name="target_incomplete_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
+
+
+class TargetNameModel(models.Model):
+    """
+    Name of a target on any shard, on the default database, where its
+    unique constraint keeps names unique across shards (see
+    ``app.sharding.claim_target_names``). A name whose target was deleted
+    may be left behind and is claimed again.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
 
 
 class MissionModel(models.Model):
@@ -98,12 +235,69 @@ class MissionModel(models.Model):
         blank=True,
         on_delete=models.CASCADE,
         related_name="missions",
+        # Missions on other shards point to cats on the default database.
+        db_constraint=False,
     )
     targets = models.ManyToManyField(TargetModel, related_name="missions")
+    region = models.CharField(
+        max_length=100,
+        blank=True,
+        db_index=True,
+        help_text="Country of the first target, the shard key.",
+    )
     completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["cat", "completed"],
+                name="mission_cat_completed_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(completed=False),
+                name="mission_active_idx",
+            ),
+            models.Index(
+                fields=["updated_at", "id"],
+                condition=models.Q(completed=True),
+                name="mission_completed_updated_idx",
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cat"],
+                condition=models.Q(completed=False),
+                name="unique_active_mission_per_cat",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Writers that need to detect conflicts use
+        # app.concurrency.conditional_update instead.
+        if not self._state.adding:
+            self.version += 1
+        super().save(*args, **kwargs)
 
     def check_and_complete_mission(self):
         if all(target.completed for target in self.targets.all()):
+            self.complete()
+
+    def complete(self):
+        """Complete the mission, credit its cat and unassign it."""
+        from app.audit import record
+        from app.autosave import flush_notes
+
+        # Notes cannot change once the mission is completed.
+        flush_notes([target.id for target in self.targets.all()])
+        with transaction.atomic(using=self._state.db):
+            if self.cat_id is not None:
+                CatPerformanceModel.record(
+                    [(self.cat_id, len(self.targets.all()))]
+                )
+            record("complete", self, cat=self.cat_id)
             self.completed = True
             self.cat = None
             self.save()
@@ -113,4 +307,196 @@ class MissionModel(models.Model):
             raise ValidationError(
                 "Cannot delete a mission with a cat assigned."
             )
-        super().delete(*args, **kwargs)
+        from app.audit import record
+
+        with transaction.atomic(using=self._state.db):
+            mission_id = self.pk
+            result = super().delete(*args, **kwargs)
+            TombstoneModel.objects.create(
+                model_name=self._meta.model_name, object_id=mission_id
+            )
+            record("delete", self, object_id=mission_id)
+        return result
+
+
+class NoteDraftModel(models.Model):
+    """
+    Autosaved notes of a target not yet written to it (``app.autosave``).
+
+    One row per target, on the default database, so that every process
+    sees and writes the drafts received by the others.
+    """
+
+    target_id = models.BigIntegerField(unique=True)
+    mission_id = models.BigIntegerField()
+    notes = models.TextField(null=True, blank=True)
+    saved_at = models.DateTimeField(db_index=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="+",
+    )
+
+
+class AuditLogModel(models.Model):
+    """
+    Append-only record of a change to a mission or target.
+
+    The acting user is copied rather than referenced, so entries outlive
+    the user. ``created_at`` is the time of the change, not of the write.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = "create"
+        UPDATE = "update"
+        ASSIGN = "assign"
+        COMPLETE = "complete"
+        DELETE = "delete"
+
+    action = models.CharField(max_length=20, choices=Action.choices)
+    model_name = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    user_id = models.BigIntegerField(null=True, blank=True)
+    username = models.CharField(max_length=150, blank=True)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["model_name", "object_id", "id"],
+                name="auditlog_object_idx",
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Audit log entries are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValidationError("Audit log entries are append-only.")
+
+
+class RevokedTokenModel(models.Model):
+    """
+    JWT revoked before its expiry, e.g. on logout. Rows are useless once
+    ``expires_at`` has passed, because the token is rejected anyway.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+
+class TombstoneModel(models.Model):
+    """
+    Marker left behind when a row is deleted, so that delta sync clients
+    can drop their local copy.
+    """
+
+    model_name = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+class SyncWatermarkModel(models.Model):
+    """
+    Highest id of a tombstone deleted by ``manage.py gc_agency``; a single
+    row. Delta sync cursors below it may have missed deletions.
+    """
+
+    tombstone_id = models.BigIntegerField(default=0)
+
+
+class IdempotencyKeyModel(models.Model):
+    """
+    Response stored for a client supplied ``Idempotency-Key``.
+
+    A row without ``status_code`` is a claim held by a request that is
+    still running.
+    """
+
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.CASCADE,
+        related_name="idempotency_keys",
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(
+        null=True, blank=True, encoder=DjangoJSONEncoder
+    )
+    response_headers = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="unique_idempotency_key_per_user"
+            ),
+        ]
+
+
+class TaskModel(models.Model):
+    """Unit of background work picked up by ``manage.py run_workers``."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        DONE = "done", "Done"
+        FAILED = "failed", "Failed"
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "run_after"], name="task_ready_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
+
+
+class ArchivedMissionModel(models.Model):
+    """
+    Completed mission moved out of the hot tables. Keeps the id the mission
+    had in ``MissionModel``.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    completed = models.BooleanField(default=True)
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+class ArchivedTargetModel(models.Model):
+    """Snapshot of a target as it was when its mission was archived."""
+
+    mission = models.ForeignKey(
+        ArchivedMissionModel,
+        on_delete=models.CASCADE,
+        related_name="targets",
+    )
+    target_id = models.BigIntegerField()
+    name = models.CharField(max_length=100)
+    country = models.CharField(max_length=100)
+    notes = models.TextField(null=True, blank=True)
+    completed = models.BooleanField(default=False)
@@ -0,0 +1,313 @@
+"""
+Per-request profiling.
+
+``ProfilingMiddleware`` breaks the time of every request down by phase and
+reports it in a ``Server-Timing`` header. It can also profile a fraction
+of requests with cProfile, and sample the stacks of requests that run
+longer than a threshold. The profiles go to a bounded directory of files.
+
+With all ``PROFILING_*`` settings off the middleware removes itself from
+the stack, and ``phase`` costs one context variable lookup.
+"""
+
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+class Timings:
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+        self.queries = 0
+        self._active: Set[str] = set()
+
+    def add(self, name: str, duration: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def header(self, total: float) -> str:
+        metrics = []
+        for name, duration in self.durations.items():
+            metric = f"{name};dur={duration * 1000:.1f}"
+            if name == "db":
+                metric += f';desc="{self.queries} queries"'
+            metrics.append(metric)
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+_timings: ContextVar[Optional[Timings]] = ContextVar(
+    "profiling_timings", default=None
+)
+
+
+def is_active() -> bool:
+    return _timings.get() is not None
+
+
+@contextmanager
+def phase(name: str):
+    """
+    Add the time spent in the block to phase ``name`` of the current
+    request. Nested blocks of the same phase are only counted once.
+    """
+    timings = _timings.get()
+    if timings is None or name in timings._active:
+        yield
+        return
+
+    timings._active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+        timings._active.discard(name)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _timings.get()
+    if timings is not None:
+        timings.queries += 1
+    with phase("db"):
+        return execute(sql, params, many, context)
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        filename = Path(code.co_filename).name
+        stack.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(stack))
+
+
+class SlowRequestSampler:
+    """
+    One background thread per process that samples the stacks of requests
+    running for longer than ``threshold`` seconds, every ``interval``.
+    """
+
+    def __init__(self, threshold: float, interval: float):
+        self.threshold = threshold
+        self.interval = interval
+        self._requests: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self) -> Counter:
+        samples = Counter()
+        with self._lock:
+            self._requests[threading.get_ident()] = (
+                time.perf_counter(),
+                samples,
+            )
+            # Threads do not survive a fork, so check it is still alive.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="slow-request-sampler", daemon=True
+                )
+                self._thread.start()
+        return samples
+
+    def end(self) -> None:
+        with self._lock:
+            self._requests.pop(threading.get_ident(), None)
+
+    def _run(self) -> None:
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                slow = [
+                    (thread_id, samples)
+                    for thread_id, (started, samples) in self._requests.items()
+                    if now - started >= self.threshold
+                ]
+            if not slow:
+                continue
+            frames = sys._current_frames()
+            for thread_id, samples in slow:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    samples[_collapse(frame)] += 1
+
+
+class ProfileStore:
+    """
+    Directory of profile files used as a ring buffer: once it holds more
+    than ``max_files`` files the oldest ones are removed.
+    """
+
+    def __init__(self, path: Path, max_files: int):
+        self.path = Path(path)
+        self.max_files = max_files
+        self._lock = threading.Lock()
+
+    def path_for(self, request, suffix: str) -> Path:
+        slug = re.sub(r"[^A-Za-z0-9]+", "-", request.path).strip("-")
+        stamp = time.strftime("%Y%m%dT%H%M%S")
+        name = f"{stamp}-{time.time_ns() % 10**9:09d}-{os.getpid()}"
+        return self.path / f"{name}-{request.method}-{slug}{suffix}"
+
+    def save_profile(self, request, profiler: cProfile.Profile) -> Path:
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            path = self.path_for(request, ".prof")
+            profiler.dump_stats(path)
+            self._prune()
+        return path
+
+    def save_samples(self, request, samples: Counter) -> Path:
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            path = self.path_for(request, ".folded")
+            path.write_text(
+                "".join(
+                    f"{stack} {count}\n" for stack, count in samples.items()
+                )
+            )
+            self._prune()
+        return path
+
+    def _prune(self) -> None:
+        files = sorted(
+            (f for f in self.path.iterdir() if f.is_file()),
+            key=lambda f: f.stat().st_mtime_ns,
+        )
+        for old in files[: max(len(files) - self.max_files, 0)]:
+            old.unlink(missing_ok=True)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not (
+            settings.PROFILING_SERVER_TIMING
+            or settings.PROFILING_SAMPLE_RATE
+            or settings.PROFILING_SLOW_THRESHOLD is not None
+        ):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.store = ProfileStore(
+            settings.PROFILING_DIR, settings.PROFILING_MAX_FILES
+        )
+        self.sampler = (
+            SlowRequestSampler(
+                settings.PROFILING_SLOW_THRESHOLD,
+                settings.PROFILING_SAMPLE_INTERVAL,
+            )
+            if settings.PROFILING_SLOW_THRESHOLD is not None
+            else None
+        )
+
+    def __call__(self, request):
+        timings = Timings()
+        token = _timings.set(timings)
+        profiler = (
+            cProfile.Profile()
+            if random.random() < settings.PROFILING_SAMPLE_RATE
+            else None
+        )
+        samples = self.sampler.begin() if self.sampler else None
+
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                # Queries go to the shards too.
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(_time_query))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            total = time.perf_counter() - started
+            if self.sampler:
+                self.sampler.end()
+            _timings.reset(token)
+
+        if settings.PROFILING_SERVER_TIMING:
+            response["Server-Timing"] = timings.header(total)
+        if profiler is not None:
+            self.store.save_profile(request, profiler)
+        if samples:
+            self.store.save_samples(request, samples)
+        return response
+
+
+_timed_serializers: Dict[type, type] = {}
+
+
+def timed_serializer_class(serializer_class: type) -> type:
+    """Subclass of ``serializer_class`` that reports the serialize phase."""
+    if serializer_class not in _timed_serializers:
+
+        class TimedSerializer(serializer_class):
+            def is_valid(self, *args, **kwargs):
+                with phase("serialize"):
+                    return super().is_valid(*args, **kwargs)
+
+            def to_representation(self, instance):
+                with phase("serialize"):
+                    return super().to_representation(instance)
+
+        TimedSerializer.__name__ = serializer_class.__name__
+        TimedSerializer.__qualname__ = serializer_class.__qualname__
+        _timed_serializers[serializer_class] = TimedSerializer
+    return _timed_serializers[serializer_class]
+
+
+class ProfiledViewMixin:
+    """Report the auth, permissions, throttle, serialize and render phases."""
+
+    def perform_authentication(self, request):
+        with phase("auth"):
+            super().perform_authentication(request)
+
+    def check_permissions(self, request):
+        with phase("permissions"):
+            super().check_permissions(request)
+
+    def check_object_permissions(self, request, obj):
+        with phase("permissions"):
+            super().check_object_permissions(request, obj)
+
+    def check_throttles(self, request):
+        with phase("throttle"):
+            super().check_throttles(request)
+
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if is_active():
+            return timed_serializer_class(serializer_class)
+        return serializer_class
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if is_active() and hasattr(response, "render"):
+            render = response.render
+
+            def timed_render():
+                with phase("render"):
+                    return render()
+
+            response.render = timed_render
+        return response
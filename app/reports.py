@@ -0,0 +1,176 @@
+import csv
+import json
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import Case, Count, Min, Sum, Value, When
+
+from app.models import CatModel
+
+PAYROLL_COLUMNS = [
+    "record",
+    "id",
+    "name",
+    "breed",
+    "experience",
+    "cats",
+    "salary",
+]
+
+# Upper bound (inclusive) and label of each experience band; anything above
+# the last bound falls into EXPERIENCE_BAND_OVERFLOW.
+EXPERIENCE_BANDS = [(2, "0-2"), (5, "3-5"), (10, "6-10"), (20, "11-20")]
+EXPERIENCE_BAND_OVERFLOW = "21+"
+
+
+SALARY_EXPONENT = Decimal(1).scaleb(
+    -CatModel._meta.get_field("salary").decimal_places
+)
+
+
+def _money(value: Optional[Decimal]) -> Optional[Decimal]:
+    # Some backends return sums with extra scale; report in column scale.
+    return value.quantize(SALARY_EXPONENT) if value is not None else None
+
+
+def experience_band():
+    return Case(
+        *(
+            When(experience__lte=upper, then=Value(label))
+            for upper, label in EXPERIENCE_BANDS
+        ),
+        default=Value(EXPERIENCE_BAND_OVERFLOW),
+    )
+
+
+@contextmanager
+def _snapshot():
+    """
+    Run the block in one transaction that sees a single snapshot of the
+    database, REPEATABLE READ on PostgreSQL. Inside a transaction already
+    opened by the caller, that transaction is used as it is.
+    """
+    outermost = not connection.in_atomic_block
+    with transaction.atomic():
+        if outermost and connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ "
+                    "READ ONLY"
+                )
+        yield
+
+
+def payroll_rows(chunk_size: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Yield the payroll report: one row per cat, then salary totals per
+    breed, per experience band and overall.
+
+    Cats are read with ``iterator()``, which uses a server-side cursor on
+    PostgreSQL, so memory does not grow with the number of cats. Totals
+    are ``SUM`` aggregates computed by the database on the ``DECIMAL``
+    column, so no float rounding is involved. All queries read the same
+    snapshot, so the totals add up to the rows even while cats change.
+    """
+    chunk_size = chunk_size or settings.PAYROLL_REPORT_CHUNK_SIZE
+    with _snapshot():
+        yield from _payroll_rows(chunk_size)
+
+
+def _payroll_rows(chunk_size: int) -> Iterator[Dict]:
+    cats = (
+        CatModel.objects.order_by("id")
+        .values_list("id", "name", "breed", "experience", "salary")
+        .iterator(chunk_size=chunk_size)
+    )
+    for cat_id, name, breed, experience, salary in cats:
+        yield {
+            "record": "cat",
+            "id": cat_id,
+            "name": name,
+            "breed": breed,
+            "experience": experience,
+            "cats": None,
+            "salary": salary,
+        }
+
+    by_breed = (
+        CatModel.objects.values("breed")
+        .annotate(cats=Count("id"), salary=Sum("salary"))
+        .order_by("breed")
+    )
+    for total in by_breed:
+        yield {
+            "record": "breed",
+            "id": None,
+            "name": None,
+            "breed": total["breed"],
+            "experience": None,
+            "cats": total["cats"],
+            "salary": _money(total["salary"]),
+        }
+
+    by_band = (
+        CatModel.objects.annotate(band=experience_band())
+        .values("band")
+        .annotate(
+            cats=Count("id"), salary=Sum("salary"), lowest=Min("experience")
+        )
+        .order_by("lowest")
+    )
+    for total in by_band:
+        yield {
+            "record": "experience_band",
+            "id": None,
+            "name": None,
+            "breed": None,
+            "experience": total["band"],
+            "cats": total["cats"],
+            "salary": _money(total["salary"]),
+        }
+
+    overall = CatModel.objects.aggregate(
+        cats=Count("id"), salary=Sum("salary")
+    )
+    yield {
+        "record": "total",
+        "id": None,
+        "name": None,
+        "breed": None,
+        "experience": None,
+        "cats": overall["cats"],
+        "salary": _money(overall["salary"]),
+    }
+
+
+class _Echo:
+    """File-like object whose ``write`` returns the value written."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def render_csv(rows: Iterable[Dict]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(PAYROLL_COLUMNS)
+    for row in rows:
+        yield writer.writerow(
+            "" if row[column] is None else row[column]
+            for column in PAYROLL_COLUMNS
+        )
+
+
+def render_ndjson(rows: Iterable[Dict]) -> Iterator[str]:
+    for row in rows:
+        yield json.dumps(row, cls=DjangoJSONEncoder) + "\n"
+
+
+# Output format -> (renderer, content type)
+PAYROLL_FORMATS = {
+    "csv": (render_csv, "text/csv"),
+    "ndjson": (render_ndjson, "application/x-ndjson"),
+}
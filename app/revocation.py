@@ -0,0 +1,134 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from app.models import RevokedTokenModel
+
+
+class BloomFilter:
+    """
+    Compact set of strings without false negatives; a hit only means the
+    value was *probably* added.
+    """
+
+    def __init__(self, bits: int, hashes: int, values: Iterable[str] = ()):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray((bits + 7) // 8)
+        for value in values:
+            self.add(value)
+
+    def _positions(self, value: str):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.bits for i in range(self.hashes))
+
+    def add(self, value: str) -> None:
+        for position in self._positions(value):
+            self._array[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value: str) -> bool:
+        return all(
+            self._array[position >> 3] & (1 << (position & 7))
+            for position in self._positions(value)
+        )
+
+
+class RevocationList:
+    """
+    Revoked JWT ids of this process.
+
+    The database is the shared store. Every process mirrors it in a Bloom
+    filter, so checking a token that was not revoked needs no query. Only
+    a filter hit is confirmed against the database. New rows are pulled in
+    every ``REVOCATION_SYNC_INTERVAL`` seconds, so a token revoked by
+    another process may still be accepted for that long. Because a Bloom
+    filter cannot forget, it is rebuilt from the unexpired rows every
+    ``REVOCATION_REBUILD_INTERVAL`` seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self._filter = self._new_filter()
+        self._last_id = 0
+        self._synced_at: Optional[float] = None
+        self._rebuilt_at: Optional[float] = None
+
+    @staticmethod
+    def _new_filter(values: Iterable[str] = ()) -> BloomFilter:
+        return BloomFilter(
+            settings.REVOCATION_BLOOM_BITS,
+            settings.REVOCATION_BLOOM_HASHES,
+            values,
+        )
+
+    def sync(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if (
+            not force
+            and self._synced_at is not None
+            and now - self._synced_at < settings.REVOCATION_SYNC_INTERVAL
+        ):
+            return
+
+        with self._lock:
+            unexpired = RevokedTokenModel.objects.filter(
+                expires_at__gt=timezone.now()
+            )
+            if (
+                self._rebuilt_at is None
+                or now - self._rebuilt_at
+                >= settings.REVOCATION_REBUILD_INTERVAL
+            ):
+                rows = list(unexpired.values_list("id", "jti"))
+                self._filter = self._new_filter(jti for _, jti in rows)
+                self._rebuilt_at = now
+            else:
+                rows = list(
+                    unexpired.filter(id__gt=self._last_id).values_list(
+                        "id", "jti"
+                    )
+                )
+                for _, jti in rows:
+                    self._filter.add(jti)
+            if rows:
+                self._last_id = max(self._last_id, max(pk for pk, _ in rows))
+            self._synced_at = now
+
+    def revoke(self, jti: str, expires_at: datetime) -> None:
+        RevokedTokenModel.objects.get_or_create(
+            jti=jti, defaults={"expires_at": expires_at}
+        )
+        self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        self.sync()
+        if jti not in self._filter:
+            return False
+        return RevokedTokenModel.objects.filter(
+            jti=jti, expires_at__gt=timezone.now()
+        ).exists()
+
+
+revocation_list = RevocationList()
+
+
+def revoke_token(token) -> None:
+    """Revoke a SimpleJWT token until its own expiry."""
+    expires_at = datetime.fromtimestamp(token["exp"], tz=dt_timezone.utc)
+    revocation_list.revoke(token[api_settings.JTI_CLAIM], expires_at)
+
+
+def is_token_revoked(token) -> bool:
+    jti = token.get(api_settings.JTI_CLAIM)
+    return jti is not None and revocation_list.is_revoked(jti)
@@ -0,0 +1,81 @@
+import hashlib
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views import View
+
+SCHEMA_CONTENT_TYPE = "application/vnd.oai.openapi; charset=utf-8"
+
+_lock = threading.Lock()
+_cached: Optional[Tuple[bytes, str]] = None
+
+
+def generate_schema() -> bytes:
+    """Render the OpenAPI schema exactly like ``manage.py spectacular``."""
+    from drf_spectacular.renderers import OpenApiYamlRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+def write_schema(content: bytes, path: Optional[Path] = None) -> Path:
+    path = Path(path or settings.OPENAPI_SCHEMA_PATH)
+    path.write_bytes(content)
+    return path
+
+
+def _load_schema() -> bytes:
+    path = Path(settings.OPENAPI_SCHEMA_PATH)
+    if settings.OPENAPI_SCHEMA_USE_FILE and path.exists():
+        return path.read_bytes()
+
+    content = generate_schema()
+    if settings.OPENAPI_SCHEMA_USE_FILE:
+        try:
+            write_schema(content, path)
+        except OSError:
+            pass
+    return content
+
+
+def get_schema() -> Tuple[bytes, str]:
+    """
+    Return the schema and its ETag, loading it once per process from the
+    prebuilt file (or generating it if there is none).
+    """
+    global _cached
+    if _cached is None:
+        with _lock:
+            if _cached is None:
+                content = _load_schema()
+                etag = f'"{hashlib.sha256(content).hexdigest()}"'
+                _cached = (content, etag)
+    return _cached
+
+
+def reset_schema_cache() -> None:
+    global _cached
+    _cached = None
+
+
+class CachedSchemaView(View):
+    """Serve the precomputed OpenAPI schema with an ETag."""
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        content, etag = get_schema()
+
+        if etag in request.headers.get("If-None-Match", ""):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(content, content_type=SCHEMA_CONTENT_TYPE)
+        response["ETag"] = etag
+        patch_cache_control(
+            response, public=True, max_age=settings.OPENAPI_SCHEMA_MAX_AGE
+        )
+        return response
@@ -1,10 +1,27 @@
+import json
 from typing import List
 
+from django.conf import settings
 from django.contrib.auth.password_validation import validate_password
+from django.db import IntegrityError, transaction
+from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-
-from app.models import CatModel, TargetModel, MissionModel
+from rest_framework.utils.encoders import JSONEncoder
+
+from app.audit import record
+from app.concurrency import conditional_bulk_update, conditional_update
+from app.models import (
+    ArchivedMissionModel,
+    ArchivedTargetModel,
+    AuditLogModel,
+    CatModel,
+    CatPerformanceModel,
+    MissionModel,
+    TargetModel,
+)
+from app.sharding import claim_target_names, shard_for_region
+from app.tasks import enqueue
 
 
 class CatSerializer(serializers.ModelSerializer):
@@ -23,6 +40,21 @@ class CatSerializer(serializers.ModelSerializer):
         }
 
 
+class CatPerformanceSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source="cat.name", read_only=True)
+
+    class Meta:
+        model = CatPerformanceModel
+        fields = [
+            "cat",
+            "name",
+            "missions_completed",
+            "targets_completed",
+            "experience",
+            "last_completed_at",
+        ]
+
+
 class CatUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = CatModel
@@ -35,15 +67,22 @@ class TargetModelSerializer(serializers.ModelSerializer):
         fields = ["name", "country"]
 
 
+class TargetUpsertSerializer(TargetModelSerializer):
+    class Meta(TargetModelSerializer.Meta):
+        # Existing names are linked instead of rejected.
+        extra_kwargs = {"name": {"validators": []}}
+
+
 class TargetListSerializer(TargetModelSerializer):
     class Meta(TargetModelSerializer.Meta):
-        fields = ["id", "name", "country", "completed", "notes"]
+        fields = ["id", "name", "country", "completed", "notes", "version"]
 
 
 class TargetUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = TargetModel
-        fields = ["id", "notes", "completed"]
+        fields = ["id", "notes", "completed", "version"]
+        read_only_fields = ["version"]
 
     def validate_completed(self, value: bool) -> bool:
         if value:
@@ -67,20 +106,75 @@ class MissionSerializer(serializers.ModelSerializer):
         model = MissionModel
         fields = ["targets"]
 
+    def get_fields(self) -> dict:
+        fields = super().get_fields()
+        if self.context.get("upsert"):
+            fields["targets"] = TargetUpsertSerializer(many=True)
+        return fields
+
     def validate_targets(self, value: List[TargetModel]) -> List[TargetModel]:
         if not (1 <= len(value) <= 3):
             raise serializers.ValidationError(
                 "A mission must have between 1 and 3 targets."
             )
+        names = [target["name"] for target in value]
+        if len(set(names)) != len(names):
+            raise serializers.ValidationError(
+                "The targets of a mission must have different names."
+            )
         return value
 
     def create(self, validated_data: dict) -> MissionModel:
         targets_data = validated_data.pop("targets")
-        mission = MissionModel.objects.create(**validated_data)
+        region = targets_data[0]["country"]
+        using = shard_for_region(region)
+        targets = [TargetModel(**target_data) for target_data in targets_data]
+        upsert = self.context.get("upsert")
+        if upsert:
+            conflict = (
+                "A target with one of these names belongs to missions of "
+                "another region and cannot be reused."
+            )
+        else:
+            conflict = (
+                "A target with one of these names already exists. Create "
+                "the mission with ?upsert=true to reuse existing targets."
+            )
 
-        for target_data in targets_data:
-            target = TargetModel.objects.create(**target_data)
-            mission.targets.add(target)
+        try:
+            # The names are claimed on the default database first.
+            with transaction.atomic(), transaction.atomic(
+                using=using, savepoint=False
+            ):
+                if claim_target_names(
+                    [target.name for target in targets], using, reuse=upsert
+                ):
+                    raise ValidationError({"targets": conflict})
+                mission = MissionModel.objects.using(using).create(
+                    region=region, **validated_data
+                )
+                if upsert:
+                    # One INSERT ... ON CONFLICT (name) DO UPDATE that
+                    # returns the ids of new and existing targets alike.
+                    # Existing targets are left as they are.
+                    targets = TargetModel.objects.using(using).bulk_create(
+                        targets,
+                        update_conflicts=True,
+                        unique_fields=["name"],
+                        update_fields=["name"],
+                    )
+                else:
+                    targets = TargetModel.objects.using(using).bulk_create(
+                        targets
+                    )
+                mission.targets.add(*targets)
+        except IntegrityError:
+            raise ValidationError({"targets": conflict})
+        record(
+            "create",
+            mission,
+            targets=[target.id for target in targets],
+        )
 
         return mission
 
@@ -94,6 +188,7 @@ class MissionListSerializer(MissionSerializer):
             "id",
             "cat",
             "completed",
+            "version",
         ] + MissionSerializer.Meta.fields
 
 
@@ -102,7 +197,8 @@ class MissionUpdateSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = MissionModel
-        fields = ["completed", "targets"]
+        fields = ["completed", "version", "targets"]
+        read_only_fields = ["version"]
 
     def update(
         self, instance: MissionModel, validated_data: dict
@@ -112,16 +208,34 @@ class MissionUpdateSerializer(serializers.ModelSerializer):
         if instance.completed:
             raise ValidationError("You cannot update a completed mission.")
 
+        updated_targets, changes = [], []
         if targets_data:
             target_ids = []
             for target_data in targets_data:
                 target_id = target_data.get("id")
                 if not target_id:
                     raise ValidationError("Each target must have an 'id'.")
+                target_ids.append(target_id)
+            if len({str(pk) for pk in target_ids}) != len(target_ids):
+                raise ValidationError("Each target can only be listed once.")
+
+            try:
+                targets = {
+                    str(pk): target
+                    for pk, target in TargetModel.objects.using(
+                        instance._state.db
+                    )
+                    .in_bulk(target_ids)
+                    .items()
+                }
+            except (TypeError, ValueError):
+                targets = {}
 
-                try:
-                    target = TargetModel.objects.get(id=target_id)
-                except TargetModel.DoesNotExist:
+            now = timezone.now()
+            for target_data in targets_data:
+                target_id = target_data["id"]
+                target = targets.get(str(target_id))
+                if target is None:
                     raise ValidationError(
                         f"Target with id {target_id} does not exist."
                     )
@@ -135,15 +249,168 @@ class MissionUpdateSerializer(serializers.ModelSerializer):
                     instance=target, data=target_data, partial=True
                 )
                 serializer.is_valid(raise_exception=True)
-                serializer.save()
+                for attr, value in serializer.validated_data.items():
+                    setattr(target, attr, value)
+                if "notes" in serializer.validated_data:
+                    target.notes_saved_at = now
+                target.updated_at = now
+
+                updated_targets.append(target)
+                changes.append(serializer.validated_data)
+
+        fields = {
+            attr: value
+            for attr, value in validated_data.items()
+            if attr != "targets"
+        }
+        with transaction.atomic(using=instance._state.db):
+            # Fails with 412 before anything is written if the mission
+            # changed since the version the client sent in If-Match.
+            conditional_update(
+                instance,
+                self.context.get("expected_version"),
+                updated_at=timezone.now(),
+                **fields,
+            )
+            if targets_data:
+                # Fails with 412 as well if a target changed since it was
+                # read above, e.g. was completed by another request.
+                conditional_bulk_update(
+                    updated_targets,
+                    ["notes", "notes_saved_at", "completed", "updated_at"],
+                )
+                instance.targets.set(updated_targets)
+            # Only once everything is validated and written.
+            for target, target_changes in zip(updated_targets, changes):
+                record("update", target, mission=instance.id, **target_changes)
 
-                target_ids.append(target)
+        if targets_data:
+            enqueue("check_mission_completion", {"mission_id": instance.id})
 
-            instance.targets.set(target_ids)
+        return instance
 
-        for attr, value in validated_data.items():
-            if attr != "targets":
-                setattr(instance, attr, value)
-        instance.save()
 
-        return instance
+class MissionChangesSerializer(serializers.Serializer):
+    missions = MissionListSerializer(many=True, read_only=True)
+    deleted = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+    cursor = serializers.CharField(read_only=True)
+    has_more = serializers.BooleanField(read_only=True)
+
+
+class ArchivedTargetSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source="target_id", read_only=True)
+
+    class Meta:
+        model = ArchivedTargetModel
+        fields = ["id", "name", "country", "completed", "notes"]
+
+
+class ArchivedMissionSerializer(serializers.ModelSerializer):
+    targets = ArchivedTargetSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = ArchivedMissionModel
+        fields = ["id", "completed", "updated_at", "archived_at", "targets"]
+
+
+class TargetNotesSerializer(serializers.Serializer):
+    notes = serializers.CharField(
+        allow_null=True, allow_blank=True, trim_whitespace=False
+    )
+
+
+class CompleteTargetsSerializer(serializers.Serializer):
+    target_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BULK_COMPLETE_MAX_TARGETS,
+    )
+
+
+class CompleteTargetsResultSerializer(serializers.Serializer):
+    targets = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+    missing = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+    missions = serializers.ListField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditLogModel
+        fields = [
+            "id",
+            "action",
+            "model_name",
+            "object_id",
+            "user_id",
+            "username",
+            "changes",
+            "created_at",
+        ]
+
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField(
+        required=False,
+        help_text="Refresh token to revoke along with the access token.",
+    )
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=["GET", "POST", "PUT", "PATCH", "DELETE"]
+    )
+    path = serializers.RegexField(
+        r"^/api/v1/",
+        max_length=2048,
+        help_text="Path and query string, e.g. /api/v1/missions/1/.",
+    )
+    body = serializers.JSONField(required=False, allow_null=True)
+    headers = serializers.DictField(
+        child=serializers.CharField(),
+        required=False,
+        help_text="Extra request headers such as If-Match.",
+    )
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = BatchOperationSerializer(
+        many=True,
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_OPERATIONS,
+    )
+    atomic = serializers.BooleanField(
+        default=False,
+        help_text="Run all operations in one transaction and roll it back "
+        "if any of them fails.",
+    )
+
+    def validate_operations(self, operations: List[dict]) -> List[dict]:
+        size = sum(
+            len(json.dumps(operation.get("body"), cls=JSONEncoder))
+            for operation in operations
+        )
+        if size > settings.BATCH_MAX_BODY_BYTES:
+            raise ValidationError(
+                f"The operation bodies exceed "
+                f"{settings.BATCH_MAX_BODY_BYTES} bytes."
+            )
+        return operations
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField())
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResultSerializer(serializers.Serializer):
+    responses = BatchResponseSerializer(many=True)
+    rolled_back = serializers.BooleanField()
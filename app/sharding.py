@@ -0,0 +1,342 @@
+"""
+Horizontal sharding of missions and targets by region.
+
+A mission belongs to the region of its first target (``TargetModel.country``
+at creation) and ``SHARD_MAP`` sends each region to a database alias, the
+default database for regions it does not list. The mission, its targets
+and the links between them live on that shard; cats, users and every
+other model stay on the default database.
+
+Each shard allocates primary keys from its own range of
+``SHARD_ID_RANGE`` ids, so ids stay unique across shards and point to the
+shard a row was created on. Rows moved by ``manage.py reshard`` keep
+their ids, so a lookup by id tries that shard first and then the others.
+
+Queries that span shards run on each shard in turn and are merged on
+their ordering (scatter-gather). With no ``SHARD_DATABASES`` configured
+all of this comes down to one query on the default database.
+"""
+
+import heapq
+import logging
+from itertools import chain, islice
+from operator import attrgetter
+from typing import Any, Iterator, List, Optional, Sequence
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Exists, Model, OuterRef, QuerySet
+
+logger = logging.getLogger(__name__)
+
+SHARDED_MODELS = {
+    "app.missionmodel",
+    "app.targetmodel",
+    "app.missionmodel_targets",
+}
+
+
+def is_sharded(model) -> bool:
+    # The database cache routes a stand-in model without a label.
+    return getattr(model._meta, "label_lower", None) in SHARDED_MODELS
+
+
+def shard_aliases() -> List[str]:
+    """Every shard, indexed by the id range it allocates from."""
+    return [DEFAULT_DB_ALIAS, *settings.SHARD_DATABASES]
+
+
+def shards_for(model) -> List[str]:
+    return shard_aliases() if is_sharded(model) else [DEFAULT_DB_ALIAS]
+
+
+def shard_for_region(region: Optional[str]) -> str:
+    return settings.SHARD_MAP.get(region, DEFAULT_DB_ALIAS)
+
+
+def shard_for_pk(pk: Any) -> str:
+    """The shard that allocated ``pk``."""
+    aliases = shard_aliases()
+    try:
+        index = int(pk) // settings.SHARD_ID_RANGE
+    except (TypeError, ValueError):
+        return DEFAULT_DB_ALIAS
+    return aliases[index] if 0 <= index < len(aliases) else DEFAULT_DB_ALIAS
+
+
+def on_shard(queryset: QuerySet, alias: str) -> QuerySet:
+    queryset = queryset.using(alias)
+    if alias != DEFAULT_DB_ALIAS:
+        # Cats only exist on the default database and cannot be joined.
+        queryset = queryset.select_related(None)
+    return queryset
+
+
+def across_shards(queryset: QuerySet) -> Iterator[Model]:
+    """Iterate over the rows of ``queryset`` on every shard, unordered."""
+    return chain.from_iterable(
+        on_shard(queryset, alias) for alias in shards_for(queryset.model)
+    )
+
+
+def scatter_gather(
+    queryset: QuerySet, ordering: Sequence[str], limit: int
+) -> List[Model]:
+    """
+    First ``limit`` rows of ``queryset`` over all shards, in ascending
+    ``ordering``.
+
+    Every shard returns its own first ``limit`` rows in that order and
+    the sorted runs are merged. For keyset pagination filter ``queryset``
+    on the last key seen before calling this.
+    """
+    queryset = queryset.order_by(*ordering)
+    runs = [
+        list(on_shard(queryset, alias)[:limit])
+        for alias in shards_for(queryset.model)
+    ]
+    if len(runs) == 1:
+        return runs[0]
+    return list(islice(heapq.merge(*runs, key=attrgetter(*ordering)), limit))
+
+
+def locate(queryset: QuerySet, pk: Any) -> Optional[Model]:
+    """The row of ``queryset`` with primary key ``pk`` on any shard."""
+    home = shard_for_pk(pk)
+    aliases = sorted(shards_for(queryset.model), key=lambda a: a != home)
+    for alias in aliases:
+        try:
+            obj = on_shard(queryset, alias).filter(pk=pk).first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+        if obj is not None:
+            return obj
+    return None
+
+
+def in_bulk(queryset: QuerySet, ids: Sequence[Any]) -> dict:
+    """``QuerySet.in_bulk`` over all shards."""
+    objects = {}
+    for alias in shards_for(queryset.model):
+        missing = [pk for pk in ids if pk not in objects]
+        if not missing:
+            break
+        objects.update(on_shard(queryset, alias).in_bulk(missing))
+    return objects
+
+
+def claim_target_names(
+    names: Sequence[str], using: str, reuse: bool = False
+) -> List[str]:
+    """
+    Register the target ``names`` about to be created on shard ``using``,
+    to keep target names unique across shards. Runs in a transaction on
+    the default database, whose ``TargetNameModel`` rows stay locked
+    until the targets are created.
+
+    Returns the names held by a target on any shard, or with ``reuse``
+    on any shard but ``using``, whose targets could not be linked to a
+    mission on ``using``. A new name taken concurrently raises
+    ``IntegrityError``.
+    """
+    from app.models import TargetModel, TargetNameModel
+
+    registered = set(
+        TargetNameModel.objects.select_for_update()
+        .filter(name__in=names)
+        .values_list("name", flat=True)
+    )
+    TargetNameModel.objects.bulk_create(
+        TargetNameModel(name=name)
+        for name in dict.fromkeys(names)
+        if name not in registered
+    )
+    taken, local = set(), set()
+    for alias in shards_for(TargetModel):
+        if not registered:
+            break
+        found = (
+            TargetModel.objects.using(alias)
+            .filter(name__in=registered)
+            .values_list("name", flat=True)
+        )
+        (local if reuse and alias == using else taken).update(found)
+    return sorted(taken - local)
+
+
+class ShardedQuerySet:
+    """
+    A queryset over every shard, as far as ``LimitOffsetPagination`` uses
+    it: ``count()`` and slicing.
+
+    A page at offset ``n`` reads ``n + limit`` rows from each shard, so
+    deep pages get expensive; the delta sync endpoint pages by keyset.
+    """
+
+    def __init__(self, queryset: QuerySet, ordering: Sequence[str]):
+        self.queryset = queryset
+        self.ordering = ordering
+
+    def count(self) -> int:
+        return sum(
+            on_shard(self.queryset, alias).count()
+            for alias in shards_for(self.queryset.model)
+        )
+
+    def __getitem__(self, item: slice) -> List[Model]:
+        return scatter_gather(self.queryset, self.ordering, item.stop)[
+            item.start :
+        ]
+
+
+class ShardRouter:
+    """
+    Database router for ``SHARD_MAP``.
+
+    Unsharded models always use the default database. Sharded rows stay
+    on the shard they were read from; new missions go to the shard of
+    their region. Writes without an instance (``QuerySet.update``,
+    ``bulk_create``) go to the queryset's database, default unless set
+    with ``using()``.
+    """
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if not is_sharded(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and is_sharded(type(instance)):
+            return instance._state.db
+        return None
+
+    def db_for_write(self, model, **hints) -> Optional[str]:
+        if not is_sharded(model):
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is None or not is_sharded(type(instance)):
+            return None
+        if instance._state.db:
+            return instance._state.db
+        region = getattr(instance, "region", None)
+        if region is None:
+            region = getattr(instance, "country", None)
+        return shard_for_region(region)
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        # Missions on any shard may reference a cat on the default
+        # database; the foreign key has no database constraint.
+        if is_sharded(type(obj1)) != is_sharded(type(obj2)):
+            return True
+        return None
+
+
+def reserve_id_range(using: str) -> None:
+    """
+    Move the id sequences of the sharded tables on shard ``using`` to its
+    own range. Runs after ``migrate``.
+    """
+    aliases = shard_aliases()
+    if using not in aliases or using == DEFAULT_DB_ALIAS:
+        return
+
+    from app.models import MissionModel, TargetModel
+
+    start = aliases.index(using) * settings.SHARD_ID_RANGE
+    connection = connections[using]
+    tables = [
+        MissionModel._meta.db_table,
+        TargetModel._meta.db_table,
+        MissionModel.targets.through._meta.db_table,
+    ]
+    with connection.cursor() as cursor:
+        for table in tables:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "SELECT pg_get_serial_sequence(%s, 'id')", [table]
+                )
+                sequence = cursor.fetchone()[0]
+                cursor.execute(f"SELECT last_value FROM {sequence}")
+                if cursor.fetchone()[0] < start:
+                    cursor.execute("SELECT setval(%s, %s)", [sequence, start])
+            elif connection.vendor == "sqlite":
+                cursor.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM sqlite_sequence "
+                    "WHERE name = %s",
+                    [table],
+                )
+                if cursor.fetchone()[0] < start:
+                    cursor.execute(
+                        "DELETE FROM sqlite_sequence WHERE name = %s", [table]
+                    )
+                    cursor.execute(
+                        "INSERT INTO sqlite_sequence (name, seq) "
+                        "VALUES (%s, %s)",
+                        [table, start],
+                    )
+            else:
+                logger.warning(
+                    "Cannot reserve an id range for %s on %s (%s).",
+                    table,
+                    using,
+                    connection.vendor,
+                )
+
+
+def _copy(model, rows: List[Model], destination: str) -> None:
+    present = set(
+        model.objects.using(destination)
+        .filter(pk__in=[row.pk for row in rows])
+        .values_list("pk", flat=True)
+    )
+    model.objects.using(destination).bulk_create(
+        [row for row in rows if row.pk not in present]
+    )
+
+
+def move_region_batch(
+    region: str, source: str, destination: str, batch_size: int
+) -> int:
+    """
+    Move up to ``batch_size`` missions of ``region`` from shard ``source``
+    to ``destination``, with their targets and links, keeping their ids.
+    Returns the number of missions moved.
+
+    The rows are locked on the source while they are copied, then deleted
+    there. The copy commits first; should the delete fail, running the
+    batch again skips the rows already copied. A target also linked to a
+    mission that stays behind is copied and kept on both shards.
+    """
+    from app.models import MissionModel, TargetModel
+
+    through = MissionModel.targets.through
+    with transaction.atomic(using=source):
+        missions = list(
+            MissionModel.objects.using(source)
+            .select_for_update()
+            .filter(region=region)
+            .order_by("id")[:batch_size]
+        )
+        if not missions:
+            return 0
+        mission_ids = [mission.id for mission in missions]
+        links = list(
+            through.objects.using(source).filter(
+                missionmodel_id__in=mission_ids
+            )
+        )
+        target_ids = {link.targetmodel_id for link in links}
+        targets = list(
+            TargetModel.objects.using(source).filter(id__in=target_ids)
+        )
+
+        with transaction.atomic(using=destination):
+            _copy(MissionModel, missions, destination)
+            _copy(TargetModel, targets, destination)
+            _copy(through, links, destination)
+
+        MissionModel.objects.using(source).filter(id__in=mission_ids).delete()
+        TargetModel.objects.using(source).filter(id__in=target_ids).exclude(
+            Exists(through.objects.filter(targetmodel_id=OuterRef("pk")))
+        ).delete()
+
+    return len(missions)
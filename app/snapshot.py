@@ -0,0 +1,472 @@
+"""
+Snapshots of the agency tables (``manage.py snapshot_export`` and
+``snapshot_import``), a fast alternative to ``dumpdata``/``loaddata``.
+
+A snapshot is a directory with one file per table and ``manifest.json``,
+which lists the tables with their columns, row counts and SHA-256
+checksums, and the migrations the database was at.
+
+On PostgreSQL every file is a ``COPY ... (FORMAT BINARY)`` stream. Tables
+are exported in parallel from one exported transaction snapshot, so
+they are consistent with each other, like ``pg_dump --jobs``. They are
+loaded in parallel with their foreign keys, unique constraints and
+indexes dropped, and those are rebuilt once the data is in. The
+statements that rebuild them are first saved in the snapshot directory
+as ``restore-<database>.sql``, removed once they ran: if a restore is
+interrupted, run the file with ``psql`` to repair the schema. A failed
+load empties the tables again before they are rebuilt.
+
+On SQLite every file holds gzipped JSON lines of ``SNAPSHOT_CHUNK_SIZE``
+rows stored column by column, and tables are handled one after the
+other in a single transaction.
+
+Each database (shard) is exported and restored on its own, into a
+database migrated to the same migrations whose snapshot tables are
+empty.
+"""
+
+import gzip
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.utils import timezone
+
+from app.models import (
+    CatModel,
+    CatPerformanceModel,
+    MissionModel,
+    TargetModel,
+    TargetNameModel,
+)
+from app.sharding import reserve_id_range, shards_for
+
+MANIFEST_NAME = "manifest.json"
+RESTORE_DDL_NAME = "restore-{}.sql"
+MANIFEST_VERSION = 1
+FORMATS = {
+    "postgresql": "postgres-binary-copy",
+    "sqlite": "sqlite-columnar-jsonl",
+}
+_CHUNK_BYTES = 1 << 20
+_SNAPSHOT_ID_RE = re.compile(r"^[0-9A-F-]+$")
+
+
+class SnapshotError(Exception):
+    pass
+
+
+@dataclass
+class TableEntry:
+    model: str
+    table: str
+    columns: List[str]
+    file: str
+    rows: int = 0
+    bytes: int = 0
+    sha256: str = ""
+
+
+class _HashingWriter:
+    """File wrapper that counts and hashes what is written through it."""
+
+    def __init__(self, file):
+        self.file = file
+        self.hash = hashlib.sha256()
+        self.bytes = 0
+
+    def write(self, data: bytes) -> int:
+        self.hash.update(data)
+        self.bytes += len(data)
+        return self.file.write(data)
+
+    def flush(self) -> None:
+        self.file.flush()
+
+
+def snapshot_models(using: str) -> List[type]:
+    """The models whose tables a snapshot of database ``using`` holds."""
+    models = [
+        CatModel,
+        CatPerformanceModel,
+        MissionModel,
+        TargetModel,
+        TargetNameModel,
+        MissionModel.targets.through,
+    ]
+    return [model for model in models if using in shards_for(model)]
+
+
+def _applied_migrations(using: str) -> List[str]:
+    recorder = MigrationRecorder(connections[using])
+    return sorted(
+        name for app, name in recorder.applied_migrations() if app == "app"
+    )
+
+
+def _format(using: str) -> str:
+    vendor = connections[using].vendor
+    if vendor not in FORMATS:
+        raise SnapshotError(f"Snapshots do not support {vendor} databases.")
+    return FORMATS[vendor]
+
+
+def _checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        while chunk := file.read(_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _run(function: Callable, items: list, jobs: int, using: str) -> None:
+    """
+    Call ``function`` for every item, in ``jobs`` threads with their own
+    connections to database ``using`` when ``jobs`` > 1.
+    """
+    if jobs <= 1:
+        for item in items:
+            function(item)
+        return
+
+    def run_in_thread(item) -> None:
+        try:
+            function(item)
+        finally:
+            connections[using].close()
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # list() re-raises the first exception of a thread.
+        list(executor.map(run_in_thread, items))
+
+
+def export_snapshot(
+    directory: Path, using: str, jobs: int
+) -> Dict[str, object]:
+    """Write a snapshot of database ``using`` to ``directory``."""
+    snapshot_format = _format(using)
+    directory.mkdir(parents=True, exist_ok=True)
+    if any(directory.iterdir()):
+        raise SnapshotError(f"{directory} is not empty.")
+
+    suffix = ".copy" if snapshot_format == FORMATS["postgresql"] else ".gz"
+    entries = [
+        TableEntry(
+            model=model._meta.label_lower,
+            table=model._meta.db_table,
+            columns=[field.column for field in model._meta.concrete_fields],
+            file=model._meta.db_table + suffix,
+        )
+        for model in snapshot_models(using)
+    ]
+    if snapshot_format == FORMATS["postgresql"]:
+        _export_postgres(directory, entries, using, jobs)
+    else:
+        with transaction.atomic(using=using):
+            for entry in entries:
+                _export_sqlite_table(directory, entry, using)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "format": snapshot_format,
+        "database": using,
+        "created_at": timezone.now().isoformat(),
+        "migrations": _applied_migrations(using),
+        "tables": [asdict(entry) for entry in entries],
+    }
+    (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def _export_postgres(
+    directory: Path, entries: List[TableEntry], using: str, jobs: int
+) -> None:
+    connection = connections[using]
+    if connection.in_atomic_block:
+        # Already in a transaction (tests): export on this connection.
+        for entry in entries:
+            _export_postgres_table(directory, entry, using, None)
+        return
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        cursor.execute(
+            "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"
+        )
+        cursor.execute("SELECT pg_export_snapshot()")
+        snapshot_id = cursor.fetchone()[0]
+        # The snapshot stays importable while this transaction is open.
+        _run(
+            lambda entry: _export_postgres_table(
+                directory, entry, using, snapshot_id if jobs > 1 else None
+            ),
+            entries,
+            jobs,
+            using,
+        )
+
+
+def _export_postgres_table(
+    directory: Path, entry: TableEntry, using: str, snapshot_id: Optional[str]
+) -> None:
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(column) for column in entry.columns)
+    sql = f"COPY {quote(entry.table)} ({columns}) TO STDOUT (FORMAT BINARY)"
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if snapshot_id is not None:
+            if not _SNAPSHOT_ID_RE.match(snapshot_id):
+                raise SnapshotError(f"Unexpected snapshot id {snapshot_id}.")
+            cursor.execute(
+                "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"
+            )
+            cursor.execute(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+        with open(directory / entry.file, "wb") as file:
+            writer = _HashingWriter(file)
+            with cursor.copy(sql) as copy:
+                for data in copy:
+                    writer.write(data)
+        entry.rows = cursor.rowcount
+    entry.bytes = writer.bytes
+    entry.sha256 = writer.hash.hexdigest()
+
+
+def _export_sqlite_table(directory: Path, entry: TableEntry, using: str):
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    # "+column" reads the value as stored: the declared type of an
+    # expression is unknown, so Django's converters are not applied.
+    columns = ", ".join(f"+{quote(column)}" for column in entry.columns)
+    with open(directory / entry.file, "wb") as file:
+        writer = _HashingWriter(file)
+        with gzip.GzipFile(mode="wb", fileobj=writer) as stream:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT {columns} FROM {quote(entry.table)} "
+                    f"ORDER BY {quote(entry.columns[0])}"
+                )
+                while rows := cursor.fetchmany(settings.SNAPSHOT_CHUNK_SIZE):
+                    entry.rows += len(rows)
+                    line = json.dumps([list(column) for column in zip(*rows)])
+                    stream.write(line.encode() + b"\n")
+    entry.bytes = writer.bytes
+    entry.sha256 = writer.hash.hexdigest()
+
+
+def read_manifest(directory: Path, using: str) -> List[TableEntry]:
+    """
+    Check that the snapshot in ``directory`` is complete, intact and fits
+    database ``using``, and return its tables.
+    """
+    try:
+        manifest = json.loads((directory / MANIFEST_NAME).read_text())
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Cannot read the snapshot manifest: {e}")
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise SnapshotError("Unsupported snapshot version.")
+    if manifest["format"] != _format(using):
+        raise SnapshotError(
+            f"A {manifest['format']} snapshot cannot be restored into a "
+            f"{connections[using].vendor} database."
+        )
+    if manifest["migrations"] != _applied_migrations(using):
+        raise SnapshotError(
+            "The snapshot was taken at other migrations than the database "
+            "is at; migrate both to the same state first."
+        )
+
+    entries = [TableEntry(**table) for table in manifest["tables"]]
+    expected = {model._meta.db_table for model in snapshot_models(using)}
+    if {entry.table for entry in entries} != expected:
+        raise SnapshotError("The snapshot holds other tables than expected.")
+    for entry in entries:
+        path = directory / entry.file
+        if not path.is_file() or _checksum(path) != entry.sha256:
+            raise SnapshotError(f"{entry.file} is missing or corrupt.")
+    return entries
+
+
+def import_snapshot(
+    directory: Path, using: str, jobs: int
+) -> List[TableEntry]:
+    """Load the snapshot in ``directory`` into database ``using``."""
+    entries = read_manifest(directory, using)
+    models = snapshot_models(using)
+    not_empty = [
+        model._meta.db_table
+        for model in models
+        if model._default_manager.using(using).exists()
+    ]
+    if not_empty:
+        raise SnapshotError(
+            f"Restore into empty tables only; {', '.join(not_empty)} "
+            f"have rows."
+        )
+
+    if connections[using].vendor == "postgresql":
+        _import_postgres(directory, entries, using, jobs)
+    else:
+        with transaction.atomic(using=using):
+            _import_sqlite(directory, entries, using)
+
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+    # Resetting the sequences of an empty shard undid its id range.
+    reserve_id_range(using)
+    return entries
+
+
+def _postgres_deferred_ddl(cursor, tables: List[str]) -> Dict[str, list]:
+    """
+    The foreign keys, unique constraints and indexes of ``tables``, and
+    the foreign keys of other tables to them, which are dropped during a
+    load: statements to drop them, to create the constraints and indexes
+    again per table, and the foreign keys last.
+    """
+    quote = cursor.db.ops.quote_name
+    cursor.execute(
+        "SELECT cls.relname, con.conname, con.contype, "
+        "pg_get_constraintdef(con.oid) "
+        "FROM pg_constraint con JOIN pg_class cls ON cls.oid = con.conrelid "
+        "WHERE (con.conrelid = ANY(%s::regclass[]) "
+        "AND con.contype IN ('f', 'u')) "
+        # Otherwise the tables cannot be truncated after a failed load.
+        "OR (con.confrelid = ANY(%s::regclass[]) AND con.contype = 'f') "
+        # Foreign keys first, they may depend on the unique constraints.
+        "ORDER BY con.contype <> 'f', con.conname",
+        [[quote(table) for table in tables]] * 2,
+    )
+    constraints = cursor.fetchall()
+    cursor.execute(
+        "SELECT cls.relname, idx.relname, pg_get_indexdef(i.indexrelid) "
+        "FROM pg_index i "
+        "JOIN pg_class cls ON cls.oid = i.indrelid "
+        "JOIN pg_class idx ON idx.oid = i.indexrelid "
+        "WHERE i.indrelid = ANY(%s::regclass[]) AND NOT EXISTS ("
+        "  SELECT 1 FROM pg_constraint con "
+        "  WHERE con.conindid = i.indexrelid "
+        "  AND con.contype IN ('p', 'u', 'x')"
+        ")",
+        [[quote(table) for table in tables]],
+    )
+    indexes = cursor.fetchall()
+
+    ddl = {"drop": [], "create": {}, "foreign_keys": []}
+    for table, name, kind, definition in constraints:
+        alter = f"ALTER TABLE {quote(table)}"
+        ddl["drop"].append(f"{alter} DROP CONSTRAINT {quote(name)}")
+        create = f"{alter} ADD CONSTRAINT {quote(name)} {definition}"
+        if kind == "f":
+            ddl["foreign_keys"].append(create)
+        else:
+            ddl["create"].setdefault(table, []).append(create)
+    for table, name, definition in indexes:
+        ddl["drop"].append(f"DROP INDEX {quote(name)}")
+        ddl["create"].setdefault(table, []).append(definition)
+    return ddl
+
+
+def _import_postgres(
+    directory: Path, entries: List[TableEntry], using: str, jobs: int
+) -> None:
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    tables = [entry.table for entry in entries]
+    if connection.in_atomic_block:
+        # Already in a transaction (tests): load on this connection.
+        jobs = 1
+    ddl_path = directory / RESTORE_DDL_NAME.format(using)
+    if ddl_path.exists():
+        raise SnapshotError(
+            f"An earlier restore was interrupted; run {ddl_path} against "
+            f"the database to rebuild its constraints and indexes, then "
+            f"remove it."
+        )
+
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        ddl = _postgres_deferred_ddl(cursor, tables)
+        rebuild_sql = [
+            sql for table in tables for sql in ddl["create"].get(table, [])
+        ] + ddl["foreign_keys"]
+        ddl_path.write_text("".join(f"{sql};\n" for sql in rebuild_sql))
+        for sql in ddl["drop"]:
+            cursor.execute(sql)
+
+    def load(entry: TableEntry) -> None:
+        columns = ", ".join(quote(column) for column in entry.columns)
+        sql = (
+            f"COPY {quote(entry.table)} ({columns}) "
+            "FROM STDIN (FORMAT BINARY)"
+        )
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                with cursor.copy(sql) as copy:
+                    with open(directory / entry.file, "rb") as file:
+                        while chunk := file.read(_CHUNK_BYTES):
+                            copy.write(chunk)
+
+    def rebuild(table: str) -> None:
+        with connections[using].cursor() as cursor:
+            for sql in ddl["create"].get(table, []):
+                cursor.execute(sql)
+            cursor.execute(f"ANALYZE {quote(table)}")
+
+    try:
+        _run(load, entries, jobs, using)
+    except BaseException:
+        # Tables loaded in full were committed. Empty them again, as they
+        # were, so that the unique constraints can be rebuilt.
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"TRUNCATE {', '.join(quote(table) for table in tables)}"
+            )
+        raise
+    finally:
+        # Rebuilt even when a load failed, so the schema is left whole.
+        _run(rebuild, tables, jobs, using)
+        with connection.cursor() as cursor:
+            for sql in ddl["foreign_keys"]:
+                cursor.execute(sql)
+        ddl_path.unlink()
+
+
+def _import_sqlite(
+    directory: Path, entries: List[TableEntry], using: str
+) -> None:
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        indexes = []
+        for entry in entries:
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+                "AND tbl_name = %s AND sql IS NOT NULL",
+                [entry.table],
+            )
+            indexes += cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {quote(name)}")
+
+        for entry in entries:
+            columns = ", ".join(quote(column) for column in entry.columns)
+            placeholders = ", ".join(["%s"] * len(entry.columns))
+            sql = (
+                f"INSERT INTO {quote(entry.table)} ({columns}) "
+                f"VALUES ({placeholders})"
+            )
+            with gzip.open(directory / entry.file, "rb") as stream:
+                for line in stream:
+                    cursor.executemany(sql, list(zip(*json.loads(line))))
+
+        for _, sql in indexes:
+            cursor.execute(sql)
@@ -0,0 +1,168 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from django.conf import settings
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from app.models import MissionModel, SyncWatermarkModel, TombstoneModel
+from app.sharding import scatter_gather
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorExpired(Exception):
+    """The cursor predates tombstones deleted since; resync from scratch."""
+
+
+@dataclass(frozen=True)
+class SyncCursor:
+    """
+    Position of a client in the change stream.
+
+    Missions are ordered by ``(updated_at, id)`` and tombstones by ``id``,
+    so the cursor keeps the last seen key of both streams.
+    """
+
+    updated_at: Optional[datetime] = None
+    mission_id: int = 0
+    tombstone_id: int = 0
+
+    def encode(self) -> str:
+        payload = {
+            "u": self.updated_at.isoformat() if self.updated_at else None,
+            "m": self.mission_id,
+            "t": self.tombstone_id,
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode()
+
+    @classmethod
+    def decode(cls, value: Optional[str]) -> "SyncCursor":
+        if not value:
+            return cls()
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(value.encode()))
+            updated_at = payload["u"] and parse_datetime(payload["u"])
+            return cls(
+                updated_at=updated_at or None,
+                mission_id=int(payload["m"]),
+                tombstone_id=int(payload["t"]),
+            )
+        except (
+            binascii.Error,
+            UnicodeError,
+            ValueError,
+            KeyError,
+            TypeError,
+        ) as e:
+            raise InvalidCursor(f"Invalid sync cursor: {value}") from e
+
+
+@dataclass
+class ChangeSet:
+    missions: List[MissionModel] = field(default_factory=list)
+    deleted: List[int] = field(default_factory=list)
+    cursor: SyncCursor = field(default_factory=SyncCursor)
+    has_more: bool = False
+
+
+def get_batch_size(requested: Optional[str]) -> int:
+    if not requested:
+        return settings.SYNC_BATCH_SIZE
+    try:
+        size = int(requested)
+    except ValueError:
+        raise InvalidCursor(f"Invalid limit: {requested}")
+    if size < 1:
+        raise InvalidCursor("Limit must be a positive number.")
+    return min(size, settings.SYNC_MAX_BATCH_SIZE)
+
+
+def get_tombstone_watermark() -> int:
+    return (
+        SyncWatermarkModel.objects.values_list("tombstone_id", flat=True)
+        .order_by()
+        .first()
+        or 0
+    )
+
+
+def raise_tombstone_watermark(tombstone_ids: List[int]) -> None:
+    """
+    Record that the tombstones ``tombstone_ids`` were deleted. Runs in the
+    transaction deleting them.
+    """
+    highest = max(tombstone_ids)
+    watermark, _ = (
+        SyncWatermarkModel.objects.select_for_update().get_or_create(pk=1)
+    )
+    if watermark.tombstone_id < highest:
+        SyncWatermarkModel.objects.filter(pk=1).update(tombstone_id=highest)
+
+
+def get_changes(
+    queryset: QuerySet, cursor: SyncCursor, limit: int
+) -> ChangeSet:
+    """
+    Return at most ``limit`` missions and ``limit`` tombstones changed after
+    ``cursor``.
+
+    Rows younger than ``SYNC_SETTLE_SECONDS`` are held back, so that a
+    transaction which committed late with an older ``updated_at`` is not
+    skipped by a client that already moved its cursor past it.
+
+    Raises ``CursorExpired`` when tombstones the client has not seen were
+    deleted by garbage collection. A client without missions has nothing
+    to delete and skips straight past them.
+    """
+    horizon = timezone.now() - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    watermark = get_tombstone_watermark()
+    if cursor.tombstone_id < watermark:
+        if cursor.updated_at is not None:
+            raise CursorExpired(
+                "Deletions after this cursor are no longer known; sync "
+                "again without a cursor."
+            )
+        cursor = replace(cursor, tombstone_id=watermark)
+
+    missions = queryset.filter(updated_at__lte=horizon)
+    if cursor.updated_at:
+        missions = missions.filter(
+            Q(updated_at__gt=cursor.updated_at)
+            | Q(updated_at=cursor.updated_at, id__gt=cursor.mission_id)
+        )
+    missions = scatter_gather(missions, ("updated_at", "id"), limit + 1)
+
+    tombstones = list(
+        TombstoneModel.objects.filter(
+            model_name=MissionModel._meta.model_name,
+            id__gt=cursor.tombstone_id,
+            deleted_at__lte=horizon,
+        )
+        .order_by("id")
+        .values_list("id", "object_id")[: limit + 1]
+    )
+
+    has_more = len(missions) > limit or len(tombstones) > limit
+    missions = missions[:limit]
+    tombstones = tombstones[:limit]
+
+    next_cursor = SyncCursor(
+        updated_at=missions[-1].updated_at if missions else cursor.updated_at,
+        mission_id=missions[-1].id if missions else cursor.mission_id,
+        tombstone_id=tombstones[-1][0] if tombstones else cursor.tombstone_id,
+    )
+    return ChangeSet(
+        missions=missions,
+        deleted=[object_id for _, object_id in tombstones],
+        cursor=next_cursor,
+        has_more=has_more,
+    )
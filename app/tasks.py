@@ -0,0 +1,190 @@
+import logging
+import random
+import traceback
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Set
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from app.breeds import refresh_breed_catalog
+from app.models import MissionModel, TaskModel
+from app.sharding import across_shards
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[[List[dict]], None]
+
+_registry: Dict[str, TaskHandler] = {}
+# Tasks whose handlers run after their claim is committed.
+_leased: Set[str] = set()
+
+
+def task(name: str, lock: bool = True) -> Callable[[TaskHandler], TaskHandler]:
+    """
+    Register a handler for tasks called ``name``.
+
+    Handlers receive the payloads of every task of that name claimed in the
+    same batch, so they can coalesce the work into set-based queries.
+    They run in the transaction that keeps the claimed rows locked, unless
+    registered with ``lock=False``, as handlers waiting on other services
+    should be: their tasks are claimed for ``TASK_LEASE`` seconds instead
+    and the handler runs outside of any transaction.
+    """
+
+    def decorator(handler: TaskHandler) -> TaskHandler:
+        _registry[name] = handler
+        if not lock:
+            _leased.add(name)
+        return handler
+
+    return decorator
+
+
+def enqueue(
+    name: str, payload: Optional[dict] = None, delay: Optional[int] = None
+) -> TaskModel:
+    """
+    Queue a task. The row is written in the caller's transaction, so the
+    task only becomes visible to workers if that transaction commits.
+    """
+    if name not in _registry:
+        raise ValueError(f"Unknown task: {name}")
+    run_after = timezone.now()
+    if delay:
+        run_after += timedelta(seconds=delay)
+    return TaskModel.objects.create(
+        name=name, payload=payload or {}, run_after=run_after
+    )
+
+
+def get_retry_delay(attempts: int) -> float:
+    delay = min(
+        settings.TASK_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.TASK_RETRY_MAX_DELAY,
+    )
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _mark_failed(tasks: List[TaskModel], error: str) -> None:
+    now = timezone.now()
+    for item in tasks:
+        item.attempts += 1
+        item.last_error = error
+        if item.attempts >= settings.TASK_MAX_ATTEMPTS:
+            item.status = TaskModel.Status.FAILED
+            item.finished_at = now
+        else:
+            item.run_after = now + timedelta(
+                seconds=get_retry_delay(item.attempts)
+            )
+    TaskModel.objects.bulk_update(
+        tasks, ["attempts", "last_error", "status", "finished_at", "run_after"]
+    )
+
+
+def process_batch(batch_size: int) -> int:
+    """
+    Claim up to ``batch_size`` ready tasks and run them, grouped by name.
+
+    Rows are locked with ``SELECT ... FOR UPDATE SKIP LOCKED`` for the
+    duration of the batch, so concurrent workers never claim the same task
+    and a crashed worker releases its tasks with its transaction. Tasks
+    of handlers registered with ``lock=False`` are leased instead and run
+    once the claim is committed. Returns the number of claimed tasks.
+    """
+    leased = {}
+    with transaction.atomic():
+        tasks = list(
+            TaskModel.objects.select_for_update(skip_locked=True)
+            .filter(
+                status=TaskModel.Status.PENDING,
+                run_after__lte=timezone.now(),
+            )
+            .order_by("run_after", "id")[:batch_size]
+        )
+
+        groups = defaultdict(list)
+        for item in tasks:
+            groups[item.name].append(item)
+
+        for name, group in groups.items():
+            handler = _registry.get(name)
+            if handler is None:
+                _mark_failed(group, f"Unknown task: {name}")
+            elif name in _leased:
+                TaskModel.objects.filter(
+                    id__in=[item.id for item in group]
+                ).update(
+                    run_after=timezone.now()
+                    + timedelta(seconds=settings.TASK_LEASE)
+                )
+                leased[name] = group
+            else:
+                _run(name, group, in_transaction=True)
+
+    for name, group in leased.items():
+        _run(name, group, in_transaction=False)
+    return len(tasks)
+
+
+def _run(name: str, group: List[TaskModel], in_transaction: bool) -> None:
+    try:
+        if in_transaction:
+            with transaction.atomic():
+                _registry[name]([item.payload for item in group])
+        else:
+            _registry[name]([item.payload for item in group])
+    except Exception:
+        logger.exception("Task %s failed", name)
+        _mark_failed(group, traceback.format_exc())
+        return
+    TaskModel.objects.filter(id__in=[item.id for item in group]).update(
+        status=TaskModel.Status.DONE,
+        attempts=F("attempts") + 1,
+        finished_at=timezone.now(),
+    )
+
+
+def queue_depth() -> Dict[str, Dict[str, int]]:
+    """Number of pending and failed tasks per name."""
+    depth = defaultdict(dict)
+    rows = (
+        TaskModel.objects.exclude(status=TaskModel.Status.DONE)
+        .values("name", "status")
+        .annotate(count=Count("id"))
+    )
+    for row in rows:
+        depth[row["name"]][row["status"]] = row["count"]
+    return dict(depth)
+
+
+def ensure_scheduled(name: str, delay: Optional[int] = None) -> None:
+    """Queue ``name`` unless a pending task of that name already exists."""
+    pending = TaskModel.objects.filter(
+        name=name, status=TaskModel.Status.PENDING
+    ).exists()
+    if not pending:
+        enqueue(name, delay=delay)
+
+
+@task("check_mission_completion")
+def check_mission_completion(payloads: List[dict]) -> None:
+    mission_ids = {payload["mission_id"] for payload in payloads}
+    missions = MissionModel.objects.filter(
+        id__in=mission_ids, completed=False
+    ).prefetch_related("targets")
+    for mission in across_shards(missions):
+        mission.check_and_complete_mission()
+
+
+@task("refresh_breed_catalog", lock=False)
+def refresh_breed_catalog_task(payloads: List[dict]) -> None:
+    refresh_breed_catalog()
+    enqueue(
+        "refresh_breed_catalog",
+        delay=settings.BREED_CATALOG_REFRESH_INTERVAL,
+    )
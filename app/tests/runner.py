@@ -0,0 +1,140 @@
+"""
+Test runner of the test settings (``SCA.settings.test``).
+
+Reuses the test databases and runs test cases in parallel processes
+unless told otherwise, and records how long every test takes, in the
+workers too, to list the slowest after the run.
+"""
+
+import time
+import unittest
+
+from django.conf import settings
+from django.test.runner import (
+    DiscoverRunner,
+    ParallelTestSuite,
+    RemoteTestResult,
+    RemoteTestRunner,
+    get_max_test_processes,
+)
+
+
+class TimingMixin:
+    """Time every test run by this result and pass it to ``addTiming``."""
+
+    def startTest(self, test):
+        self._test_started = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.addTiming(test, time.perf_counter() - self._test_started)
+
+
+class TimingsResult(unittest.TextTestResult):
+    """Collects the timings reported to ``addTiming``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.timings = []
+
+    def addTiming(self, test, elapsed: float) -> None:
+        self.timings.append((elapsed, test.id()))
+
+
+class TimedTextTestResult(TimingMixin, TimingsResult):
+    pass
+
+
+class TimedRemoteTestResult(TimingMixin, RemoteTestResult):
+    """Sends the timings of a parallel worker to the main process."""
+
+    def addTiming(self, test, elapsed: float) -> None:
+        self.events.append(("addTiming", self.test_index, elapsed))
+
+
+class TimedRemoteTestRunner(RemoteTestRunner):
+    resultclass = TimedRemoteTestResult
+
+
+class TimedParallelTestSuite(ParallelTestSuite):
+    runner_class = TimedRemoteTestRunner
+
+
+class TimedTestRunner(DiscoverRunner):
+    """
+    ``DiscoverRunner`` that defaults to ``--keepdb`` (``TEST_KEEPDB``) and
+    ``--parallel`` (``TEST_PARALLEL``), and lists the ``TEST_SLOWEST``
+    slowest tests, flagging those above ``TEST_SLOW_THRESHOLD`` seconds.
+    """
+
+    parallel_test_suite = TimedParallelTestSuite
+
+    def __init__(
+        self,
+        keepdb=False,
+        fresh_db=False,
+        parallel=0,
+        slowest=None,
+        slow_threshold=None,
+        **kwargs,
+    ):
+        keepdb = keepdb or (settings.TEST_KEEPDB and not fresh_db)
+        if not parallel and settings.TEST_PARALLEL and not kwargs.get("pdb"):
+            parallel = get_max_test_processes()
+        super().__init__(keepdb=keepdb, parallel=parallel, **kwargs)
+        self.slowest = settings.TEST_SLOWEST if slowest is None else slowest
+        self.slow_threshold = (
+            settings.TEST_SLOW_THRESHOLD
+            if slow_threshold is None
+            else slow_threshold
+        )
+        self.runs_in_parallel = False
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--fresh-db",
+            action="store_true",
+            help="Create the test databases again instead of reusing them.",
+        )
+        parser.add_argument(
+            "--slowest",
+            type=int,
+            metavar="N",
+            help="List the N slowest tests after the run, 0 for none.",
+        )
+        parser.add_argument(
+            "--slow-threshold",
+            type=float,
+            metavar="SECONDS",
+            help="Flag tests that take longer than this.",
+        )
+
+    def get_resultclass(self):
+        resultclass = super().get_resultclass()
+        if resultclass is not None:
+            return resultclass
+        # Tests run in parallel are timed in the workers.
+        return TimingsResult if self.runs_in_parallel else TimedTextTestResult
+
+    def run_suite(self, suite, **kwargs):
+        self.runs_in_parallel = isinstance(suite, ParallelTestSuite)
+        result = super().run_suite(suite, **kwargs)
+        self.report_timings(getattr(result, "timings", []))
+        return result
+
+    def report_timings(self, timings) -> None:
+        if not timings or self.slowest <= 0:
+            return
+        timings = sorted(timings, reverse=True)
+        self.log(f"\nSlowest {min(self.slowest, len(timings))} tests:")
+        for elapsed, test_id in timings[: self.slowest]:
+            flag = "  SLOW" if elapsed > self.slow_threshold else ""
+            self.log(f"{elapsed:8.3f}s  {test_id}{flag}")
+        slow = sum(elapsed > self.slow_threshold for elapsed, _ in timings)
+        if slow:
+            self.log(
+                f"{slow} test(s) took longer than {self.slow_threshold}s."
+            )
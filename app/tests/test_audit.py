@@ -0,0 +1,155 @@
+import threading
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from app.audit import audit_buffer
+from app.buffers import FlushingBuffer
+from app.models import AuditLogModel, CatModel, MissionModel, TargetModel
+
+
+class FlushingBufferTest(SimpleTestCase):
+    def test_flushes_when_full(self):
+        batches = []
+        buffer = FlushingBuffer("test", batches.append, max_size=3, max_age=60)
+
+        for i in range(7):
+            buffer.add(i)
+
+        self.assertEqual(batches, [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(len(buffer), 1)
+
+        buffer.flush()
+        self.assertEqual(batches[-1], [6])
+
+    def test_flushes_after_max_age(self):
+        flushed = threading.Event()
+        batches = []
+
+        def flush(batch):
+            batches.append(batch)
+            flushed.set()
+
+        buffer = FlushingBuffer("test", flush, max_size=100, max_age=0.01)
+        buffer.add("item")
+
+        self.assertTrue(flushed.wait(timeout=5))
+        self.assertEqual(batches, [["item"]])
+
+    def test_failed_flush_does_not_raise(self):
+        def flush(batch):
+            raise RuntimeError("database is down")
+
+        buffer = FlushingBuffer("test", flush, max_size=1, max_age=60)
+
+        with self.assertLogs("app.buffers", level="ERROR"):
+            buffer.add("item")
+        self.assertEqual(len(buffer), 0)
+
+
+class AuditLogTest(TestCase):
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+        self.cat = CatModel.objects.create(
+            name="Test Cat", experience=5, salary=1000, breed="Siamese"
+        )
+        self.target = TargetModel.objects.create(name="Target", country="UA")
+        self.mission = MissionModel.objects.create()
+        self.mission.targets.add(self.target)
+
+    def tearDown(self):
+        audit_buffer.flush()
+
+    def test_changes_are_buffered_then_written(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse(
+                    "app:missionmodel-assignats_cat", args=[self.mission.id]
+                ),
+                {"cat_id": self.cat.id},
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(
+                reverse("app:missionmodel-detail", args=[self.mission.id]),
+                {"targets": [{"id": self.target.id, "notes": "Seen"}]},
+                format="json",
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get(
+                reverse(
+                    "app:missionmodel-finish_mission", args=[self.mission.id]
+                )
+            )
+
+        self.assertFalse(AuditLogModel.objects.exists())
+        audit_buffer.flush()
+
+        entries = list(AuditLogModel.objects.order_by("id"))
+        self.assertEqual(
+            [(entry.action, entry.model_name) for entry in entries],
+            [
+                ("assign", "missionmodel"),
+                ("update", "targetmodel"),
+                ("complete", "missionmodel"),
+            ],
+        )
+        self.assertEqual(entries[0].username, "admin")
+        self.assertEqual(entries[1].changes["notes"], "Seen")
+
+    def test_rolled_back_changes_are_not_logged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    self.mission.complete()
+                    raise RuntimeError
+
+        self.assertEqual(len(audit_buffer), 0)
+
+    def patch_targets(self, targets, **headers):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.patch(
+                reverse("app:missionmodel-detail", args=[self.mission.id]),
+                {"targets": targets},
+                format="json",
+                headers=headers,
+            )
+
+    def test_rejected_update_is_not_logged(self):
+        response = self.patch_targets(
+            [{"id": self.target.id, "notes": "Seen"}], **{"If-Match": '"999"'}
+        )
+
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual(len(audit_buffer), 0)
+
+    def test_invalid_later_target_is_not_logged(self):
+        response = self.patch_targets(
+            [
+                {"id": self.target.id, "notes": "Seen"},
+                {"id": 12345, "notes": "Missing"},
+            ]
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(audit_buffer), 0)
+        self.target.refresh_from_db()
+        self.assertIsNone(self.target.notes)
+
+    def test_entries_are_append_only(self):
+        entry = AuditLogModel.objects.create(
+            action="delete", model_name="missionmodel", object_id=1
+        )
+
+        with self.assertRaises(ValidationError):
+            entry.save()
+        with self.assertRaises(ValidationError):
+            entry.delete()
@@ -0,0 +1,334 @@
+import hashlib
+import json
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
+
+import psycopg
+from django.core.management import call_command, CommandError
+from django.db import connection
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from app.models import (
+    CatModel,
+    IdempotencyKeyModel,
+    MissionModel,
+    RevokedTokenModel,
+    TargetModel,
+    TaskModel,
+    TombstoneModel,
+)
+from app.reports import payroll_rows
+
+
+@patch("app.management.commands.wait_for_db.get_pending_migrations")
+@patch("app.management.commands.wait_for_db.time.sleep")
+@patch("app.management.commands.wait_for_db.connection.ensure_connection")
+class WaitForDbCommandTest(SimpleTestCase):
+    def test_waits_with_growing_backoff(
+        self, mock_connect, mock_sleep, mock_pending
+    ):
+        mock_connect.side_effect = [OperationalError] * 3 + [None]
+        mock_pending.return_value = []
+
+        call_command("wait_for_db", stdout=StringIO())
+
+        self.assertEqual(mock_connect.call_count, 4)
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertEqual(len(delays), 3)
+        self.assertTrue(all(0 <= delay <= 0.4 for delay in delays))
+
+    def test_gives_up_after_timeout(
+        self, mock_connect, mock_sleep, mock_pending
+    ):
+        mock_connect.side_effect = OperationalError
+
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", timeout=0, stdout=StringIO())
+
+        mock_sleep.assert_not_called()
+
+    def test_check_migrations_fails_on_pending(
+        self, mock_connect, mock_sleep, mock_pending
+    ):
+        mock_pending.return_value = ["app.0001_initial"]
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "wait_for_db", check_migrations=True, stdout=StringIO()
+            )
+
+
+class PayrollReportCommandTest(TestCase):
+    def setUp(self):
+        for i, (breed, experience, salary) in enumerate(
+            [
+                ("Siamese", 1, "1000.10"),
+                ("Siamese", 4, "2000.20"),
+                ("Bengal", 30, "0.01"),
+            ]
+        ):
+            CatModel.objects.create(
+                name=f"Cat{i}",
+                email=f"cat{i}@sca.test",
+                breed=breed,
+                experience=experience,
+                salary=Decimal(salary),
+            )
+
+    def test_ndjson_report(self):
+        out = StringIO()
+
+        call_command("payroll_report", format="ndjson", stdout=out)
+
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row["record"] for row in rows[:3]], ["cat"] * 3)
+        breeds = {
+            row["breed"]: (row["cats"], Decimal(row["salary"]))
+            for row in rows
+            if row["record"] == "breed"
+        }
+        self.assertEqual(
+            breeds,
+            {
+                "Bengal": (1, Decimal("0.01")),
+                "Siamese": (2, Decimal("3000.30")),
+            },
+        )
+        bands = [
+            row["experience"]
+            for row in rows
+            if row["record"] == "experience_band"
+        ]
+        self.assertEqual(bands, ["0-2", "3-5", "21+"])
+        self.assertEqual(rows[-1]["record"], "total")
+        self.assertEqual(Decimal(rows[-1]["salary"]), Decimal("3000.31"))
+
+    def test_csv_report(self):
+        out = StringIO()
+
+        call_command("payroll_report", chunk_size=1, stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            lines[0], "record,id,name,breed,experience,cats,salary"
+        )
+        self.assertEqual(lines[-1], "total,,,,,3,3000.31")
+
+    def test_rows_are_read_in_one_transaction(self):
+        depth = len(connection.atomic_blocks)
+
+        depths = {len(connection.atomic_blocks) for _ in payroll_rows(1)}
+
+        self.assertEqual(depths, {depth + 1})
+        self.assertEqual(len(connection.atomic_blocks), depth)
+
+
+class GcAgencyCommandTest(TestCase):
+    def setUp(self):
+        old = timezone.now() - timedelta(days=365)
+        self.orphans = [
+            TargetModel.objects.create(name=f"Orphan{i}", country="UA")
+            for i in range(2)
+        ]
+        self.mission = MissionModel.objects.create()
+        self.mission.targets.add(
+            TargetModel.objects.create(name="Linked", country="UA")
+        )
+
+        TaskModel.objects.create(
+            name="old", status=TaskModel.Status.DONE, finished_at=old
+        )
+        TaskModel.objects.create(
+            name="recent",
+            status=TaskModel.Status.DONE,
+            finished_at=timezone.now(),
+        )
+        TaskModel.objects.create(name="pending")
+        RevokedTokenModel.objects.create(jti="expired", expires_at=old)
+        RevokedTokenModel.objects.create(
+            jti="live", expires_at=timezone.now() + timedelta(days=1)
+        )
+        IdempotencyKeyModel.objects.create(
+            key="old", method="POST", path="/", request_hash="x"
+        )
+        IdempotencyKeyModel.objects.update(created_at=old)
+        TombstoneModel.objects.create(model_name="missionmodel", object_id=1)
+        TombstoneModel.objects.update(deleted_at=old)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = Path(directory.name) / "gc.json"
+
+    def gc(self, **options):
+        out = StringIO()
+        call_command(
+            "gc_agency",
+            checkpoint=self.checkpoint,
+            pause=0,
+            stdout=out,
+            **options,
+        )
+        return out.getvalue()
+
+    def test_dry_run_reports_without_deleting(self):
+        output = self.gc(dry_run=True)
+
+        self.assertIn("orphaned_targets@default: 2", output)
+        self.assertIn("tasks@default: 1", output)
+        self.assertEqual(TargetModel.objects.count(), 3)
+
+    def test_deletes_only_dead_rows(self):
+        self.gc()
+
+        self.assertEqual(
+            list(TargetModel.objects.values_list("name", flat=True)),
+            ["Linked"],
+        )
+        self.assertEqual(
+            sorted(TaskModel.objects.values_list("name", flat=True)),
+            ["pending", "recent"],
+        )
+        self.assertEqual(
+            list(RevokedTokenModel.objects.values_list("jti", flat=True)),
+            ["live"],
+        )
+        self.assertFalse(IdempotencyKeyModel.objects.exists())
+        self.assertFalse(TombstoneModel.objects.exists())
+        self.assertEqual(json.loads(self.checkpoint.read_text()), {})
+
+    def test_resumes_from_checkpoint_when_out_of_time(self):
+        with patch("app.management.commands.gc_agency.time") as clock:
+            clock.monotonic.side_effect = [0, 0, 1000]
+            output = self.gc(
+                only=["orphaned_targets"], batch_size=1, max_seconds=60
+            )
+
+        self.assertIn("out of time", output)
+        self.assertEqual(
+            json.loads(self.checkpoint.read_text()),
+            {"orphaned_targets@default": self.orphans[0].id},
+        )
+        self.assertEqual(TargetModel.objects.count(), 2)
+
+        self.gc(only=["orphaned_targets"])
+
+        self.assertEqual(TargetModel.objects.count(), 1)
+        self.assertEqual(json.loads(self.checkpoint.read_text()), {})
+
+
+class SnapshotCommandTest(TestCase):
+    def setUp(self):
+        self.cat = CatModel.objects.create(
+            name="Tom", breed="Siamese", experience=3, salary=Decimal("10.5")
+        )
+        self.mission = MissionModel.objects.create(cat=self.cat, region="UA")
+        for name in ["Kyiv", "Lviv"]:
+            self.mission.targets.add(
+                TargetModel.objects.create(name=name, country="UA")
+            )
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name) / "snapshot"
+
+    def export(self):
+        call_command("snapshot_export", self.directory, stdout=StringIO())
+
+    def restore(self):
+        call_command("snapshot_import", self.directory, stdout=StringIO())
+
+    def clear(self):
+        CatModel.objects.all().delete()
+        TargetModel.objects.all().delete()
+
+    def test_round_trip(self):
+        self.export()
+        manifest = json.loads((self.directory / "manifest.json").read_text())
+        rows = {table["table"]: table["rows"] for table in manifest["tables"]}
+        self.assertEqual(rows["app_targetmodel"], 2)
+        self.assertEqual(rows["app_missionmodel_targets"], 2)
+
+        self.clear()
+        self.restore()
+
+        cat = CatModel.objects.get()
+        self.assertEqual(cat.salary, Decimal("10.5"))
+        self.assertEqual(cat.performance.experience, 3)
+        mission = MissionModel.objects.get()
+        self.assertEqual(mission.cat, cat)
+        self.assertEqual(
+            sorted(mission.targets.values_list("name", flat=True)),
+            ["Kyiv", "Lviv"],
+        )
+        self.assertEqual(mission.id, self.mission.id)
+        self.assertEqual(mission.updated_at, self.mission.updated_at)
+
+    def test_refuses_corrupt_snapshot(self):
+        self.export()
+        self.clear()
+        with open(self.directory / "app_targetmodel.gz", "ab") as file:
+            file.write(b"garbage")
+
+        with self.assertRaisesMessage(CommandError, "corrupt"):
+            self.restore()
+        self.assertFalse(CatModel.objects.exists())
+
+    def foreign_keys(self) -> int:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT count(*) FROM pg_constraint "
+                "WHERE conrelid = 'app_missionmodel_targets'::regclass "
+                "AND contype = 'f'"
+            )
+            return cursor.fetchone()[0]
+
+    @skipUnless(connection.vendor == "postgresql", "Loads with COPY.")
+    def test_failed_load_leaves_empty_tables_and_whole_schema(self):
+        foreign_keys = self.foreign_keys()
+        self.export()
+        self.clear()
+        # Cut the last row of the targets short, with a valid checksum.
+        path = self.directory / "app_targetmodel.copy"
+        path.write_bytes(path.read_bytes()[:-8])
+        manifest_path = self.directory / "manifest.json"
+        manifest = json.loads(manifest_path.read_text())
+        for table in manifest["tables"]:
+            if table["file"] == path.name:
+                table["sha256"] = hashlib.sha256(path.read_bytes()).hexdigest()
+        manifest_path.write_text(json.dumps(manifest))
+
+        with self.assertRaises(psycopg.Error):
+            self.restore()
+
+        self.assertFalse(CatModel.objects.exists())
+        self.assertEqual(self.foreign_keys(), foreign_keys)
+        self.assertFalse((self.directory / "restore-default.sql").exists())
+
+    @skipUnless(connection.vendor == "postgresql", "Loads with COPY.")
+    def test_refuses_restore_after_interrupted_one(self):
+        self.export()
+        self.clear()
+        (self.directory / "restore-default.sql").write_text("")
+
+        with self.assertRaisesMessage(CommandError, "was interrupted"):
+            self.restore()
+        self.assertFalse(CatModel.objects.exists())
+
+    def test_refuses_tables_with_rows(self):
+        self.export()
+
+        with self.assertRaisesMessage(CommandError, "empty tables only"):
+            self.restore()
+
+    def test_refuses_non_empty_directory(self):
+        self.export()
+
+        with self.assertRaisesMessage(CommandError, "is not empty"):
+            self.export()
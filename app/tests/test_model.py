@@ -1,12 +1,29 @@
+from datetime import timedelta
 from unittest.mock import patch
 
+from django.conf import settings
+from django.core.cache import caches
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from requests import RequestException
 
-from app.models import CatModel, TargetModel, MissionModel
+from app.archive import archive_batch
+from app.breeds import BREED_CATALOG_CACHE, BREED_CATALOG_CACHE_KEY
+from app.models import (
+    ArchivedMissionModel,
+    CatModel,
+    CatPerformanceModel,
+    MissionModel,
+    TargetModel,
+    TaskModel,
+    TombstoneModel,
+)
+from app.tasks import enqueue, process_batch, queue_depth
 
 
 class CatModelTest(TestCase):
+    @override_settings(BREED_CATALOG_SOURCE="app.breeds.fetch_breed_names")
     @patch("requests.get")
     def test_cat_model_valid_breed(self, mock_get):
         mock_get.return_value.json.return_value = [
@@ -22,7 +39,12 @@ class CatModelTest(TestCase):
             cat.clean()
         except ValidationError:
             self.fail("clean() raised ValidationError unexpectedly!")
+        mock_get.assert_called_once_with(
+            settings.BREED_CATALOG_URL,
+            timeout=settings.BREED_CATALOG_REQUEST_TIMEOUT,
+        )
 
+    @override_settings(BREED_CATALOG_SOURCE="app.breeds.fetch_breed_names")
     @patch("requests.get")
     def test_cat_model_invalid_breed(self, mock_get):
         mock_get.return_value.json.return_value = [
@@ -98,6 +120,11 @@ class MissionModelTest(TestCase):
 
         mission.check_and_complete_mission()
         self.assertTrue(mission.completed)
+        self.assertIsNone(mission.cat)
+
+        performance = CatPerformanceModel.objects.get(cat=self.cat)
+        self.assertEqual(performance.missions_completed, 1)
+        self.assertEqual(performance.targets_completed, 2)
 
     def test_delete_mission_with_cat(self):
         mission = MissionModel.objects.create(cat=self.cat)
@@ -112,3 +139,154 @@ class MissionModelTest(TestCase):
 
         mission.delete()
         self.assertFalse(MissionModel.objects.filter(id=mission.id).exists())
+
+
+class CatPerformanceModelTest(TestCase):
+    def setUp(self):
+        self.cats = [
+            CatModel.objects.create(
+                name=f"SpyCat{i}",
+                email=f"cat{i}@sca.test",
+                breed="Siamese",
+                experience=i,
+                salary=1000,
+            )
+            for i in range(2)
+        ]
+
+    def test_cat_gets_a_ledger_row(self):
+        self.cats[0].experience = 7
+        self.cats[0].save()
+
+        performance = CatPerformanceModel.objects.get(cat=self.cats[0])
+        self.assertEqual(performance.missions_completed, 0)
+        self.assertEqual(performance.experience, 7)
+
+    def test_record_adds_to_totals(self):
+        CatPerformanceModel.record([(self.cats[0].id, 2)])
+        CatPerformanceModel.record(
+            [(self.cats[0].id, 3), (self.cats[0].id, 1), (self.cats[1].id, 4)]
+        )
+
+        first, second = CatPerformanceModel.objects.order_by("cat")
+        self.assertEqual(
+            (first.missions_completed, first.targets_completed), (3, 6)
+        )
+        self.assertEqual(
+            (second.missions_completed, second.targets_completed), (1, 4)
+        )
+        self.assertIsNotNone(first.last_completed_at)
+
+    def test_record_creates_missing_rows(self):
+        CatPerformanceModel.objects.all().delete()
+
+        CatPerformanceModel.record([(self.cats[1].id, 2)])
+
+        performance = CatPerformanceModel.objects.get(cat=self.cats[1])
+        self.assertEqual(performance.missions_completed, 1)
+        self.assertEqual(performance.experience, 1)
+
+
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        self.target = TargetModel.objects.create(
+            name="Target1", country="Country1", completed=True
+        )
+        self.mission = MissionModel.objects.create()
+        self.mission.targets.add(self.target)
+
+    def test_process_batch_runs_and_coalesces_tasks(self):
+        enqueue("check_mission_completion", {"mission_id": self.mission.id})
+        enqueue("check_mission_completion", {"mission_id": self.mission.id})
+
+        self.assertEqual(process_batch(batch_size=10), 2)
+
+        self.mission.refresh_from_db()
+        self.assertTrue(self.mission.completed)
+        self.assertFalse(
+            TaskModel.objects.exclude(status=TaskModel.Status.DONE).exists()
+        )
+
+    @patch("app.breeds.fetch_breed_names")
+    def test_breed_catalog_is_fetched_after_the_claim(self, fetch):
+        task = enqueue("refresh_breed_catalog")
+        claimed_until = []
+        fetch.side_effect = lambda: claimed_until.append(
+            TaskModel.objects.get(id=task.id).run_after
+        ) or ["Siamese"]
+
+        process_batch(batch_size=10)
+
+        # The claim was committed before the call, which holds no lock.
+        self.assertGreater(claimed_until[0], timezone.now())
+        task.refresh_from_db()
+        self.assertEqual(task.status, TaskModel.Status.DONE)
+        self.assertEqual(
+            caches[BREED_CATALOG_CACHE].get(BREED_CATALOG_CACHE_KEY),
+            ["Siamese"],
+        )
+
+    @patch("requests.get", side_effect=RequestException("offline"))
+    def test_failed_task_is_retried_with_backoff(self, mock_get):
+        task = enqueue("refresh_breed_catalog")
+
+        with self.assertLogs("app.tasks", "ERROR"):
+            process_batch(batch_size=10)
+
+        task.refresh_from_db()
+        self.assertEqual(task.status, TaskModel.Status.PENDING)
+        self.assertEqual(task.attempts, 1)
+        self.assertGreater(task.run_after, timezone.now())
+        self.assertEqual(process_batch(batch_size=10), 0)
+        self.assertEqual(
+            queue_depth(), {"refresh_breed_catalog": {"pending": 1}}
+        )
+
+
+class ArchiveTest(TestCase):
+    def setUp(self):
+        self.shared_target = TargetModel.objects.create(
+            name="Shared", country="UA", completed=True
+        )
+        self.own_target = TargetModel.objects.create(
+            name="Own", country="UA", completed=True, notes="Done"
+        )
+        self.old_mission = MissionModel.objects.create(completed=True)
+        self.old_mission.targets.add(self.shared_target, self.own_target)
+        self.active_mission = MissionModel.objects.create()
+        self.active_mission.targets.add(self.shared_target)
+
+        MissionModel.objects.update(
+            updated_at=timezone.now() - timedelta(days=60)
+        )
+
+    def test_archive_batch_moves_old_completed_missions(self):
+        archived = archive_batch(
+            timezone.now() - timedelta(days=30), batch_size=10
+        )
+
+        self.assertEqual(archived, 1)
+        self.assertEqual(
+            list(MissionModel.objects.values_list("id", flat=True)),
+            [self.active_mission.id],
+        )
+        archive = ArchivedMissionModel.objects.get(id=self.old_mission.id)
+        self.assertEqual(
+            sorted(archive.targets.values_list("name", flat=True)),
+            ["Own", "Shared"],
+        )
+        self.assertTrue(TargetModel.objects.filter(name="Shared").exists())
+        self.assertFalse(TargetModel.objects.filter(name="Own").exists())
+        self.assertTrue(
+            TombstoneModel.objects.filter(
+                object_id=self.old_mission.id
+            ).exists()
+        )
+
+    def test_archive_batch_keeps_recent_missions(self):
+        archived = archive_batch(
+            timezone.now() - timedelta(days=90), batch_size=10
+        )
+
+        self.assertEqual(archived, 0)
+        self.assertEqual(MissionModel.objects.count(), 2)
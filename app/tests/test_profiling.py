@@ -0,0 +1,113 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from app.models import MissionModel
+from app.profiling import ProfileStore, SlowRequestSampler
+
+
+class ProfilingMiddlewareTest(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("app:missionmodel-list")
+        MissionModel.objects.create()
+
+        self.profiles = tempfile.TemporaryDirectory()
+        self.addCleanup(self.profiles.cleanup)
+
+    @override_settings(
+        PROFILING_SERVER_TIMING=False,
+        PROFILING_SAMPLE_RATE=0,
+        PROFILING_SLOW_THRESHOLD=None,
+    )
+    def test_no_header_when_disabled(self):
+        response = self.client.get(self.url)
+
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(PROFILING_SERVER_TIMING=True)
+    def test_server_timing_phases(self):
+        response = self.client.get(self.url)
+
+        metrics = {
+            metric.split(";")[0]
+            for metric in response["Server-Timing"].split(", ")
+        }
+        self.assertTrue(
+            {
+                "auth",
+                "permissions",
+                "throttle",
+                "db",
+                "serialize",
+                "render",
+                "total",
+            }
+            <= metrics,
+            metrics,
+        )
+
+    def test_sampled_requests_are_profiled(self):
+        with override_settings(
+            PROFILING_SAMPLE_RATE=1.0, PROFILING_DIR=self.profiles.name
+        ):
+            self.client.get(self.url)
+
+        profiles = list(Path(self.profiles.name).glob("*.prof"))
+        self.assertEqual(len(profiles), 1)
+        self.assertIn("GET-api-v1-missions", profiles[0].name)
+
+
+class ProfileStoreTest(SimpleTestCase):
+    def test_keeps_newest_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = ProfileStore(Path(directory), max_files=3)
+            request = type("Request", (), {"path": "/x/", "method": "GET"})
+
+            for i in range(5):
+                store.save_samples(request, {f"frame{i}": 1})
+
+            contents = sorted(
+                path.read_text() for path in Path(directory).iterdir()
+            )
+            self.assertEqual(
+                contents, ["frame2 1\n", "frame3 1\n", "frame4 1\n"]
+            )
+
+
+class SlowRequestSamplerTest(SimpleTestCase):
+    def test_samples_slow_requests_only(self):
+        sampler = SlowRequestSampler(threshold=0.02, interval=0.005)
+        results = {}
+
+        def slow_request():
+            samples = sampler.begin()
+            time.sleep(0.2)
+            sampler.end()
+            results["slow"] = samples
+
+        def fast_request():
+            samples = sampler.begin()
+            sampler.end()
+            results["fast"] = samples
+
+        for target in (slow_request, fast_request):
+            thread = threading.Thread(target=target)
+            thread.start()
+            thread.join()
+
+        self.assertFalse(results["fast"])
+        self.assertTrue(
+            any("slow_request" in stack for stack in results["slow"])
+        )
@@ -0,0 +1,171 @@
+from django.contrib.auth import get_user_model
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from app.models import CatModel, MissionModel, TargetModel
+from app.tests.utils import QueryBudgetMixin
+
+
+class MissionViewSetQueryBudgetTest(QueryBudgetMixin, APITestCase):
+    """
+    Query budget per MissionViewSet action, measured at 1, 10 and 100
+    related rows. The count must stay within the budget and must not grow
+    with the data.
+    """
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+    def create_mission(self, prefix: str, targets: int, **kwargs):
+        mission = MissionModel.objects.create(**kwargs)
+        mission.targets.add(
+            *TargetModel.objects.bulk_create(
+                TargetModel(name=f"{prefix}-{i}", country="UA")
+                for i in range(targets)
+            )
+        )
+        return mission
+
+    def create_missions(self, prefix: str, count: int) -> None:
+        for i in range(count):
+            self.create_mission(f"{prefix}-{i}", targets=2)
+
+    def request(self, method: str, url: str, data=None):
+        def operation():
+            response = getattr(self.client, method)(url, data, format="json")
+            self.assertLess(response.status_code, 400, response.data)
+
+        return operation
+
+    def test_list(self):
+        def setup(size):
+            MissionModel.objects.all().delete()
+            self.create_missions(f"list{size}", size)
+            return self.request(
+                "get", reverse("app:missionmodel-list") + "?limit=100"
+            )
+
+        self.assertQueryBudget(3, setup)
+
+    def test_retrieve(self):
+        def setup(size):
+            mission = self.create_mission(f"retrieve{size}", targets=size)
+            return self.request(
+                "get", reverse("app:missionmodel-detail", args=[mission.id])
+            )
+
+        self.assertQueryBudget(2, setup)
+
+    def test_create(self):
+        def setup(size):
+            self.create_missions(f"create{size}", size)
+            data = {
+                "targets": [
+                    {"name": f"new{size}-{i}", "country": "UA"}
+                    for i in range(3)
+                ]
+            }
+            return self.request("post", reverse("app:missionmodel-list"), data)
+
+        self.assertQueryBudget(11, setup)
+
+    def test_create_with_upsert(self):
+        def setup(size):
+            self.create_missions(f"upsert{size}", size)
+            data = {
+                "targets": [
+                    {"name": f"upsert{size}-0-0", "country": "UA"},
+                    {"name": f"upsert{size}-new", "country": "UA"},
+                ]
+            }
+            return self.request(
+                "post", reverse("app:missionmodel-list") + "?upsert=true", data
+            )
+
+        self.assertQueryBudget(8, setup)
+
+    def test_partial_update(self):
+        def setup(size):
+            mission = self.create_mission(f"update{size}", targets=size)
+            data = {
+                "targets": [
+                    {"id": target.id, "notes": "Seen at the docks"}
+                    for target in mission.targets.all()
+                ]
+            }
+            return self.request(
+                "patch",
+                reverse("app:missionmodel-detail", args=[mission.id]),
+                data,
+            )
+
+        self.assertQueryBudget(11, setup)
+
+    def test_assign_cat(self):
+        def setup(size):
+            self.create_missions(f"assign{size}", size)
+            mission = self.create_mission(f"assign{size}", targets=size)
+            cat = CatModel.objects.create(
+                name=f"Cat{size}",
+                email=f"cat{size}@sca.test",
+                breed="Siamese",
+                salary=1000,
+            )
+            url = reverse("app:missionmodel-assignats_cat", args=[mission.id])
+            return self.request("get", f"{url}?cat_id={cat.id}")
+
+        self.assertQueryBudget(5, setup)
+
+    def test_finish(self):
+        def setup(size):
+            cat = CatModel.objects.create(
+                name=f"Cat{size}",
+                email=f"cat{size}@sca.test",
+                breed="Siamese",
+                salary=1000,
+            )
+            mission = self.create_mission(
+                f"finish{size}", targets=size, cat=cat
+            )
+            return self.request(
+                "get",
+                reverse("app:missionmodel-finish_mission", args=[mission.id]),
+            )
+
+        self.assertQueryBudget(8, setup)
+
+    def test_complete_targets(self):
+        def setup(size):
+            missions = [
+                self.create_mission(f"complete{size}-{i}", targets=2)
+                for i in range(size)
+            ]
+            target_ids = list(
+                TargetModel.objects.filter(missions__in=missions).values_list(
+                    "id", flat=True
+                )
+            )
+            return self.request(
+                "post",
+                reverse("app:missionmodel-complete_targets"),
+                {"target_ids": target_ids},
+            )
+
+        self.assertQueryBudget(8, setup)
+
+    def test_budget_failure_reports_sql(self):
+        def setup(size):
+            self.create_missions(f"n+1-{size}", size)
+
+            def operation():
+                for mission in MissionModel.objects.all():
+                    list(mission.targets.all())
+
+            return operation
+
+        with self.assertRaisesMessage(AssertionError, "SELECT"):
+            self.assertQueryBudget(100, setup)
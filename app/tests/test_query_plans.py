@@ -0,0 +1,123 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.utils import timezone
+
+from app.models import (
+    LEADERBOARD_ORDERING,
+    CatModel,
+    CatPerformanceModel,
+    MissionModel,
+    TargetModel,
+)
+from app.tests.utils import QueryPlanAssertionsMixin
+from app.views import MissionViewSet
+
+CATS = 200
+MISSIONS = 1000
+TARGETS_PER_MISSION = 2
+
+
+class QueryPlanTest(QueryPlanAssertionsMixin, TestCase):
+    """
+    Hot queries of the mission endpoints must be served by an index, not by
+    a sequential scan of a table that grows with the agency.
+    """
+
+    large_tables = (
+        CatModel._meta.db_table,
+        CatPerformanceModel._meta.db_table,
+        MissionModel._meta.db_table,
+        TargetModel._meta.db_table,
+        MissionModel.targets.through._meta.db_table,
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cats = CatModel.objects.bulk_create(
+            CatModel(
+                name=f"Cat{i}",
+                email=f"cat{i}@sca.test",
+                breed="Siamese",
+                salary=1000,
+            )
+            for i in range(CATS)
+        )
+        targets = TargetModel.objects.bulk_create(
+            TargetModel(name=f"Target{i}", country="UA", completed=i % 3 == 0)
+            for i in range(MISSIONS * TARGETS_PER_MISSION)
+        )
+        missions = MissionModel.objects.bulk_create(
+            MissionModel(
+                cat=cats[i] if i < CATS else None, completed=i >= CATS * 2
+            )
+            for i in range(MISSIONS)
+        )
+        through = MissionModel.targets.through
+        through.objects.bulk_create(
+            through(
+                missionmodel_id=mission.id,
+                targetmodel_id=targets[i * TARGETS_PER_MISSION + offset].id,
+            )
+            for i, mission in enumerate(missions)
+            for offset in range(TARGETS_PER_MISSION)
+        )
+        CatPerformanceModel.objects.bulk_create(
+            CatPerformanceModel(
+                cat=cat, missions_completed=i % 7, targets_completed=i % 11
+            )
+            for i, cat in enumerate(cats)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+        cls.cat = cats[0]
+        cls.mission = missions[0]
+        cls.target = targets[0]
+
+    def test_retrieve_mission(self):
+        self.assertNoSequentialScans(
+            MissionViewSet.queryset.filter(pk=self.mission.pk)
+        )
+
+    def test_prefetch_mission_targets(self):
+        self.assertNoSequentialScans(
+            TargetModel.objects.filter(missions__in=[self.mission.pk])
+        )
+
+    def test_assign_cat_lookups(self):
+        self.assertNoSequentialScans(CatModel.objects.filter(id=self.cat.id))
+        self.assertNoSequentialScans(self.cat.missions.filter(completed=False))
+
+    def test_check_and_complete_mission_targets(self):
+        self.assertNoSequentialScans(self.mission.targets.all())
+
+    def test_missions_of_target(self):
+        self.assertNoSequentialScans(self.target.missions.all())
+
+    def test_delta_sync_changes(self):
+        since = timezone.now() - timedelta(minutes=5)
+
+        self.assertNoSequentialScans(
+            MissionViewSet.queryset.filter(
+                Q(updated_at__gt=since)
+                | Q(updated_at=since, id__gt=self.mission.id),
+                updated_at__lte=timezone.now(),
+            ).order_by("updated_at", "id")[:100]
+        )
+
+    def test_archive_candidates(self):
+        cutoff = timezone.now() - timedelta(days=30)
+
+        self.assertNoSequentialScans(
+            MissionModel.objects.filter(
+                completed=True, updated_at__lt=cutoff
+            ).order_by("updated_at", "id")[:500]
+        )
+
+    def test_leaderboard_page(self):
+        self.assertNoSequentialScans(
+            CatPerformanceModel.objects.order_by(*LEADERBOARD_ORDERING)[:50]
+        )
@@ -0,0 +1,100 @@
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from app.models import CatModel, RevokedTokenModel
+from app.revocation import BloomFilter, revocation_list
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_no_false_negatives(self):
+        values = [f"jti-{i}" for i in range(1000)]
+        bloom = BloomFilter(bits=2**14, hashes=7, values=values)
+
+        self.assertTrue(all(value in bloom for value in values))
+        false_positives = sum(f"other-{i}" in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+
+class TokenRevocationTest(APITestCase):
+
+    def setUp(self):
+        revocation_list.reset()
+        self.user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = str(self.refresh.access_token)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.access}")
+        self.url = reverse("app:catmodel-list")
+
+    def logout(self, **data):
+        return self.client.post(reverse("token_logout"), data, format="json")
+
+    def test_logout_revokes_access_and_refresh_tokens(self):
+        response = self.logout(refresh=str(self.refresh))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(RevokedTokenModel.objects.count(), 2)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": str(self.refresh)}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.post(
+            reverse("token_verify"), {"token": self.access}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_valid_token_needs_no_revocation_query(self):
+        cat = CatModel.objects.create(
+            name="Test Cat", experience=5, salary=1000, breed="Siamese"
+        )
+        revocation_list.sync(force=True)
+
+        with self.assertNumQueries(2):
+            # The user and the cat, nothing for the revocation check.
+            response = self.client.get(
+                reverse("app:catmodel-detail", args=[cat.id])
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_revocations_of_other_processes_are_synced(self):
+        other = RefreshToken.for_user(self.user)
+        RevokedTokenModel.objects.create(
+            jti=other["jti"], expires_at=other.current_time.replace(year=2100)
+        )
+
+        revocation_list.sync(force=True)
+
+        self.assertTrue(revocation_list.is_revoked(other["jti"]))
+
+    def test_rotation_revokes_old_refresh_token(self):
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": str(self.refresh)}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(
+            reverse("token_refresh"), {"refresh": str(self.refresh)}
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cannot_revoke_refresh_token_of_another_user(self):
+        other_user = get_user_model().objects.create_user(
+            username="other", password="password"
+        )
+
+        response = self.logout(refresh=str(RefreshToken.for_user(other_user)))
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(RevokedTokenModel.objects.exists())
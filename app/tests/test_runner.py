@@ -0,0 +1,36 @@
+import logging
+
+from django.test import SimpleTestCase, override_settings
+
+from app.tests.runner import TimedTestRunner
+
+
+@override_settings(
+    TEST_KEEPDB=True,
+    TEST_PARALLEL=False,
+    TEST_SLOWEST=2,
+    TEST_SLOW_THRESHOLD=0.5,
+)
+class TimedTestRunnerTest(SimpleTestCase):
+    def test_defaults_come_from_settings(self):
+        runner = TimedTestRunner()
+
+        self.assertTrue(runner.keepdb)
+        self.assertFalse(TimedTestRunner(fresh_db=True).keepdb)
+        self.assertEqual(runner.parallel, 0)
+        self.assertEqual(TimedTestRunner(slowest=0).slowest, 0)
+
+    def test_reports_slowest_tests(self):
+        logger = logging.getLogger("test-runner")
+        runner = TimedTestRunner(logger=logger)
+
+        with self.assertLogs(logger) as logs:
+            runner.report_timings(
+                [(0.1, "fast"), (0.9, "slow"), (0.3, "medium")]
+            )
+
+        lines = [record.getMessage() for record in logs.records]
+        self.assertEqual(lines[0], "\nSlowest 2 tests:")
+        self.assertEqual(lines[1], "   0.900s  slow  SLOW")
+        self.assertEqual(lines[2], "   0.300s  medium")
+        self.assertEqual(lines[3], "1 test(s) took longer than 0.5s.")
@@ -0,0 +1,49 @@
+from pathlib import Path
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from app.schema import generate_schema, reset_schema_cache
+
+
+@skipUnless(
+    connection.vendor == "postgresql",
+    "The stored schema uses PostgreSQL integer field ranges.",
+)
+class StoredSchemaTest(SimpleTestCase):
+    def test_stored_schema_is_up_to_date(self):
+        path = Path(settings.OPENAPI_SCHEMA_PATH)
+
+        self.assertTrue(
+            path.exists() and path.read_bytes() == generate_schema(),
+            f"{path.name} is stale. Run 'python manage.py build_schema'.",
+        )
+
+
+@override_settings(OPENAPI_SCHEMA_USE_FILE=True)
+class CachedSchemaViewTest(SimpleTestCase):
+    def setUp(self):
+        reset_schema_cache()
+        self.addCleanup(reset_schema_cache)
+
+    def test_serves_stored_schema_with_cache_headers(self):
+        response = self.client.get(reverse("schema"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.content,
+            Path(settings.OPENAPI_SCHEMA_PATH).read_bytes(),
+        )
+        self.assertIn("max-age", response["Cache-Control"])
+        self.assertTrue(response["ETag"])
+
+    def test_not_modified_for_matching_etag(self):
+        etag = self.client.get(reverse("schema"))["ETag"]
+
+        response = self.client.get(reverse("schema"), HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
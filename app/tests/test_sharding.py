@@ -0,0 +1,296 @@
+import unittest
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from app.audit import audit_buffer
+from app.models import (
+    ArchivedMissionModel,
+    AuditLogModel,
+    CatModel,
+    MissionModel,
+    TargetModel,
+)
+from app.sharding import scatter_gather, shard_for_pk
+
+SHARDS = settings.SHARD_DATABASES[:2]
+
+
+@unittest.skipUnless(
+    len(SHARDS) == 2, "needs two databases in SHARD_DATABASES"
+)
+@override_settings(SHARD_MAP={"UA": SHARDS[0] if SHARDS else None})
+class ShardingTest(APITestCase):
+    databases = {"default", *SHARDS}
+
+    def setUp(self):
+        self.shard, self.other_shard = SHARDS
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.list_url = reverse("app:missionmodel-list")
+
+    def create_mission(self, name: str, country: str) -> MissionModel:
+        response = self.client.post(
+            self.list_url,
+            {"targets": [{"name": name, "country": country}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return MissionModel.objects.using(
+            self.shard if country == "UA" else "default"
+        ).get(targets__name=name)
+
+    def test_missions_are_created_on_the_shard_of_their_region(self):
+        mission = self.create_mission("Kyiv", "UA")
+        self.create_mission("Paris", "FR")
+
+        self.assertEqual(mission.region, "UA")
+        self.assertEqual(shard_for_pk(mission.id), self.shard)
+        self.assertEqual(
+            TargetModel.objects.using(self.shard).get().name, "Kyiv"
+        )
+        self.assertEqual(TargetModel.objects.get().name, "Paris")
+
+    def test_detail_and_update_reach_the_shard(self):
+        mission = self.create_mission("Kyiv", "UA")
+        target = mission.targets.get()
+        url = reverse("app:missionmodel-detail", args=[mission.id])
+
+        response = self.client.patch(
+            url,
+            {"targets": [{"id": target.id, "notes": "Seen"}]},
+            format="json",
+            headers={"If-Match": '"1"'},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        target.refresh_from_db()
+        self.assertEqual(target.notes, "Seen")
+        self.assertEqual(self.client.get(url).data["version"], 2)
+
+    def test_audit_waits_for_the_shard_transaction(self):
+        mission = self.create_mission("Kyiv", "UA")
+        target = mission.targets.get()
+
+        with self.captureOnCommitCallbacks(using=self.shard, execute=True):
+            self.client.patch(
+                reverse("app:missionmodel-detail", args=[mission.id]),
+                {"targets": [{"id": target.id, "notes": "Seen"}]},
+                format="json",
+            )
+        audit_buffer.flush()
+
+        entry = AuditLogModel.objects.get(
+            model_name="targetmodel", action="update"
+        )
+        self.assertEqual(entry.object_id, target.id)
+        self.assertEqual(entry.changes["notes"], "Seen")
+
+    def test_list_merges_shards_in_id_order(self):
+        ids = [
+            self.create_mission(name, country).id
+            for name, country in [("A", "UA"), ("B", "FR"), ("C", "FR")]
+        ]
+
+        response = self.client.get(self.list_url, {"limit": 2})
+
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [mission["id"] for mission in response.data["results"]],
+            sorted(ids)[:2],
+        )
+        response = self.client.get(self.list_url, {"ids": f"{ids[0]},0"})
+        self.assertEqual(response.data["missing"], [0])
+
+    @override_settings(SYNC_SETTLE_SECONDS=0)
+    def test_changes_are_merged_by_keyset(self):
+        self.create_mission("A", "UA")
+        self.create_mission("B", "FR")
+        self.create_mission("C", "UA")
+        url = reverse("app:missionmodel-changes")
+
+        first = self.client.get(url, {"limit": 2}).data
+        second = self.client.get(
+            url, {"limit": 2, "since": first["cursor"]}
+        ).data
+
+        names = [
+            mission["targets"][0]["name"]
+            for mission in first["missions"] + second["missions"]
+        ]
+        self.assertEqual(names, ["A", "B", "C"])
+        self.assertFalse(second["has_more"])
+
+    def test_cat_assignment_across_shards(self):
+        cat = CatModel.objects.create(
+            name="Tom", breed="Siamese", experience=1, salary=100
+        )
+        first = self.create_mission("A", "UA")
+        second = self.create_mission("B", "FR")
+
+        def assign(mission):
+            return self.client.get(
+                reverse("app:missionmodel-assignats_cat", args=[mission.id]),
+                {"cat_id": cat.id},
+            )
+
+        self.assertEqual(assign(first).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            assign(second).status_code, status.HTTP_400_BAD_REQUEST
+        )
+
+        self.client.get(
+            reverse("app:missionmodel-finish_mission", args=[first.id])
+        )
+        cat.performance.refresh_from_db()
+        self.assertEqual(cat.performance.missions_completed, 1)
+
+    def test_complete_targets_on_every_shard(self):
+        ids = [
+            self.create_mission(name, country).targets.get().id
+            for name, country in [("A", "UA"), ("B", "FR")]
+        ]
+
+        response = self.client.post(
+            reverse("app:missionmodel-complete_targets"),
+            {"target_ids": ids + [12345]},
+            format="json",
+        )
+
+        self.assertEqual(response.data["targets"], ids)
+        self.assertEqual(response.data["missing"], [12345])
+        self.assertEqual(len(response.data["missions"]), 2)
+
+    def test_atomic_batch_rolls_back_every_shard(self):
+        missions = [
+            self.create_mission(name, country)
+            for name, country in [("A", "UA"), ("B", "FR")]
+        ]
+
+        response = self.client.post(
+            reverse("app:batch"),
+            {
+                "atomic": True,
+                "operations": [
+                    {
+                        "method": "PATCH",
+                        "path": f"/api/v1/missions/{mission.id}/",
+                        "body": {
+                            "targets": [
+                                {
+                                    "id": mission.targets.get().id,
+                                    "notes": "Seen",
+                                }
+                            ]
+                        },
+                    }
+                    for mission in missions
+                ]
+                + [{"method": "GET", "path": "/api/v1/missions/999999/"}],
+            },
+            format="json",
+        )
+
+        self.assertTrue(response.data["rolled_back"])
+        self.assertEqual(
+            [r["status"] for r in response.data["responses"]], [200, 200, 404]
+        )
+        for mission in missions:
+            self.assertIsNone(mission.targets.get().notes)
+
+    def test_scatter_gather(self):
+        for name, country in [("A", "UA"), ("B", "FR"), ("C", "UA")]:
+            self.create_mission(name, country)
+
+        targets = scatter_gather(TargetModel.objects.all(), ["name"], 2)
+
+        self.assertEqual([target.name for target in targets], ["A", "B"])
+
+    def test_target_names_are_unique_across_shards(self):
+        self.create_mission("Kyiv", "UA")
+
+        for params in ["", "?upsert=true"]:
+            response = self.client.post(
+                self.list_url + params,
+                {"targets": [{"name": "Kyiv", "country": "FR"}]},
+                format="json",
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TargetModel.objects.exists())
+
+    def test_upsert_reuses_target_on_the_same_shard(self):
+        first = self.create_mission("Kyiv", "UA")
+
+        response = self.client.post(
+            self.list_url + "?upsert=true",
+            {"targets": [{"name": "Kyiv", "country": "UA"}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            TargetModel.objects.using(self.shard).get().missions.count(), 2
+        )
+        self.assertEqual(first.targets.get().name, "Kyiv")
+
+    def test_reshard_moves_region(self):
+        first = self.create_mission("A", "UA")
+        second = self.create_mission("B", "UA")
+        self.create_mission("C", "FR")
+
+        with override_settings(SHARD_MAP={"UA": self.other_shard}):
+            call_command(
+                "reshard",
+                "UA",
+                to=self.other_shard,
+                batch_size=1,
+                pause=0,
+                stdout=StringIO(),
+            )
+
+        self.assertFalse(MissionModel.objects.using(self.shard).exists())
+        self.assertFalse(TargetModel.objects.using(self.shard).exists())
+        moved = MissionModel.objects.using(self.other_shard)
+        self.assertEqual(
+            sorted(moved.values_list("id", flat=True)),
+            [first.id, second.id],
+        )
+        self.assertEqual(moved.get(id=first.id).targets.get().name, "A")
+        self.assertTrue(MissionModel.objects.filter(region="FR").exists())
+
+        response = self.client.get(
+            reverse("app:missionmodel-detail", args=[first.id])
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_archive_covers_every_shard(self):
+        mission = self.create_mission("Kyiv", "UA")
+        MissionModel.objects.using(self.shard).filter(id=mission.id).update(
+            completed=True, updated_at=timezone.now() - timedelta(days=30)
+        )
+
+        call_command(
+            "archive_missions", older_than_days=1, pause=0, stdout=StringIO()
+        )
+
+        self.assertFalse(MissionModel.objects.using(self.shard).exists())
+        self.assertFalse(TargetModel.objects.using(self.shard).exists())
+        archived = ArchivedMissionModel.objects.get()
+        self.assertEqual(archived.id, mission.id)
+        self.assertEqual(archived.targets.get().name, "Kyiv")
+
+    def test_reshard_requires_updated_shard_map(self):
+        with self.assertRaises(CommandError):
+            call_command("reshard", "UA", to=self.other_shard)
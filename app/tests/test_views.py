@@ -1,10 +1,35 @@
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db.models import F
+from django.test import override_settings
+from django.utils import timezone
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 from rest_framework.test import APITestCase
+from rest_framework.throttling import UserRateThrottle
 
-from app.models import CatModel
+from app.autosave import flush_notes, notes_buffer
+from app.concurrency import conditional_update
+from app.health import reset_readiness_cache
+from app.models import (
+    ArchivedMissionModel,
+    AuditLogModel,
+    CatModel,
+    CatPerformanceModel,
+    IdempotencyKeyModel,
+    MissionModel,
+    NoteDraftModel,
+    TargetModel,
+    TargetNameModel,
+    TombstoneModel,
+)
 
 
 class CatViewSetTest(APITestCase):
@@ -22,6 +47,25 @@ class CatViewSetTest(APITestCase):
         )
         self.client = APIClient()
 
+    def test_payroll_report_as_admin(self):
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse("app:catmodel-payroll")
+
+        response = self.client.get(url, {"output": "ndjson"})
+        lines = b"".join(response.streaming_content).splitlines()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(len(lines), 4)
+
+    def test_payroll_report_requires_admin(self):
+        self.client.force_authenticate(user=self.user)
+        url = reverse("app:catmodel-payroll")
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_get_list_of_cats_as_authenticated_user(self):
         self.client.force_authenticate(user=self.user)
         url = reverse("app:catmodel-list")
@@ -103,3 +147,951 @@ class CatViewSetTest(APITestCase):
         self.client.force_authenticate(user=self.admin_user)
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class MissionChangesViewTest(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("app:missionmodel-changes")
+
+        self.missions = []
+        for i in range(3):
+            mission = MissionModel.objects.create()
+            mission.targets.add(
+                TargetModel.objects.create(name=f"Target{i}", country="UA")
+            )
+            self.missions.append(mission)
+
+    def test_full_sync_in_batches(self):
+        response = self.client.get(self.url, {"limit": 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["missions"]), 2)
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(
+            self.url, {"since": response.data["cursor"], "limit": 2}
+        )
+
+        self.assertEqual(len(response.data["missions"]), 1)
+        self.assertEqual(
+            response.data["missions"][0]["id"], self.missions[2].id
+        )
+        self.assertFalse(response.data["has_more"])
+
+    def test_returns_only_changes_after_cursor(self):
+        cursor = self.client.get(self.url).data["cursor"]
+
+        mission = self.missions[0]
+        mission.completed = True
+        mission.save()
+        deleted_id = self.missions[1].id
+        self.missions[1].delete()
+
+        response = self.client.get(self.url, {"since": cursor})
+
+        self.assertEqual(
+            [m["id"] for m in response.data["missions"]], [mission.id]
+        )
+        self.assertEqual(response.data["deleted"], [deleted_id])
+
+    def test_partial_completion_is_a_change(self):
+        mission = self.missions[0]
+        mission.targets.add(
+            TargetModel.objects.create(name="Pending", country="UA")
+        )
+        cursor = self.client.get(self.url).data["cursor"]
+
+        self.client.force_authenticate(
+            user=get_user_model().objects.create_superuser(
+                username="admin", password="password"
+            )
+        )
+        self.client.post(
+            reverse("app:missionmodel-complete_targets"),
+            {"target_ids": [mission.targets.get(name="Target0").id]},
+            format="json",
+        )
+        response = self.client.get(self.url, {"since": cursor})
+
+        self.assertEqual(
+            [m["id"] for m in response.data["missions"]], [mission.id]
+        )
+        self.assertFalse(response.data["missions"][0]["completed"])
+        self.assertEqual(response.data["missions"][0]["version"], 2)
+
+    def test_cursor_older_than_collected_tombstones(self):
+        cursor = self.client.get(self.url).data["cursor"]
+        self.missions[0].delete()
+        TombstoneModel.objects.update(
+            deleted_at=timezone.now() - timedelta(days=365)
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                "gc_agency",
+                only=["tombstones"],
+                checkpoint=Path(directory) / "gc.json",
+                stdout=StringIO(),
+            )
+
+        response = self.client.get(self.url, {"since": cursor})
+
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        resync = self.client.get(self.url)
+        self.assertEqual(len(resync.data["missions"]), 2)
+        response = self.client.get(self.url, {"since": resync.data["cursor"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {"since": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MissionIdempotencyTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = reverse("app:missionmodel-list")
+        self.data = {"targets": [{"name": "Target1", "country": "UA"}]}
+
+    def test_retry_replays_stored_response(self):
+        first = self.client.post(
+            self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        retry = self.client.post(
+            self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry.headers["Idempotent-Replayed"], "true")
+        self.assertEqual(MissionModel.objects.count(), 1)
+        self.assertEqual(TargetModel.objects.count(), 1)
+
+    def test_key_reused_with_different_payload(self):
+        self.client.post(
+            self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        data = {"targets": [{"name": "Target2", "country": "UA"}]}
+
+        response = self.client.post(
+            self.url, data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+        self.assertEqual(MissionModel.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0)
+    def test_in_flight_duplicate_is_rejected_after_wait(self):
+        self.client.post(
+            self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+        IdempotencyKeyModel.objects.update(
+            status_code=None, response_body=None
+        )
+
+        response = self.client.post(
+            self.url, self.data, format="json", HTTP_IDEMPOTENCY_KEY="abc"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(MissionModel.objects.count(), 1)
+
+
+class HealthViewTest(APITestCase):
+
+    def setUp(self):
+        reset_readiness_cache()
+
+    def test_healthz(self):
+        response = self.client.get(reverse("healthz"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_readyz_when_migrated(self):
+        response = self.client.get(reverse("readyz"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["status"], "ok")
+
+    @override_settings(ALLOWED_HOSTS=["sca.example.com"])
+    def test_probes_answer_any_host(self):
+        for name in ["healthz", "readyz"]:
+            response = self.client.get(
+                reverse(name), headers={"Host": "localhost"}
+            )
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get(
+            reverse("app:missionmodel-list"), headers={"Host": "localhost"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch("app.health.get_pending_migrations")
+    def test_readyz_with_pending_migrations(self, mock_pending):
+        mock_pending.return_value = ["app.9999_new"]
+
+        response = self.client.get(reverse("readyz"))
+
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+
+
+class ArchivedMissionViewSetTest(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        mission = ArchivedMissionModel.objects.create(
+            id=42, updated_at=timezone.now()
+        )
+        mission.targets.create(
+            target_id=7, name="Target1", country="UA", completed=True
+        )
+
+    def test_list_archived_missions(self):
+        response = self.client.get(reverse("app:archivedmissionmodel-list"))
+        data = response.data["results"]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(data[0]["id"], 42)
+        self.assertEqual(data[0]["targets"][0]["id"], 7)
+
+    def test_archive_is_read_only(self):
+        response = self.client.delete(
+            reverse("app:archivedmissionmodel-detail", args=[42])
+        )
+
+        self.assertEqual(
+            response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED
+        )
+
+
+class BatchRetrieveTest(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse("app:missionmodel-list")
+
+        self.missions = []
+        for i in range(3):
+            mission = MissionModel.objects.create()
+            mission.targets.add(
+                TargetModel.objects.create(name=f"Target{i}", country="UA")
+            )
+            self.missions.append(mission)
+
+    def test_retrieve_missions_by_ids(self):
+        ids = [self.missions[2].id, self.missions[0].id]
+
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                self.url, {"ids": ",".join(map(str, ids + [999]))}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [mission["id"] for mission in response.data["results"]], ids
+        )
+        self.assertEqual(
+            response.data["results"][0]["targets"][0]["name"], "Target2"
+        )
+        self.assertEqual(response.data["missing"], [999])
+
+    def test_retrieve_cats_by_ids(self):
+        cat = CatModel.objects.create(
+            name="Test Cat", experience=5, salary=1000, breed="Siamese"
+        )
+
+        response = self.client.get(
+            reverse("app:catmodel-list"), {"ids": f"{cat.id},{cat.id}"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["missing"], [])
+
+    def test_invalid_ids(self):
+        response = self.client.get(self.url, {"ids": "1,abc"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(BATCH_RETRIEVE_MAX_IDS=2)
+    def test_too_many_ids(self):
+        response = self.client.get(self.url, {"ids": "1,2,3"})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_list_without_ids_is_paginated(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+
+
+class CompleteTargetsViewTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = reverse("app:missionmodel-complete_targets")
+
+        self.cat = CatModel.objects.create(
+            name="Test Cat", experience=5, salary=1000, breed="Siamese"
+        )
+        self.done = MissionModel.objects.create(cat=self.cat)
+        self.partial = MissionModel.objects.create()
+        self.targets = TargetModel.objects.bulk_create(
+            TargetModel(name=f"Target{i}", country="UA") for i in range(3)
+        )
+        self.done.targets.add(self.targets[0], self.targets[1])
+        self.partial.targets.add(self.targets[1], self.targets[2])
+
+    def test_complete_targets(self):
+        ids = [self.targets[0].id, self.targets[1].id, 999]
+
+        response = self.client.post(
+            self.url, {"target_ids": ids}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["targets"], ids[:2])
+        self.assertEqual(response.data["missing"], [999])
+        self.assertEqual(response.data["missions"], [self.done.id])
+
+        self.done.refresh_from_db()
+        self.partial.refresh_from_db()
+        self.assertTrue(self.done.completed)
+        self.assertIsNone(self.done.cat)
+        self.assertFalse(self.partial.completed)
+        self.assertEqual(TargetModel.objects.filter(completed=True).count(), 2)
+
+    def test_requires_admin(self):
+        user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.client.post(
+            self.url, {"target_ids": [self.targets[0].id]}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_empty_target_ids(self):
+        response = self.client.post(
+            self.url, {"target_ids": []}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LeaderboardViewTest(APITestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.url = reverse("app:catmodel-leaderboard")
+
+        self.cats = [
+            CatModel.objects.create(
+                name=f"Cat{i}",
+                email=f"cat{i}@sca.test",
+                breed="Siamese",
+                experience=i,
+                salary=1000,
+            )
+            for i in range(3)
+        ]
+
+    def test_finish_mission_updates_leaderboard(self):
+        mission = MissionModel.objects.create(cat=self.cats[0])
+        mission.targets.add(
+            TargetModel.objects.create(name="Target", country="UA")
+        )
+        self.client.force_authenticate(user=self.admin_user)
+
+        self.client.get(
+            reverse("app:missionmodel-finish_mission", args=[mission.id])
+        )
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data["results"][0]
+        self.assertEqual(first["cat"], self.cats[0].id)
+        self.assertEqual(first["missions_completed"], 1)
+        self.assertEqual(first["targets_completed"], 1)
+
+    def test_leaderboard_breaks_ties_by_experience(self):
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.get(self.url, {"limit": 2})
+
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            [row["name"] for row in response.data["results"]],
+            ["Cat2", "Cat1"],
+        )
+
+
+class AuditLogViewSetTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = reverse("app:auditlogmodel-list")
+
+        AuditLogModel.objects.bulk_create(
+            AuditLogModel(
+                action="update", model_name="targetmodel", object_id=i % 2
+            )
+            for i in range(5)
+        )
+
+    def test_cursor_pagination(self):
+        response = self.client.get(self.url, {"limit": 2})
+        first_page = [entry["id"] for entry in response.data["results"]]
+        response = self.client.get(response.data["next"])
+        second_page = [entry["id"] for entry in response.data["results"]]
+
+        self.assertEqual(len(first_page), 2)
+        self.assertEqual(len(second_page), 2)
+        self.assertGreater(min(first_page), max(second_page))
+
+    def test_filter_by_object(self):
+        response = self.client.get(
+            self.url, {"model": "targetmodel", "object_id": 1}
+        )
+
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_requires_admin(self):
+        user = get_user_model().objects.create_user(
+            username="testuser", password="password"
+        )
+        self.client.force_authenticate(user=user)
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class MissionConcurrencyTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+        self.target = TargetModel.objects.create(name="Target", country="UA")
+        self.mission = MissionModel.objects.create()
+        self.mission.targets.add(self.target)
+        self.url = reverse("app:missionmodel-detail", args=[self.mission.id])
+
+    def patch_notes(self, notes: str, **headers):
+        return self.client.patch(
+            self.url,
+            {"targets": [{"id": self.target.id, "notes": notes}]},
+            format="json",
+            headers=headers,
+        )
+
+    def test_retrieve_returns_etag(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["ETag"], '"1"')
+        self.assertEqual(response.data["version"], 1)
+
+    def test_matching_if_match_updates(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        response = self.patch_notes("First", **{"If-Match": etag})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"2"')
+        self.assertEqual(response.data["targets"][0]["version"], 2)
+
+    def test_stale_if_match_is_rejected(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.patch_notes("First", **{"If-Match": etag})
+
+        response = self.patch_notes("Second", **{"If-Match": etag})
+
+        self.assertEqual(
+            response.status_code, status.HTTP_412_PRECONDITION_FAILED
+        )
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.notes, "First")
+
+    def test_malformed_if_match_is_rejected(self):
+        response = self.patch_notes("First", **{"If-Match": "garbage"})
+
+        self.assertEqual(
+            response.status_code, status.HTTP_412_PRECONDITION_FAILED
+        )
+
+    def test_target_listed_twice_is_rejected(self):
+        response = self.client.patch(
+            self.url,
+            {
+                "targets": [
+                    {"id": self.target.id, "notes": "First"},
+                    {"id": str(self.target.id), "notes": "Second"},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.target.refresh_from_db()
+        self.assertIsNone(self.target.notes)
+
+    def concurrently(self, model, **fields):
+        """Patch the mission as if ``model`` were written meanwhile."""
+
+        def write_then_update(*args, **kwargs):
+            model.objects.update(version=F("version") + 1, **fields)
+            return conditional_update(*args, **kwargs)
+
+        return patch(
+            "app.serializers.conditional_update", side_effect=write_then_update
+        )
+
+    def test_target_changed_since_read_is_rejected(self):
+        with self.concurrently(TargetModel, completed=True):
+            response = self.patch_notes("First")
+
+        self.assertEqual(
+            response.status_code, status.HTTP_412_PRECONDITION_FAILED
+        )
+        self.target.refresh_from_db()
+        self.assertIsNone(self.target.notes)
+
+    def test_unconditional_update_returns_stored_version(self):
+        with self.concurrently(MissionModel):
+            response = self.patch_notes("First")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["ETag"], '"3"')
+        self.mission.refresh_from_db()
+        self.assertEqual(self.mission.version, 3)
+
+    def test_idempotent_replay_keeps_etag(self):
+        first = self.patch_notes("First", **{"Idempotency-Key": "abc"})
+        retry = self.patch_notes("First", **{"Idempotency-Key": "abc"})
+
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry["ETag"], first["ETag"])
+
+    @override_settings(CONCURRENCY_REQUIRE_IF_MATCH=True)
+    def test_if_match_can_be_required(self):
+        response = self.patch_notes("First")
+
+        self.assertEqual(
+            response.status_code, status.HTTP_428_PRECONDITION_REQUIRED
+        )
+
+
+class BatchViewTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = reverse("app:batch")
+
+        self.target = TargetModel.objects.create(name="Target", country="UA")
+        self.mission = MissionModel.objects.create()
+        self.mission.targets.add(self.target)
+        self.mission_path = f"/api/v1/missions/{self.mission.id}/"
+
+    def patch_notes(self, notes: str) -> dict:
+        return {
+            "method": "PATCH",
+            "path": self.mission_path,
+            "body": {"targets": [{"id": self.target.id, "notes": notes}]},
+        }
+
+    def test_runs_operations_in_order(self):
+        response = self.client.post(
+            self.url,
+            {
+                "operations": [
+                    {"method": "GET", "path": self.mission_path},
+                    self.patch_notes("Seen"),
+                    {"method": "GET", "path": self.mission_path},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, patch_response, last = response.data["responses"]
+        self.assertEqual(
+            [r["status"] for r in response.data["responses"]], [200] * 3
+        )
+        self.assertEqual(first["headers"]["ETag"], '"1"')
+        self.assertIsNone(first["body"]["targets"][0]["notes"])
+        self.assertEqual(patch_response["headers"]["ETag"], '"2"')
+        self.assertEqual(last["body"]["targets"][0]["notes"], "Seen")
+        self.assertFalse(response.data["rolled_back"])
+
+    def test_sub_requests_use_if_match(self):
+        response = self.client.post(
+            self.url,
+            {
+                "operations": [
+                    {
+                        **self.patch_notes("Seen"),
+                        "headers": {"If-Match": '"7"'},
+                    }
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(
+            response.data["responses"][0]["status"],
+            status.HTTP_412_PRECONDITION_FAILED,
+        )
+
+    def test_atomic_batch_rolls_back_on_failure(self):
+        response = self.client.post(
+            self.url,
+            {
+                "atomic": True,
+                "operations": [
+                    self.patch_notes("Seen"),
+                    {"method": "GET", "path": "/api/v1/missions/999999/"},
+                    {"method": "GET", "path": self.mission_path},
+                ],
+            },
+            format="json",
+        )
+
+        self.assertTrue(response.data["rolled_back"])
+        self.assertEqual(
+            [r["status"] for r in response.data["responses"]], [200, 404, 424]
+        )
+        self.target.refresh_from_db()
+        self.assertIsNone(self.target.notes)
+
+    def test_non_atomic_batch_continues_after_failure(self):
+        response = self.client.post(
+            self.url,
+            {
+                "operations": [
+                    {"method": "GET", "path": "/api/v1/missions/999999/"},
+                    self.patch_notes("Seen"),
+                ],
+            },
+            format="json",
+        )
+
+        self.assertEqual(
+            [r["status"] for r in response.data["responses"]], [404, 200]
+        )
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.notes, "Seen")
+
+    def test_rejects_nested_batches(self):
+        response = self.client.post(
+            self.url,
+            {"operations": [{"method": "POST", "path": "/api/v1/batch/"}]},
+            format="json",
+        )
+
+        self.assertEqual(
+            response.data["responses"][0]["status"],
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    def test_limits(self):
+        too_many = [{"method": "GET", "path": self.mission_path}] * 21
+        outside = [{"method": "GET", "path": "/healthz"}]
+
+        for operations in (too_many, outside, []):
+            response = self.client.post(
+                self.url, {"operations": operations}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        with override_settings(BATCH_MAX_BODY_BYTES=10):
+            response = self.client.post(
+                self.url,
+                {"operations": [self.patch_notes("Too long a note")]},
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_throttled_once(self):
+        with patch.object(
+            UserRateThrottle, "allow_request", return_value=True
+        ) as allow_request:
+            self.client.post(
+                self.url,
+                {
+                    "operations": [
+                        {"method": "GET", "path": self.mission_path}
+                    ]
+                    * 3
+                },
+                format="json",
+            )
+
+        self.assertEqual(allow_request.call_count, 1)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+
+        response = self.client.post(
+            self.url,
+            {"operations": [{"method": "GET", "path": self.mission_path}]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class MissionTargetUpsertTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.url = reverse("app:missionmodel-list")
+        self.existing = TargetModel.objects.create(
+            name="Known", country="UA", notes="Seen before"
+        )
+
+    def create(self, *names: str, **params):
+        url = self.url
+        if params:
+            url += "?" + "&".join(f"{k}={v}" for k, v in params.items())
+        return self.client.post(
+            url,
+            {"targets": [{"name": name, "country": "PL"} for name in names]},
+            format="json",
+        )
+
+    def test_upsert_links_existing_targets(self):
+        response = self.create("Known", "New", upsert="true")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(TargetModel.objects.count(), 2)
+        mission = MissionModel.objects.get()
+        self.assertEqual(
+            sorted(mission.targets.values_list("name", flat=True)),
+            ["Known", "New"],
+        )
+        self.existing.refresh_from_db()
+        self.assertEqual(self.existing.country, "UA")
+        self.assertEqual(self.existing.notes, "Seen before")
+
+    def test_existing_name_is_rejected_without_upsert(self):
+        response = self.create("New", "Known")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MissionModel.objects.exists())
+        self.assertFalse(TargetModel.objects.filter(name="New").exists())
+
+    def test_names_are_registered(self):
+        self.create("New", "Newer")
+
+        self.assertEqual(
+            sorted(TargetNameModel.objects.values_list("name", flat=True)),
+            ["New", "Newer"],
+        )
+
+    def test_name_of_deleted_target_is_claimed_again(self):
+        self.create("Gone")
+        MissionModel.objects.all().delete()
+        TargetModel.objects.filter(name="Gone").delete()
+
+        response = self.create("Gone")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            TargetNameModel.objects.filter(name="Gone").count(), 1
+        )
+
+    def test_duplicate_names_in_one_mission_are_rejected(self):
+        response = self.create("Twin", "Twin", upsert="true")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(MissionModel.objects.exists())
+
+
+class NotesAutosaveTest(APITestCase):
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+        self.target = TargetModel.objects.create(name="Target", country="UA")
+        self.mission = MissionModel.objects.create()
+        self.mission.targets.add(self.target)
+        self.commit_url = reverse(
+            "app:missionmodel-commit_notes", args=[self.mission.id]
+        )
+
+    def tearDown(self):
+        notes_buffer.flush()
+
+    def autosave(self, notes: str, target_id: int = None):
+        return self.client.put(
+            reverse(
+                "app:missionmodel-autosave_notes",
+                args=[self.mission.id, target_id or self.target.id],
+            ),
+            {"notes": notes},
+            format="json",
+        )
+
+    def test_autosaves_are_coalesced_until_commit(self):
+        for notes in ["Se", "Seen at", "Seen at dawn"]:
+            response = self.autosave(notes)
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+
+        self.target.refresh_from_db()
+        self.assertIsNone(self.target.notes)
+        self.assertEqual(NoteDraftModel.objects.count(), 1)
+
+        response = self.client.post(self.commit_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["targets"][0]["notes"], "Seen at dawn")
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.version, 2)
+        self.assertIsNotNone(self.target.notes_saved_at)
+        self.assertFalse(NoteDraftModel.objects.exists())
+
+    def test_commit_writes_drafts_of_other_processes(self):
+        # Saved by another worker, whose buffer this process never sees.
+        NoteDraftModel.objects.create(
+            target_id=self.target.id,
+            mission_id=self.mission.id,
+            notes="Seen elsewhere",
+            saved_at=timezone.now(),
+        )
+
+        response = self.client.post(self.commit_url)
+
+        self.assertEqual(
+            response.data["targets"][0]["notes"], "Seen elsewhere"
+        )
+        self.assertFalse(NoteDraftModel.objects.exists())
+
+    def test_commit_leaves_drafts_of_other_missions(self):
+        other = TargetModel.objects.create(name="Other", country="UA")
+        MissionModel.objects.create().targets.add(other)
+        NoteDraftModel.objects.create(
+            target_id=other.id,
+            mission_id=other.missions.get().id,
+            notes="Seen elsewhere",
+            saved_at=timezone.now(),
+        )
+        self.autosave("Seen")
+
+        self.client.post(self.commit_url)
+
+        self.assertEqual(
+            list(NoteDraftModel.objects.values_list("target_id", flat=True)),
+            [other.id],
+        )
+        other.refresh_from_db()
+        self.assertIsNone(other.notes)
+
+    def test_completion_writes_buffered_notes_first(self):
+        self.autosave("Seen")
+
+        self.client.post(
+            reverse("app:missionmodel-complete_targets"),
+            {"target_ids": [self.target.id]},
+            format="json",
+        )
+
+        self.target.refresh_from_db()
+        self.assertTrue(self.target.completed)
+        self.assertEqual(self.target.notes, "Seen")
+
+    def test_completed_target_or_mission_is_rejected(self):
+        TargetModel.objects.filter(id=self.target.id).update(completed=True)
+
+        response = self.autosave("Seen")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(NoteDraftModel.objects.exists())
+
+    def test_notes_of_completed_mission_are_dropped_on_flush(self):
+        self.autosave("Seen")
+        MissionModel.objects.filter(id=self.mission.id).update(completed=True)
+
+        flush_notes([self.target.id])
+
+        self.target.refresh_from_db()
+        self.assertIsNone(self.target.notes)
+
+    def test_target_of_another_mission(self):
+        other = TargetModel.objects.create(name="Other", country="UA")
+
+        response = self.autosave("Seen", target_id=other.id)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_newer_synchronous_update_wins(self):
+        self.autosave("Draft")
+        self.client.patch(
+            reverse("app:missionmodel-detail", args=[self.mission.id]),
+            {"targets": [{"id": self.target.id, "notes": "Final"}]},
+            format="json",
+        )
+
+        self.client.post(self.commit_url)
+
+        self.target.refresh_from_db()
+        self.assertEqual(self.target.notes, "Final")
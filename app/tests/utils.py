@@ -0,0 +1,142 @@
+import json
+import re
+import unittest
+from contextlib import ExitStack
+from typing import Any, Callable, Iterable, List
+
+from django.db import connection, connections
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+
+SQLITE_SCAN_RE = re.compile(r"\bSCAN (?P<table>\w+)(?P<rest>.*)")
+
+
+def _walk_postgres_plan(node: dict) -> Iterable[dict]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from _walk_postgres_plan(child)
+
+
+def find_sequential_scans(
+    queryset: QuerySet, tables: Iterable[str]
+) -> List[str]:
+    """
+    Return the tables from ``tables`` that the plan of ``queryset`` reads
+    with a full sequential scan.
+
+    On PostgreSQL the plan is built with ``enable_seqscan = off``, so a
+    ``Seq Scan`` node only survives when no index can serve the predicate
+    at all, regardless of table statistics. Skips the test on other
+    databases.
+    """
+    tables = set(tables)
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+        try:
+            plan = json.loads(queryset.explain(format="json"))
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("RESET enable_seqscan")
+        return [
+            node["Relation Name"]
+            for node in _walk_postgres_plan(plan[0]["Plan"])
+            if node["Node Type"] == "Seq Scan"
+            and node["Relation Name"] in tables
+        ]
+
+    if connection.vendor == "sqlite":
+        scans = []
+        for line in queryset.explain().splitlines():
+            match = SQLITE_SCAN_RE.search(line)
+            if (
+                match
+                and match["table"] in tables
+                and "INDEX" not in match["rest"]
+            ):
+                scans.append(match["table"])
+        return scans
+
+    raise unittest.SkipTest(
+        f"Query plans are not checked on {connection.vendor}"
+    )
+
+
+class QueryPlanAssertionsMixin:
+    large_tables = ()
+
+    def assertNoSequentialScans(self, queryset: QuerySet) -> None:
+        scans = find_sequential_scans(queryset, self.large_tables)
+        if scans:
+            self.fail(
+                f"Sequential scan on {', '.join(scans)}:\n"
+                f"{queryset.query}\n\n{queryset.explain()}"
+            )
+
+
+class QueryBudgetMixin:
+    """
+    Assert that an operation runs a bounded number of SQL queries that does
+    not grow with the amount of related data.
+    """
+
+    query_budget_sizes = (1, 10, 100)
+
+    def assertQueryBudget(
+        self, budget: int, setup: Callable[[int], Callable[[], Any]]
+    ) -> None:
+        """
+        ``setup(size)`` seeds ``size`` related rows and returns the
+        operation to measure; only the operation's queries are counted, on
+        every database of the test (shards included).
+        """
+        aliases = [alias for alias in connections if alias in self.databases]
+        counts = {}
+        queries = {}
+        for size in self.query_budget_sizes:
+            operation = setup(size)
+            with ExitStack() as stack:
+                contexts = {
+                    alias: stack.enter_context(
+                        CaptureQueriesContext(connections[alias])
+                    )
+                    for alias in aliases
+                }
+                operation()
+            queries[size] = [
+                {**query, "sql": f"[{alias}] {query['sql']}"}
+                for alias, context in contexts.items()
+                for query in context.captured_queries
+            ]
+            counts[size] = len(queries[size])
+
+        largest = max(counts, key=lambda size: counts[size])
+        if counts[largest] <= budget and len(set(counts.values())) == 1:
+            return
+
+        sql = "\n".join(
+            f"{number}. {query['sql']}"
+            for number, query in enumerate(queries[largest], start=1)
+        )
+        summary = ", ".join(
+            f"{count} at {size} rows" for size, count in counts.items()
+        )
+        self.fail(
+            f"Query budget of {budget} exceeded or not constant "
+            f"({summary}). Queries at {largest} rows:\n{sql}"
+        )
+
+
+STUB_BREEDS = [
+    "Abyssinian",
+    "British Shorthair",
+    "Maine Coon",
+    "Persian",
+    "Siamese",
+    "Sphynx",
+]
+
+
+def stub_breed_names() -> List[str]:
+    """``BREED_CATALOG_SOURCE`` of the test settings, instead of TheCatAPI."""
+    return list(STUB_BREEDS)
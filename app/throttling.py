@@ -0,0 +1,21 @@
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class BatchAwareThrottleMixin:
+    """
+    Let the sub-requests of ``POST /api/v1/batch/`` through: the batch
+    request was throttled once for all of them.
+    """
+
+    def allow_request(self, request, view) -> bool:
+        if getattr(request, "is_batch_subrequest", False):
+            return True
+        return super().allow_request(request, view)
+
+
+class BatchAwareAnonRateThrottle(BatchAwareThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class BatchAwareUserRateThrottle(BatchAwareThrottleMixin, UserRateThrottle):
+    pass
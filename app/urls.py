@@ -1,14 +1,23 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from app.views import CatViewSet, MissionViewSet
+from app.views import (
+    ArchivedMissionViewSet,
+    AuditLogViewSet,
+    BatchView,
+    CatViewSet,
+    MissionViewSet,
+)
 
 router = DefaultRouter()
 
 router.register("cats", CatViewSet)
 router.register("missions", MissionViewSet)
+router.register("archive/missions", ArchivedMissionViewSet)
+router.register("audit", AuditLogViewSet)
 
 urlpatterns = [
+    path("batch/", BatchView.as_view(), name="batch"),
     path("", include(router.urls)),
 ]
 
@@ -1,30 +1,165 @@
-from django.http import HttpRequest
+from django.conf import settings
+from django.http import Http404, HttpRequest, StreamingHttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import (
     extend_schema_view,
     extend_schema,
+    OpenApiParameter,
     OpenApiResponse,
 )
-from rest_framework import viewsets, status
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 
-from app.models import CatModel, MissionModel
+from app.audit import record, reset_actor, set_actor
+from app.autosave import autosave_notes, flush_notes
+from app.batch import run_batch
+from app.authentication import RevocableRefreshToken
+from app.completion import complete_targets
+from app.concurrency import get_etag, parse_if_match
+from app.idempotency import idempotent
+from app.models import (
+    LEADERBOARD_ORDERING,
+    ArchivedMissionModel,
+    AuditLogModel,
+    CatModel,
+    CatPerformanceModel,
+    MissionModel,
+)
 from app.permissions import IsAdminOrCatAssigned
+from app.profiling import ProfiledViewMixin
+from app.reports import PAYROLL_FORMATS, payroll_rows
 from app.serializers import (
+    ArchivedMissionSerializer,
+    AuditLogSerializer,
+    BatchResultSerializer,
+    BatchSerializer,
+    CatPerformanceSerializer,
     CatSerializer,
     CatUpdateSerializer,
+    CompleteTargetsResultSerializer,
+    CompleteTargetsSerializer,
+    LogoutSerializer,
+    MissionChangesSerializer,
     MissionSerializer,
     MissionListSerializer,
     MissionUpdateSerializer,
+    TargetNotesSerializer,
+)
+from app.revocation import revoke_token
+from app.sharding import (
+    ShardedQuerySet,
+    in_bulk,
+    locate,
+    on_shard,
+    shards_for,
+)
+from app.sync import (
+    CursorExpired,
+    InvalidCursor,
+    SyncCursor,
+    get_batch_size,
+    get_changes,
+)
+
+
+def batch_ids_parameter(name: str) -> OpenApiParameter:
+    return OpenApiParameter(
+        "ids",
+        str,
+        description=f"Comma-separated {name} IDs to fetch in one request, "
+        f"at most {settings.BATCH_RETRIEVE_MAX_IDS}. The response is then "
+        "{results, missing} instead of a page.",
+    )
+
+
+IF_MATCH_PARAMETER = OpenApiParameter(
+    "If-Match",
+    str,
+    location=OpenApiParameter.HEADER,
+    description="ETag of the mission as last read. The update fails with "
+    "412 if the mission has changed since.",
 )
 
 
+class AuditActorMixin:
+    """Attribute audit log entries written during a request to its user."""
+
+    def initial(self, request: HttpRequest, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        self._audit_token = set_actor(request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, "_audit_token", None)
+        if token is not None:
+            reset_actor(token)
+            self._audit_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class BatchRetrieveMixin:
+    """
+    Let ``list`` return specific objects with ``?ids=1,2,3``.
+
+    The objects are loaded with one ``in_bulk`` query (plus the queryset's
+    prefetches) and checked with the same object permissions as
+    ``retrieve``. Ids that do not exist or are not visible to the user are
+    reported under ``missing``, in request order.
+    """
+
+    def list(self, request: HttpRequest, *args, **kwargs) -> Response:
+        raw_ids = request.query_params.get("ids")
+        if raw_ids is None:
+            return super().list(request, *args, **kwargs)
+
+        try:
+            ids = list(
+                dict.fromkeys(int(pk) for pk in raw_ids.split(",") if pk)
+            )
+        except ValueError:
+            return Response(
+                {"error": "ids must be a comma-separated list of integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(ids) > settings.BATCH_RETRIEVE_MAX_IDS:
+            return Response(
+                {
+                    "error": "At most "
+                    f"{settings.BATCH_RETRIEVE_MAX_IDS} ids per request."
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        objects = in_bulk(self.filter_queryset(self.get_queryset()), ids)
+        permissions = self.get_permissions()
+        results, missing = [], []
+        for pk in ids:
+            obj = objects.get(pk)
+            if obj is not None and all(
+                permission.has_object_permission(request, self, obj)
+                for permission in permissions
+            ):
+                results.append(obj)
+            else:
+                missing.append(pk)
+
+        serializer = self.get_serializer(results, many=True)
+        return Response({"results": serializer.data, "missing": missing})
+
+
 @extend_schema_view(
     list=extend_schema(
         summary="List all spy cats",
-        description="Retrieve a list of all cats.",
+        description="Retrieve a list of all cats, or specific cats with "
+        "?ids=.",
         tags=["Cats"],
+        parameters=[batch_ids_parameter("cat")],
     ),
     create=extend_schema(
         summary="Create a new spy cat",
@@ -51,8 +186,34 @@ from app.serializers import (
         description="Delete a specific cat. Need to be admin.",
         tags=["Cats"],
     ),
+    leaderboard=extend_schema(
+        summary="Cat leaderboard",
+        description="Cats ranked by completed missions, then completed "
+        "targets, then experience.",
+        tags=["Cats"],
+        responses=CatPerformanceSerializer(many=True),
+    ),
+    payroll=extend_schema(
+        summary="Payroll report",
+        description="Stream one row per cat followed by salary totals per "
+        "breed, per experience band and overall. Need to be admin.",
+        tags=["Cats"],
+        parameters=[
+            OpenApiParameter(
+                "output",
+                str,
+                enum=sorted(PAYROLL_FORMATS),
+                default="csv",
+                description="Report format.",
+            ),
+        ],
+        responses={
+            (200, content_type): OpenApiTypes.STR
+            for _, content_type in PAYROLL_FORMATS.values()
+        },
+    ),
 )
-class CatViewSet(viewsets.ModelViewSet):
+class CatViewSet(ProfiledViewMixin, BatchRetrieveMixin, viewsets.ModelViewSet):
     queryset = CatModel.objects.all()
     permission_classes = (IsAuthenticated,)
     serializer_class = CatSerializer
@@ -65,19 +226,63 @@ class CatViewSet(viewsets.ModelViewSet):
     def get_serializer_class(self):
         if self.action in ("update", "partial_update"):
             self.serializer_class = CatUpdateSerializer
+        elif self.action == "leaderboard":
+            return CatPerformanceSerializer
         return super().get_serializer_class()
 
+    @action(detail=False, methods=["GET"], url_path="leaderboard")
+    def leaderboard(self, request: HttpRequest) -> Response:
+        queryset = CatPerformanceModel.objects.select_related("cat").order_by(
+            *LEADERBOARD_ORDERING
+        )
+
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path="payroll",
+        permission_classes=[IsAdminUser],
+    )
+    def payroll(self, request: HttpRequest):
+        output = request.query_params.get("output", "csv")
+        if output not in PAYROLL_FORMATS:
+            return Response(
+                {"error": f"Unknown output format: {output}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        render, content_type = PAYROLL_FORMATS[output]
+        response = StreamingHttpResponse(
+            render(payroll_rows()), content_type=content_type
+        )
+        filename = f"payroll-{timezone.now():%Y-%m-%d}.{output}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
 
 @extend_schema_view(
     list=extend_schema(
         summary="List all missions",
-        description="Retrieve a list of all missions.",
+        description="Retrieve a list of all missions, or specific missions "
+        "with ?ids=.",
         tags=["Missions"],
+        parameters=[batch_ids_parameter("mission")],
     ),
     create=extend_schema(
         summary="Create a new mission",
         description="Create a new mission. Need to be admin.",
         tags=["Missions"],
+        parameters=[
+            OpenApiParameter(
+                "upsert",
+                bool,
+                description="Link targets whose name already exists "
+                "instead of failing.",
+            ),
+        ],
     ),
     retrieve=extend_schema(
         summary="Retrieve a specific mission",
@@ -89,12 +294,14 @@ class CatViewSet(viewsets.ModelViewSet):
         description="Update a mission's details. "
         "Need to be admin or cat assigned.",
         tags=["Missions"],
+        parameters=[IF_MATCH_PARAMETER],
     ),
     partial_update=extend_schema(
         summary="Partially update a specific mission",
         description="Partially update a mission's details. "
         "Need to be admin or cat assigned.",
         tags=["Missions"],
+        parameters=[IF_MATCH_PARAMETER],
     ),
     destroy=extend_schema(
         summary="Delete a specific mission",
@@ -121,8 +328,75 @@ class CatViewSet(viewsets.ModelViewSet):
             200: OpenApiResponse(description="Mission completed"),
         },
     ),
+    bulk_complete_targets=extend_schema(
+        summary="Complete many targets",
+        description="Mark targets completed across missions in one "
+        "transaction, then complete every mission with no incomplete "
+        "target left and unassign its cat. Need to be admin.",
+        tags=["Missions"],
+        request=CompleteTargetsSerializer,
+        responses={
+            200: CompleteTargetsResultSerializer,
+            400: OpenApiResponse(description="Invalid target ids"),
+        },
+    ),
+    autosave_target_notes=extend_schema(
+        summary="Autosave the notes of a target",
+        description="Buffer new notes for a target of the mission. They "
+        "are written within a few seconds, or at once by a commit or "
+        "when the target or mission is completed; the latest notes "
+        "received win. Need to be admin or cat assigned.",
+        tags=["Missions"],
+        request=TargetNotesSerializer,
+        responses={
+            202: OpenApiResponse(description="Notes buffered"),
+            400: OpenApiResponse(
+                description="Target or mission already completed"
+            ),
+            404: OpenApiResponse(description="Target not in the mission"),
+        },
+    ),
+    commit_notes=extend_schema(
+        summary="Commit autosaved notes",
+        description="Write buffered notes now and return the mission as "
+        "stored. Need to be admin or cat assigned.",
+        tags=["Missions"],
+        request=None,
+        responses={200: MissionListSerializer},
+    ),
+    changes=extend_schema(
+        summary="Missions changed since a cursor",
+        description="Return missions changed and ids of missions deleted "
+        "after the given sync cursor, in bounded batches. Pass the "
+        "returned cursor back to continue; keep going while has_more.",
+        tags=["Missions"],
+        parameters=[
+            OpenApiParameter(
+                "since",
+                str,
+                description="Cursor returned by the previous call. "
+                "Omit for a full sync.",
+            ),
+            OpenApiParameter(
+                "limit", int, description="Maximum rows per stream."
+            ),
+        ],
+        responses={
+            200: MissionChangesSerializer,
+            400: OpenApiResponse(description="Invalid cursor or limit"),
+            410: OpenApiResponse(
+                description="Cursor older than the kept deletions; sync "
+                "again without a cursor"
+            ),
+        },
+    ),
 )
-class MissionViewSet(viewsets.ModelViewSet):
+class MissionViewSet(
+    ProfiledViewMixin,
+    AuditActorMixin,
+    BatchRetrieveMixin,
+    viewsets.ModelViewSet,
+):
     queryset = (
         MissionModel.objects.all()
         .select_related("cat")
@@ -145,6 +419,45 @@ class MissionViewSet(viewsets.ModelViewSet):
             return MissionUpdateSerializer
         return super().get_serializer_class()
 
+    @idempotent
+    def create(self, request: HttpRequest, *args, **kwargs) -> Response:
+        return super().create(request, *args, **kwargs)
+
+    def get_object(self) -> MissionModel:
+        queryset = self.filter_queryset(self.get_queryset())
+        mission = locate(queryset, self.kwargs[self.lookup_field])
+        if mission is None:
+            raise Http404
+        self.check_object_permissions(self.request, mission)
+        return mission
+
+    def paginate_queryset(self, queryset):
+        return super().paginate_queryset(ShardedQuerySet(queryset, ["id"]))
+
+    def get_serializer_context(self) -> dict:
+        context = super().get_serializer_context()
+        if self.action == "create":
+            upsert = self.request.query_params.get("upsert", "")
+            context["upsert"] = upsert.lower() in ("true", "1")
+        if self.action in ("update", "partial_update"):
+            context["expected_version"] = parse_if_match(self.request)
+        return context
+
+    def retrieve(self, request: HttpRequest, *args, **kwargs) -> Response:
+        instance = self.get_object()
+        serializer = self.get_serializer(instance)
+        return Response(serializer.data, headers={"ETag": get_etag(instance)})
+
+    @idempotent
+    def update(self, request: HttpRequest, *args, **kwargs) -> Response:
+        response = super().update(request, *args, **kwargs)
+        response["ETag"] = get_etag(self.updated_instance)
+        return response
+
+    def perform_update(self, serializer) -> None:
+        serializer.save()
+        self.updated_instance = serializer.instance
+
     @action(
         detail=True,
         methods=["GET"],
@@ -172,7 +485,10 @@ class MissionViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND,
             )
 
-        if cat.missions.count() != 0:
+        if any(
+            on_shard(cat.missions.filter(completed=False), alias).exists()
+            for alias in shards_for(MissionModel)
+        ):
             return Response(
                 {
                     "error": "A cat can only be assigned to one mission at a time."
@@ -191,6 +507,7 @@ class MissionViewSet(viewsets.ModelViewSet):
 
         mission.cat = cat
         mission.save()
+        record("assign", mission, cat=cat.id)
 
         serializer = MissionListSerializer(mission)
         return Response(serializer.data)
@@ -206,10 +523,237 @@ class MissionViewSet(viewsets.ModelViewSet):
         mission: MissionModel = self.get_object()
 
         if not mission.completed:
-            mission.completed = True
-            mission.cat = None
-            mission.save()
+            mission.complete()
 
         return Response(
             {"success": "Mission completed."}, status=status.HTTP_200_OK
         )
+
+    @action(
+        detail=False,
+        methods=["POST"],
+        url_path="complete-targets",
+        url_name="complete_targets",
+        permission_classes=[IsAdminUser],
+    )
+    def bulk_complete_targets(self, request: HttpRequest) -> Response:
+        serializer = CompleteTargetsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = complete_targets(serializer.validated_data["target_ids"])
+        return Response(CompleteTargetsResultSerializer(result).data)
+
+    @action(
+        detail=True,
+        methods=["PUT"],
+        url_path=r"targets/(?P<target_id>\d+)/notes",
+        url_name="autosave_notes",
+        permission_classes=[IsAdminOrCatAssigned],
+    )
+    def autosave_target_notes(
+        self, request: HttpRequest, pk: int = None, target_id: str = None
+    ) -> Response:
+        mission: MissionModel = self.get_object()
+        target = next(
+            (t for t in mission.targets.all() if t.id == int(target_id)),
+            None,
+        )
+        if target is None:
+            return Response(
+                {"error": f"Target {target_id} is not in this mission."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        serializer = TargetNotesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        autosave_notes(
+            mission, target, serializer.validated_data["notes"], request.user
+        )
+        return Response(status=status.HTTP_202_ACCEPTED)
+
+    @action(
+        detail=True,
+        methods=["POST"],
+        url_path="notes/commit",
+        url_name="commit_notes",
+        permission_classes=[IsAdminOrCatAssigned],
+    )
+    def commit_notes(self, request: HttpRequest, pk: int = None) -> Response:
+        mission = self.get_object()
+        flush_notes([target.id for target in mission.targets.all()])
+        mission.refresh_from_db()
+        return Response(
+            MissionListSerializer(mission).data,
+            headers={"ETag": get_etag(mission)},
+        )
+
+    @action(detail=False, methods=["GET"], url_path="changes")
+    def changes(self, request: HttpRequest) -> Response:
+        try:
+            cursor = SyncCursor.decode(request.query_params.get("since"))
+            limit = get_batch_size(request.query_params.get("limit"))
+        except InvalidCursor as e:
+            return Response(
+                {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            change_set = get_changes(self.get_queryset(), cursor, limit)
+        except CursorExpired as e:
+            return Response({"error": str(e)}, status=status.HTTP_410_GONE)
+        serializer = MissionChangesSerializer(
+            {
+                "missions": change_set.missions,
+                "deleted": change_set.deleted,
+                "cursor": change_set.cursor.encode(),
+                "has_more": change_set.has_more,
+            }
+        )
+        return Response(serializer.data)
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List archived missions",
+        description="Retrieve completed missions moved to the archive.",
+        tags=["Archive"],
+    ),
+    retrieve=extend_schema(
+        summary="Retrieve an archived mission",
+        description="Retrieve an archived mission by its original ID.",
+        tags=["Archive"],
+    ),
+)
+class ArchivedMissionViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = ArchivedMissionModel.objects.prefetch_related(
+        "targets"
+    ).order_by("-id")
+    permission_classes = (IsAuthenticated,)
+    serializer_class = ArchivedMissionSerializer
+
+
+class AuditLogPagination(CursorPagination):
+    ordering = "-id"
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "limit"
+
+
+@extend_schema_view(
+    list=extend_schema(
+        summary="List audit log entries",
+        description="Changes to missions and targets, newest first. Follow "
+        "the next link to page through older entries. Need to be admin.",
+        tags=["Audit"],
+        parameters=[
+            OpenApiParameter(
+                "model",
+                str,
+                enum=["missionmodel", "targetmodel"],
+                description="Only entries for this model.",
+            ),
+            OpenApiParameter(
+                "object_id", int, description="Only entries for this object."
+            ),
+            OpenApiParameter(
+                "action",
+                str,
+                enum=AuditLogModel.Action.values,
+                description="Only entries for this action.",
+            ),
+        ],
+    ),
+)
+class AuditLogViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    queryset = AuditLogModel.objects.all()
+    permission_classes = (IsAdminUser,)
+    serializer_class = AuditLogSerializer
+    pagination_class = AuditLogPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if params.get("model"):
+            queryset = queryset.filter(model_name=params["model"])
+        if params.get("object_id"):
+            try:
+                queryset = queryset.filter(object_id=int(params["object_id"]))
+            except ValueError:
+                queryset = queryset.none()
+        if params.get("action"):
+            queryset = queryset.filter(action=params["action"])
+        return queryset
+
+
+class LogoutView(APIView):
+    """Revoke the access token of the request and an optional refresh."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Log out",
+        description="Revoke the access token used for this request and "
+        "the given refresh token until they expire.",
+        request=LogoutSerializer,
+        responses={
+            204: OpenApiResponse(description="Tokens revoked"),
+            400: OpenApiResponse(description="Invalid refresh token"),
+        },
+    )
+    def post(self, request: HttpRequest) -> Response:
+        serializer = LogoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        refresh = None
+        if serializer.validated_data.get("refresh"):
+            try:
+                refresh = RevocableRefreshToken(
+                    serializer.validated_data["refresh"]
+                )
+            except TokenError as e:
+                return Response(
+                    {"error": str(e)}, status=status.HTTP_400_BAD_REQUEST
+                )
+            user_id = getattr(request.user, jwt_settings.USER_ID_FIELD)
+            if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(user_id):
+                return Response(
+                    {"error": "Refresh token belongs to another user."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+        if request.auth is not None:
+            revoke_token(request.auth)
+        if refresh is not None:
+            revoke_token(refresh)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class BatchView(APIView):
+    """Run several API requests in one round trip."""
+
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(
+        summary="Run a batch of requests",
+        description="Run up to "
+        f"{settings.BATCH_MAX_OPERATIONS} requests against the "
+        "/api/v1/ endpoints in order, as the authenticated user, and return "
+        "their responses together. The batch counts as one request for "
+        "throttling. With atomic, the operations share one transaction "
+        "that is rolled back if one of them fails; the operations after it "
+        "are not run and get status 424.",
+        request=BatchSerializer,
+        responses={200: BatchResultSerializer},
+    )
+    def post(self, request: HttpRequest) -> Response:
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        result = run_batch(
+            request,
+            serializer.validated_data["operations"],
+            atomic=serializer.validated_data["atomic"],
+        )
+        return Response(
+            {"responses": result.responses, "rolled_back": result.rolled_back}
+        )
@@ -0,0 +1,194 @@
+"""
+Gunicorn concurrency benchmark.
+
+Starts gunicorn with ``gunicorn.conf.py`` once per configuration, drives it
+with concurrent keep-alive clients and reports throughput, latency and the
+memory used by the whole process tree (PSS, so pages shared copy-on-write
+are only counted once).
+
+A configuration is ``<worker class>:<workers>x<threads>``, e.g.:
+
+    python benchmarks/concurrency.py sync:1x1 sync:5x1 gthread:2x8 \
+        --clients 32 --duration 10 --path /healthz
+"""
+
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def parse_config(value: str) -> tuple:
+    worker_class, _, size = value.partition(":")
+    workers, _, threads = size.partition("x")
+    return worker_class, int(workers or 1), int(threads or 1)
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_tree_pids(pid: int) -> list:
+    pids = [pid]
+    for child in Path(f"/proc/{pid}/task").glob("*/children"):
+        for child_pid in child.read_text().split():
+            pids.extend(get_tree_pids(int(child_pid)))
+    return pids
+
+
+def get_memory_mb(pid: int) -> tuple:
+    """Total (PSS, RSS) in MiB of ``pid`` and its descendants."""
+    pss = rss = 0
+    for tree_pid in get_tree_pids(pid):
+        try:
+            rollup = Path(f"/proc/{tree_pid}/smaps_rollup").read_text()
+        except OSError:
+            continue
+        for line in rollup.splitlines():
+            if line.startswith("Pss:"):
+                pss += int(line.split()[1])
+            elif line.startswith("Rss:"):
+                rss += int(line.split()[1])
+    return pss / 1024, rss / 1024
+
+
+def wait_until_ready(port: int, path: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", path)
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"gunicorn did not answer on port {port}")
+
+
+def client(port, path, headers, stop, latencies, errors):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors.append(1)
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+        if response.status >= 500:
+            errors.append(1)
+    conn.close()
+
+
+def run(config: str, args) -> dict:
+    worker_class, workers, threads = parse_config(config)
+    port = get_free_port()
+    env = dict(os.environ)
+    env.update(
+        {
+            "PORT": str(port),
+            "WEB_CONCURRENCY": str(workers),
+            "GUNICORN_THREADS": str(threads),
+            "GUNICORN_WORKER_CLASS": worker_class,
+            "GUNICORN_PRELOAD": "1" if args.preload else "0",
+        }
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py"],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_until_ready(port, args.path, timeout=30)
+        idle_pss, idle_rss = get_memory_mb(server.pid)
+
+        headers = dict(header.split(": ", 1) for header in args.header)
+        stop = threading.Event()
+        latencies, errors = [], []
+        clients = [
+            threading.Thread(
+                target=client,
+                args=(port, args.path, headers, stop, latencies, errors),
+            )
+            for _ in range(args.clients)
+        ]
+        for thread in clients:
+            thread.start()
+        time.sleep(args.duration)
+        loaded_pss, loaded_rss = get_memory_mb(server.pid)
+        stop.set()
+        for thread in clients:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    latencies.sort()
+    return {
+        "config": config,
+        "rps": len(latencies) / args.duration,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99": (
+            latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        ),
+        "errors": len(errors),
+        "idle_pss": idle_pss,
+        "loaded_pss": loaded_pss,
+        "loaded_rss": loaded_rss,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "configs", nargs="*", default=["sync:1x1", "sync:4x1", "gthread:2x8"]
+    )
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--path", default="/healthz")
+    parser.add_argument(
+        "--header",
+        action="append",
+        default=[],
+        help='Extra request header, e.g. "Authorization: Bearer <token>".',
+    )
+    parser.add_argument(
+        "--no-preload", dest="preload", action="store_false", default=True
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'config':<16}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+        f"{'errors':>8}{'idle PSS':>10}{'PSS':>10}{'RSS':>10}"
+    )
+    for config in args.configs:
+        result = run(config, args)
+        print(
+            f"{result['config']:<16}{result['rps']:>10.1f}"
+            f"{result['p50']:>10.1f}{result['p99']:>10.1f}"
+            f"{result['errors']:>8}{result['idle_pss']:>9.0f}M"
+            f"{result['loaded_pss']:>9.0f}M{result['loaded_rss']:>9.0f}M"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Write contention benchmark: optimistic versions vs select_for_update.
+
+Several threads keep editing the notes of the same few targets, each edit
+being a read followed by a write, like a client doing GET then PATCH:
+
+    optimistic   read the row, then UPDATE ... WHERE version = ?; on a
+                 conflict read again and retry
+    pessimistic  SELECT ... FOR UPDATE inside a transaction, then save
+
+Run it against the real database (PostgreSQL), e.g.:
+
+    python benchmarks/contention.py --threads 16 --rows 1 --duration 10
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "SCA.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+
+from app.concurrency import PreconditionFailed, conditional_update  # noqa
+from app.models import TargetModel  # noqa: E402
+
+
+def optimistic_edit(target_id: int, note: str) -> int:
+    """Return the number of conflicts before the edit went through."""
+    conflicts = 0
+    while True:
+        target = TargetModel.objects.get(pk=target_id)
+        try:
+            conditional_update(target, target.version, notes=note)
+            return conflicts
+        except PreconditionFailed:
+            conflicts += 1
+
+
+def pessimistic_edit(target_id: int, note: str) -> int:
+    with transaction.atomic():
+        target = TargetModel.objects.select_for_update().get(pk=target_id)
+        target.notes = note
+        target.save(update_fields=["notes", "version", "updated_at"])
+    return 0
+
+
+STRATEGIES = {"optimistic": optimistic_edit, "pessimistic": pessimistic_edit}
+
+
+def worker(edit, target_ids, stop, latencies, conflicts, index):
+    try:
+        i = 0
+        while not stop.is_set():
+            target_id = target_ids[(index + i) % len(target_ids)]
+            started = time.perf_counter()
+            conflicts.append(edit(target_id, f"edit {index}-{i}"))
+            latencies.append(time.perf_counter() - started)
+            i += 1
+    finally:
+        connection.close()
+
+
+def run(strategy: str, target_ids: list, args) -> dict:
+    stop = threading.Event()
+    latencies, conflicts = [], []
+    threads = [
+        threading.Thread(
+            target=worker,
+            args=(
+                STRATEGIES[strategy],
+                target_ids,
+                stop,
+                latencies,
+                conflicts,
+                index,
+            ),
+        )
+        for index in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        "strategy": strategy,
+        "edits": len(latencies),
+        "rate": len(latencies) / args.duration,
+        "p50": statistics.median(latencies) * 1000 if latencies else 0,
+        "p99": (
+            latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        ),
+        "retries": sum(conflicts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[1],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "strategies", nargs="*", default=sorted(STRATEGIES), choices=STRATEGIES
+    )
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument(
+        "--rows", type=int, default=1, help="Targets being edited."
+    )
+    parser.add_argument("--duration", type=float, default=5)
+    args = parser.parse_args()
+
+    targets = TargetModel.objects.bulk_create(
+        TargetModel(name=f"contention-{os.getpid()}-{i}", country="UA")
+        for i in range(args.rows)
+    )
+    target_ids = [target.id for target in targets]
+    try:
+        print(
+            f"{'strategy':<14}{'edits/s':>10}{'p50 ms':>10}{'p99 ms':>10}"
+            f"{'retries':>10}"
+        )
+        for strategy in args.strategies:
+            result = run(strategy, target_ids, args)
+            print(
+                f"{result['strategy']:<14}{result['rate']:>10.1f}"
+                f"{result['p50']:>10.1f}{result['p99']:>10.1f}"
+                f"{result['retries']:>10}"
+            )
+    finally:
+        TargetModel.objects.filter(id__in=target_ids).delete()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Cold start benchmark.
+
+Measures, for each settings profile, how long it takes to import the WSGI
+application and how long a freshly started gunicorn worker needs to answer
+its first request.
+
+Usage:
+    python benchmarks/startup.py --env dev prod --runs 5
+"""
+
+import argparse
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_TIME_RE = re.compile(
+    r"import time:\s+(?P<self>\d+) \|\s+(?P<cumulative>\d+) \|(?P<name>.*)"
+)
+
+
+def get_env(profile: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        {
+            "DJANGO_ENV": profile,
+            "DJANGO_SETTINGS_MODULE": "SCA.settings",
+            "DJANGO_SECRET_KEY": env.get("DJANGO_SECRET_KEY", "benchmark"),
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1,localhost",
+            "PYTHONDONTWRITEBYTECODE": "1",
+        }
+    )
+    return env
+
+
+def measure_import(profile: str, top: int) -> tuple:
+    """Import ``SCA.wsgi`` in a fresh interpreter with ``-X importtime``."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import SCA.wsgi"],
+        cwd=BASE_DIR,
+        env=get_env(profile),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = time.perf_counter() - started
+
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_RE.match(line)
+        if match:
+            package = match["name"].strip().split(".")[0]
+            packages[package] = (
+                packages.get(package, 0) + int(match["self"]) / 1e6
+            )
+    heaviest = sorted(
+        ((seconds, name) for name, seconds in packages.items()), reverse=True
+    )
+    return elapsed, heaviest[:top]
+
+
+def get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_response(profile: str, path: str, timeout: float) -> float:
+    """Start a single gunicorn worker and time its first HTTP response."""
+    port = get_free_port()
+    url = f"http://127.0.0.1:{port}{path}"
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "gunicorn",
+            "--workers",
+            "1",
+            "--bind",
+            f"127.0.0.1:{port}",
+            "SCA.wsgi:application",
+        ],
+        cwd=BASE_DIR,
+        env=get_env(profile),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                urllib.request.urlopen(url, timeout=timeout)
+            except urllib.error.HTTPError:
+                pass
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+                continue
+            return time.perf_counter() - started
+        raise TimeoutError(f"No response from {url} in {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--env", nargs="+", default=["dev", "prod"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--path", default="/api/v1/")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    for profile in args.env:
+        imports = []
+        first_responses = []
+        slowest = []
+        for _ in range(args.runs):
+            elapsed, slowest = measure_import(profile, args.top)
+            imports.append(elapsed)
+            first_responses.append(
+                measure_first_response(profile, args.path, args.timeout)
+            )
+
+        print(f"== {profile}")
+        print(
+            f"import SCA.wsgi:      median {statistics.median(imports):.3f}s"
+            f"  min {min(imports):.3f}s"
+        )
+        print(
+            f"first response:       median "
+            f"{statistics.median(first_responses):.3f}s"
+            f"  min {min(first_responses):.3f}s"
+        )
+        print("heaviest packages (self import time):")
+        for seconds, name in slowest:
+            print(f"  {seconds:8.3f}s  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Gunicorn configuration.
+
+Every value can be tuned with environment variables, so the same image can
+be sized per deployment:
+
+    WEB_CONCURRENCY          number of worker processes
+    GUNICORN_THREADS         threads per worker (gthread worker class)
+    GUNICORN_WORKER_CLASS    sync, gthread or asgi
+    GUNICORN_PRELOAD         load the app in the master before forking
+    GUNICORN_MAX_REQUESTS    recycle a worker after this many requests
+    GUNICORN_MAX_REQUESTS_JITTER
+    GUNICORN_TIMEOUT
+    PORT
+"""
+
+import gc
+import math
+import os
+
+WORKER_CLASSES = {
+    "sync": "sync",
+    "gthread": "gthread",
+    "asgi": "uvicorn_worker.UvicornWorker",
+}
+
+
+def available_cpus() -> int:
+    """
+    CPUs this container may actually use: the cgroup v2 quota if there is
+    one, otherwise the scheduler affinity mask.
+    """
+    cpus = len(os.sched_getaffinity(0))
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(cpus, 1)
+
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ("1", "true", "yes", "on")
+
+
+_worker_type = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+if _worker_type not in WORKER_CLASSES:
+    raise ValueError(f"Unknown GUNICORN_WORKER_CLASS: {_worker_type}")
+
+worker_class = WORKER_CLASSES[_worker_type]
+threads = int(
+    os.environ.get("GUNICORN_THREADS", 4 if _worker_type == "gthread" else 1)
+)
+
+# Sync workers block on every request, so they need more processes than
+# cores. Threaded and async workers overlap I/O inside one process.
+_default_workers = (
+    available_cpus() * 2 + 1
+    if _worker_type == "sync"
+    else available_cpus() + 1
+)
+workers = int(os.environ.get("WEB_CONCURRENCY", _default_workers))
+
+wsgi_app = (
+    "SCA.asgi:application"
+    if _worker_type == "asgi"
+    else "SCA.wsgi:application"
+)
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Import Django and the project once in the master; forked workers share
+# those pages copy-on-write instead of each importing them again.
+preload_app = env_bool("GUNICORN_PRELOAD", True)
+
+# Recycle workers periodically to bound slow leaks. The jitter keeps all
+# workers from restarting at the same moment.
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(
+    os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", max_requests // 10)
+)
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+graceful_timeout = timeout
+keepalive = 5
+
+
+def pre_fork(server, worker):
+    # Move everything imported so far into the permanent generation, so the
+    # cyclic GC in the workers does not write to (and un-share) those pages.
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Connections opened in the master must not be shared between workers.
+    if server.cfg.preload_app:
+        from django.db import connections
+
+        connections.close_all()
+
+
+def worker_exit(server, worker):
+    # Write out buffered audit entries before the worker goes away.
+    from app.buffers import flush_all
+
+    flush_all()